@@ -1,22 +1,315 @@
+import asyncpg
+import contextlib
+import io
 import enum
 import logging
 import os
 import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+import select
+import threading
+import time
 
+from concurrent.futures import ThreadPoolExecutor
 from psycopg2 import sql
+from typing import Any, Iterator
 
+from pkstrategy import DBPrimaryKeyType, KeyColumn, PrimaryKeyStrategy, get_strategy
 
 class DBOperation(enum.Enum):
     INSERT = "insert"
     SELECT = "select"
     UPDATE = "update"
     DELETE = "delete"
+    FK_INSERT = "fkinsert"
+    JOIN = "join"
+    CASCADE = "cascade"
+    SCAN = "scan"
+    RECENT = "recent"
 
 
-class DBPrimaryKeyType(enum.Enum):
-    BIGINT = "bigint"
-    UUIDV4 = "uuidv4"
-    UUIDV7 = "uuidv7"
+class DBParamStyle(enum.Enum):
+    FORMAT = "format"
+    NUMERIC = "numeric"
+
+
+class DBStatementFamily(enum.Enum):
+    LITERAL = "literal"
+    ARRAY = "array"
+
+
+class DBInsertMode(enum.Enum):
+    VALUES = "values"
+    COPY = "copy"
+    COPY_BINARY = "copybinary"
+
+
+class DBKeyGeneration(enum.Enum):
+    SERVER = "server"
+    CLIENT = "client"
+
+
+class DBPlanCacheMode(enum.Enum):
+    AUTO = "auto"
+    GENERIC = "force_generic_plan"
+    CUSTOM = "force_custom_plan"
+
+
+class DBPartitioning(enum.Enum):
+    NONE = "none"
+    RANGE = "range"
+    HASH = "hash"
+
+
+class DBTableLayout:
+    """
+    Physical layout of a test table: one heap with one primary key index,
+    or declarative partitions, each with its own primary key index.
+
+    RANGE partitions by insertion time: the table gets a created_at column,
+    which PostgreSQL requires in the primary key, and partition i holds the
+    rows inserted between i and i + 1 intervals after the table was created,
+    the first from MINVALUE and the last up to MAXVALUE. Rows are 8 bytes
+    wider than without partitioning for every key type. HASH partitions by
+    the primary key itself.
+    """
+    def __init__(self,
+                 partitioning: DBPartitioning = DBPartitioning.NONE,
+                 partitions: int = 1,
+                 interval: float = 10.0) -> None:
+        """
+        Initialize a table layout.
+
+        :param partitioning: The partitioning method.
+        :type partitioning: DBPartitioning
+        :param partitions: The number of partitions, at least 2 when partitioned.
+        :type partitions: int
+        :param interval: The width of the RANGE partitions in seconds.
+        :type interval: float
+        """
+        if partitioning not in DBPartitioning:
+            raise ValueError(f"Invalid partitioning '{partitioning}'.")
+        if partitioning != DBPartitioning.NONE and partitions < 2:
+            raise ValueError(f"Invalid number of partitions '{partitions}'.")
+        if interval <= 0:
+            raise ValueError(f"Invalid partition interval '{interval}'.")
+        self.partitioning: DBPartitioning = partitioning
+        self.partitions: int = partitions if partitioning != DBPartitioning.NONE else 1
+        self.interval: float = interval
+
+    @property
+    def partitioned(self) -> bool:
+        return self.partitioning != DBPartitioning.NONE
+
+    def get_suffix(self) -> str:
+        """
+        Return the suffix distinguishing datasets of this layout, e.g. "_hash8".
+        """
+        return f"_{self.partitioning.value}{self.partitions}" if self.partitioned else ""
+
+
+class DBStatementCache:
+    """
+    Per-connection cache of server-side prepared statements.
+
+    Each (table, operation, batch size) is prepared once with PREPARE, and
+    callers then run the returned EXECUTE statement, so PostgreSQL parses and
+    plans the statement only once per connection.
+    """
+    def __init__(self,
+                 dbfactory: "DBFactory",
+                 conn: psycopg2.extensions.connection,
+                 plan_cache_mode: DBPlanCacheMode | None = None) -> None:
+        """
+        Initialize a statement cache for a connection.
+
+        :param dbfactory: The factory generating the statements.
+        :type dbfactory: DBFactory
+        :param conn: The connection the statements are prepared on.
+        :type conn: psycopg2.extensions.connection
+        :param plan_cache_mode: Optional plan_cache_mode for the session.
+        :type plan_cache_mode: DBPlanCacheMode | None
+        """
+        self.dbfactory = dbfactory
+        self.conn = conn
+        self.statements: dict[tuple[str, DBOperation, int | None], str] = {}
+        self.prepare_times: dict[tuple[str, DBOperation, int | None], float] = {}
+        if plan_cache_mode is not None:
+            with self.conn.cursor() as cur:
+                cur.execute(f"SET plan_cache_mode = {plan_cache_mode.value};")
+                logging.info(f"Set plan_cache_mode to '{plan_cache_mode.value}'.")
+
+    def prepare(self, table_type: DBPrimaryKeyType, operation: DBOperation, batch_size: int | None, stmt: str) -> str:
+        """
+        Prepare a statement unless it is already cached.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param operation: The operation of the statement.
+        :type operation: DBOperation
+        :param batch_size: The batch size of the statement, or None if it serves every batch size.
+        :type batch_size: int | None
+        :param stmt: The statement to prepare, using %s placeholders.
+        :type stmt: str
+        :return: The EXECUTE statement to run, using %s placeholders.
+        :rtype: str
+        """
+        table_name: str = self.dbfactory.get_table_name(table_type)
+        key: tuple[str, DBOperation, int | None] = (table_name, operation, batch_size)
+        execute_stmt: str | None = self.statements.get(key)
+        if execute_stmt is not None:
+            return execute_stmt
+        name: str = f"{table_name}_{operation.value}_{batch_size if batch_size is not None else 'any'}"
+        params: int = stmt.count("%s")
+        body: str = self.dbfactory._apply_paramstyle(stmt, DBParamStyle.NUMERIC).rstrip(";")
+        start = time.perf_counter()
+        with self.conn.cursor() as cur:
+            cur.execute(f"PREPARE {name} AS {body};")
+        self.prepare_times[key] = time.perf_counter() - start
+        execute_stmt = f"EXECUTE {name}({', '.join(['%s'] * params)});" if params else f"EXECUTE {name};"
+        self.statements[key] = execute_stmt
+        logging.info(f"Prepared statement '{name}' in {self.prepare_times[key]:.6f} seconds.")
+        return execute_stmt
+
+
+class DBPipeline:
+    """
+    Connection in libpq pipeline mode, keeping several statements in flight.
+
+    Every statement is sent with its own Sync, so it runs in its own implicit
+    transaction, as in autocommit mode, and a failing statement does not
+    abort the statements queued behind it. Results are received in the order
+    the statements were sent. Parameters are sent as text of unspecified
+    type, so the server infers their types from the statement, as it does
+    for the literal values of psycopg2. Requires psycopg 3.
+    """
+    def __init__(self, conn: Any) -> None:
+        """
+        Initialize a pipeline on a connection.
+
+        :param conn: An autocommit psycopg 3 connection, owned by the pipeline.
+        :type conn: psycopg.Connection
+        """
+        from psycopg import pq
+        from psycopg.adapt import PyFormat, Transformer
+
+        self.conn = conn
+        self.pending: int = 0
+        self._pq = pq
+        self._format = PyFormat.TEXT
+        self._pgconn = conn.pgconn
+        self._transformer = Transformer(conn)
+        self._prepared: dict[str, bytes] = {}
+        self._pgconn.enter_pipeline_mode()
+
+    def prepare(self, stmt: str) -> None:
+        """
+        Prepare a statement on the server, so later submissions of it only
+        bind and execute it. Waits for the statement to be prepared.
+
+        :param stmt: The statement, using $n placeholders.
+        :type stmt: str
+        """
+        if stmt in self._prepared:
+            return
+        name: bytes = f"pipeline_{len(self._prepared)}".encode()
+        self._pgconn.send_prepare(name, stmt.encode())
+        self._sync()
+        self.receive()
+        self._prepared[stmt] = name
+
+    def submit(self, stmt: str, args: list[Any]) -> None:
+        """
+        Send a statement without waiting for its result.
+
+        :param stmt: The statement, using $n placeholders.
+        :type stmt: str
+        :param args: The parameters of the statement.
+        :type args: list[Any]
+        """
+        params: Any = self._transformer.dump_sequence(args, [self._format] * len(args))
+        formats: list[Any] = [self._pq.Format.TEXT] * len(args)
+        name: bytes | None = self._prepared.get(stmt)
+        if name is not None:
+            self._pgconn.send_query_prepared(name, params, param_formats=formats)
+        else:
+            self._pgconn.send_query_params(stmt.encode(), params, param_formats=formats)
+        self._sync()
+
+    def _sync(self) -> None:
+        self._pgconn.pipeline_sync()
+        self._pgconn.flush()
+        self.pending += 1
+
+    def ready(self, timeout: float = 0.0) -> bool:
+        """
+        Wait at most `timeout` seconds for the result of the oldest statement
+        in flight to arrive.
+
+        :param timeout: The time to wait in seconds.
+        :type timeout: float
+        :return: True if receive() would not block on the server.
+        :rtype: bool
+        """
+        self._pgconn.consume_input()
+        if self._pgconn.is_busy() and timeout > 0:
+            select.select([self._pgconn.socket], [], [], timeout)
+            self._pgconn.consume_input()
+        return self.pending > 0 and not self._pgconn.is_busy()
+
+    def _next_result(self) -> Any:
+        while self._pgconn.is_busy():
+            select.select([self._pgconn.socket], [], [])
+            self._pgconn.consume_input()
+        return self._pgconn.get_result()
+
+    def receive(self) -> list[tuple]:
+        """
+        Wait for the result of the oldest statement in flight.
+
+        :return: The rows returned by the statement.
+        :rtype: list[tuple]
+        """
+        if self.pending == 0:
+            raise ValueError("Invalid receive without a statement in flight.")
+        rows: list[tuple] = []
+        error: str | None = None
+        while True:
+            result: Any = self._next_result()
+            if result is None:
+                continue
+            if result.status == self._pq.ExecStatus.PIPELINE_SYNC:
+                break
+            if result.status == self._pq.ExecStatus.TUPLES_OK:
+                self._transformer.set_pgresult(result)
+                rows = self._transformer.load_rows(0, result.ntuples, tuple)
+            elif result.status in (self._pq.ExecStatus.FATAL_ERROR, self._pq.ExecStatus.PIPELINE_ABORTED):
+                error = result.error_field(self._pq.DiagnosticField.MESSAGE_PRIMARY) or b"pipeline aborted"
+        self.pending -= 1
+        if error is not None:
+            raise Exception(f"Pipelined statement failed: {error.decode(errors='replace')}")
+        return rows
+
+    def execute(self, stmt: str, args: list[Any] | None = None) -> list[tuple]:
+        """
+        Run a statement and wait for its result, after every statement in flight.
+
+        :param stmt: The statement, using $n placeholders.
+        :type stmt: str
+        :param args: Optional parameters of the statement.
+        :type args: list[Any] | None
+        :return: The rows returned by the statement.
+        :rtype: list[tuple]
+        """
+        self.submit(stmt, args or [])
+        rows: list[tuple] = []
+        while self.pending > 0:
+            rows = self.receive()
+        return rows
+
+    def close(self) -> None:
+        self.conn.close()
 
 
 class DBFactory:
@@ -47,88 +340,787 @@ class DBFactory:
         self.user = user if user is not None else os.getenv("DB_USER", "postgres")
         self.password = password if password is not None else os.getenv("DB_PASSWORD", "password")
         self.name = dbname if dbname is not None else os.getenv("DB_NAME", "testdb")
-    
-    def get_connection(self) -> psycopg2.extensions.connection:
+        self.pool_min: int | None = None
+        self.pool_max: int | None = None
+        self._pool: psycopg2.pool.ThreadedConnectionPool | None = None
+        self._pool_pid: int | None = None
+        self._pool_owner_pid: int | None = None
+        self._pool_lock: threading.Lock = threading.Lock()
+        self._pool_slots: threading.BoundedSemaphore | None = None
+        self._inherited_pools: list[psycopg2.pool.ThreadedConnectionPool] = []
+
+    def __getstate__(self) -> dict[str, Any]:
+        state: dict[str, Any] = self.__dict__.copy()
+        state["_pool"] = None
+        state["_pool_pid"] = None
+        state["_pool_lock"] = None
+        state["_pool_slots"] = None
+        state["_inherited_pools"] = []
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._pool_lock = threading.Lock()
+
+    def open_pool(self, minconn: int = 1, maxconn: int = 16) -> None:
+        """
+        Enable pooled mode. The pool is pre-warmed with `minconn` connections,
+        and connection() checks connections out of it from then on, waiting
+        for a connection to be returned when all `maxconn` are checked out.
+
+        :param minconn: The number of connections opened up front.
+        :type minconn: int
+        :param maxconn: The maximum number of connections in the pool.
+        :type maxconn: int
+        """
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool size '{minconn}'..'{maxconn}'.")
+        self.close_pool()
+        self.pool_min = minconn
+        self.pool_max = maxconn
+        self._pool_owner_pid = os.getpid()
+        self._get_pool()
+
+    def close_pool(self) -> None:
+        """
+        Close all pooled connections and disable pooled mode.
+        """
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.closeall()
+                logging.info("Closed connection pool.")
+            self._pool = None
+            self._pool_pid = None
+            self._pool_slots = None
+            self.pool_min = None
+            self.pool_max = None
+
+    def _get_pool(self) -> psycopg2.pool.ThreadedConnectionPool | None:
+        if self.pool_max is None:
+            return None
+        pid: int = os.getpid()
+        if self._pool is not None and self._pool_pid == pid:
+            return self._pool
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid != pid:
+                # Inherited through fork: the sockets belong to the parent, so
+                # the pool is kept referenced but never used or closed here.
+                self._inherited_pools.append(self._pool)
+                self._pool = None
+            if self._pool is None:
+                minconn: int = self.pool_min if pid == self._pool_owner_pid else 0
+                try:
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(
+                        minconn,
+                        self.pool_max,
+                        host=self.host,
+                        port=self.port,
+                        user=self.user,
+                        password=self.password,
+                        dbname=self.name
+                    )
+                except psycopg2.Error as e:
+                    raise Exception(f"Failed to connect to database: {e}")
+                self._pool_pid = pid
+                # ThreadedConnectionPool raises PoolError when it is exhausted
+                # instead of waiting, so checkouts wait for a slot first.
+                self._pool_slots = threading.BoundedSemaphore(self.pool_max)
+                logging.info(f"Opened connection pool to database '{self.name}' with {minconn}..{self.pool_max} connections.")
+            return self._pool
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[psycopg2.extensions.connection]:
+        """
+        Provide a connection for the duration of a with block.
+
+        In pooled mode the connection is checked out of the pool, health checked,
+        and reset with DISCARD ALL when it is returned. Otherwise a new connection
+        is opened and closed at the end of the block.
+
+        :return: An iterator yielding one database connection.
+        :rtype: Iterator[psycopg2.extensions.connection]
+        """
+        pool = self._get_pool()
+        if pool is None:
+            conn = self.get_connection()
+            try:
+                # Not "with conn": since psycopg2 2.9 that opens a transaction
+                # even in autocommit mode, hiding every write until the end.
+                yield conn
+                if not conn.autocommit:
+                    conn.commit()
+            finally:
+                conn.close()
+            return
+        slots: threading.BoundedSemaphore = self._pool_slots
+        slots.acquire()
+        try:
+            conn = self._checkout(pool)
+            try:
+                yield conn
+            finally:
+                self._checkin(pool, conn)
+        finally:
+            slots.release()
+
+    def _checkout(self, pool: psycopg2.pool.ThreadedConnectionPool) -> psycopg2.extensions.connection:
+        for _ in range((self.pool_max or 0) + 1):
+            conn = pool.getconn()
+            try:
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1;")
+                psycopg2.extras.register_uuid(conn_or_curs=conn)
+                return conn
+            except psycopg2.Error as e:
+                logging.warning(f"Discarding unhealthy pooled connection: {e}")
+                pool.putconn(conn, close=True)
+        raise Exception("Failed to check out a healthy pooled connection.")
+
+    def _checkin(self, pool: psycopg2.pool.ThreadedConnectionPool, conn: psycopg2.extensions.connection) -> None:
+        if conn.closed:
+            pool.putconn(conn, close=True)
+            return
+        try:
+            if not conn.autocommit:
+                conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("DISCARD ALL;")
+            conn.autocommit = False
+        except psycopg2.Error as e:
+            logging.warning(f"Discarding pooled connection that failed to reset: {e}")
+            pool.putconn(conn, close=True)
+            return
+        pool.putconn(conn)
+
+    def get_connection(self, dbname: str | None = None) -> psycopg2.extensions.connection:
         """
         Create and return a new database connection.
         Creates the database if it does not already exist.
+        UUID columns are returned as uuid.UUID and adapted back as uuid values.
 
+        :param dbname: Optional database to connect to instead of the test database.
+        :type dbname: str | None
         :return: A new database connection.
         :rtype: psycopg2.extensions.connection
         """
+        dbname = dbname if dbname is not None else self.name
         try:
-            logging.info(f"Connecting to database '{self.name}'.")
+            logging.info(f"Connecting to database '{dbname}'.")
             conn = psycopg2.connect(
                 host=self.host,
                 port=self.port,
                 user=self.user,
                 password=self.password,
-                dbname=self.name
+                dbname=dbname
             )
+            psycopg2.extras.register_uuid(conn_or_curs=conn)
             return conn
         except psycopg2.Error as e:
             raise Exception(f"Failed to connect to database: {e}")
 
-    def create_table(self, table_type: DBPrimaryKeyType) -> None:
+    async def get_async_connection(self) -> asyncpg.Connection:
+        """
+        Create and return a new asyncpg database connection.
+
+        :return: A new asyncpg database connection.
+        :rtype: asyncpg.Connection
+        """
+        try:
+            logging.info(f"Connecting asynchronously to database '{self.name}'.")
+            conn = await asyncpg.connect(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                database=self.name
+            )
+            return conn
+        except (asyncpg.PostgresError, OSError) as e:
+            raise Exception(f"Failed to connect to database: {e}")
+
+    def get_pipeline(self) -> DBPipeline:
+        """
+        Create a new pipelined connection to the test database. Requires psycopg 3.
+
+        :return: A new pipeline on its own connection.
+        :rtype: DBPipeline
+        """
+        import psycopg
+
+        try:
+            logging.info(f"Connecting in pipeline mode to database '{self.name}'.")
+            conn = psycopg.connect(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                dbname=self.name,
+                autocommit=True
+            )
+        except psycopg.Error as e:
+            raise Exception(f"Failed to connect to database: {e}")
+        return DBPipeline(conn)
+
+    def get_statement_cache(self,
+                            conn: psycopg2.extensions.connection,
+                            plan_cache_mode: DBPlanCacheMode | None = None) -> DBStatementCache:
+        """
+        Create a prepared statement cache for a connection.
+
+        :param conn: The connection the statements are prepared on.
+        :type conn: psycopg2.extensions.connection
+        :param plan_cache_mode: Optional plan_cache_mode for the session.
+        :type plan_cache_mode: DBPlanCacheMode | None
+        :return: A new statement cache bound to the connection.
+        :rtype: DBStatementCache
+        """
+        return DBStatementCache(self, conn, plan_cache_mode)
+
+    def create_table(self, table_type: DBPrimaryKeyType, layout: DBTableLayout | None = None) -> None:
         """
         Create a test table with the specified primary key type.
 
         :param table_type: The type of primary key for the table.
         :type table_type: DBPrimaryKeyType
+        :param layout: Optional partitioning of the table, defaults to a single heap.
+        :type layout: DBTableLayout | None
         :return: None
         :rtype: None
         """
-        stmt = self.get_table_create_statement(table_type)
-        with self.get_connection() as conn:
+        stmt = self.get_table_create_statement(table_type, layout)
+        with self.connection() as conn:
             conn.autocommit = True
             with conn.cursor() as cur:
                 cur.execute(stmt)
                 logging.info(f"Table for type '{table_type}' created successfully.")
 
-    def drop_table(self, table_type: DBPrimaryKeyType) -> None:
+    def create_child_tables(self, table_type: DBPrimaryKeyType, children: int, layout: DBTableLayout | None = None) -> None:
         """
-        Drop the test table with the specified primary key type.
+        Create the child tables referencing the test table, which must exist.
 
         :param table_type: The type of primary key for the table.
         :type table_type: DBPrimaryKeyType
+        :param children: The number of child tables.
+        :type children: int
+        :param layout: Optional partitioning of the test table, defaults to a single heap.
+        :type layout: DBTableLayout | None
         :return: None
         :rtype: None
         """
-        stmt = self.get_table_drop_statement(table_type)
-        with self.get_connection() as conn:
+        statements: list[str] = [self.get_child_create_statement(table_type, child, layout) for child in range(children)]
+        with self.connection() as conn:
             conn.autocommit = True
             with conn.cursor() as cur:
-                cur.execute(stmt)
+                for stmt in statements:
+                    cur.execute(stmt)
+                logging.info(f"{children} child tables for type '{table_type}' created successfully.")
+
+    def drop_table(self, table_type: DBPrimaryKeyType, children: int = 0) -> None:
+        """
+        Drop the test table with the specified primary key type, after its
+        child tables.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param children: The number of child tables referencing the table.
+        :type children: int
+        :return: None
+        :rtype: None
+        """
+        statements: list[str] = [self.get_child_drop_statement(table_type, child) for child in range(children)]
+        statements.append(self.get_table_drop_statement(table_type))
+        with self.connection() as conn:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                for stmt in statements:
+                    cur.execute(stmt)
                 logging.info(f"Table for type '{table_type}' dropped successfully.")
 
-    TABLE_CREATE: str = """DROP TABLE IF EXISTS {table_name};
+    MAINTENANCE_DBNAME: str = "postgres"
+    DATASET_CHUNK_ROWS: int = 100000
+    DATASET_CHECK: str = "SELECT datistemplate FROM pg_database WHERE datname = %s;"
+    DATASET_COPY_STATEMENT: str = "COPY {table_name} (data) FROM STDIN;"
+    DATASET_VACUUM: str = "VACUUM (FREEZE, ANALYZE) {table_name};"
+    DATABASE_CREATE: str = "CREATE DATABASE {name};"
+    DATABASE_CLONE: str = "CREATE DATABASE {name} TEMPLATE {template}{strategy};"
+    DATABASE_DROP: str = "DROP DATABASE IF EXISTS {name} WITH (FORCE);"
+    DATABASE_TEMPLATE: str = "ALTER DATABASE {name} WITH IS_TEMPLATE {template} ALLOW_CONNECTIONS {connections};"
+
+    def get_dataset_name(self, table_type: DBPrimaryKeyType, rows: int, layout: DBTableLayout | None = None) -> str:
+        """
+        Return the name of the template database holding a pre-populated test table.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param rows: The number of rows in the table.
+        :type rows: int
+        :param layout: Optional partitioning of the table, defaults to a single heap.
+        :type layout: DBTableLayout | None
+        :return: The database name.
+        :rtype: str
+        """
+        suffix: str = layout.get_suffix() if layout is not None else ""
+        return f"{self.name}_{table_type.value.lower()}_{rows}{suffix}"
+
+    def has_dataset(self, table_type: DBPrimaryKeyType, rows: int, layout: DBTableLayout | None = None) -> bool:
+        """
+        Check whether the template database of a dataset has been prepared.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param rows: The number of rows in the table.
+        :type rows: int
+        :param layout: Optional partitioning of the table, defaults to a single heap.
+        :type layout: DBTableLayout | None
+        :return: True if the template database exists.
+        :rtype: bool
+        """
+        conn = self.get_connection(self.MAINTENANCE_DBNAME)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(self.DATASET_CHECK, (self.get_dataset_name(table_type, rows, layout),))
+                row: tuple | None = cur.fetchone()
+            return row is not None and row[0]
+        finally:
+            conn.close()
+
+    def prepare_dataset(self,
+                        table_type: DBPrimaryKeyType,
+                        rows: int,
+                        loaders: int = 4,
+                        layout: DBTableLayout | None = None) -> None:
+        """
+        Bulk-load a test table to the given number of rows in its own
+        database and save that database as a template for clone_dataset().
+        Rows are sent with COPY by parallel loaders, each on its own
+        connection, and the table is then frozen and analyzed, so every clone
+        starts with set hint bits, an all-visible visibility map and planner
+        statistics. An existing dataset of the same name is replaced.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param rows: The number of rows to load.
+        :type rows: int
+        :param loaders: The number of parallel COPY loaders.
+        :type loaders: int
+        :param layout: Optional partitioning of the table, defaults to a single heap.
+        :type layout: DBTableLayout | None
+        :return: None
+        :rtype: None
+        """
+        if rows < 1 or loaders < 1:
+            raise ValueError(f"Invalid dataset of '{rows}' rows with '{loaders}' loaders.")
+        dataset: str = self.get_dataset_name(table_type, rows, layout)
+        name: sql.Identifier = sql.Identifier(dataset)
+        conn = self.get_connection(self.MAINTENANCE_DBNAME)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                if self.has_dataset(table_type, rows, layout):
+                    cur.execute(sql.SQL(self.DATABASE_TEMPLATE).format(name=name, template=sql.SQL("false"),
+                                                                       connections=sql.SQL("true")))
+                cur.execute(sql.SQL(self.DATABASE_DROP).format(name=name))
+                cur.execute(sql.SQL(self.DATABASE_CREATE).format(name=name))
+            start: float = time.perf_counter()
+            table_conn = self.get_connection(dataset)
+            table_conn.autocommit = True
+            try:
+                with table_conn.cursor() as cur:
+                    cur.execute(self.get_table_create_statement(table_type, layout))
+                    with ThreadPoolExecutor(max_workers=loaders) as executor:
+                        counts: list[int] = [rows // loaders + (1 if i < rows % loaders else 0) for i in range(loaders)]
+                        for future in [executor.submit(self._load_dataset, dataset, table_type, n) for n in counts]:
+                            future.result()
+                    logging.info(f"Loaded {rows} rows into '{dataset}' in {time.perf_counter() - start:.2f} seconds.")
+                    cur.execute(self.DATASET_VACUUM.format(table_name=self.get_table_name(table_type)))
+            finally:
+                table_conn.close()
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL(self.DATABASE_TEMPLATE).format(name=name, template=sql.SQL("true"),
+                                                                   connections=sql.SQL("false")))
+            logging.info(f"Dataset '{dataset}' prepared in {time.perf_counter() - start:.2f} seconds.")
+        finally:
+            conn.close()
+
+    def _load_dataset(self, dataset: str, table_type: DBPrimaryKeyType, rows: int) -> None:
+        stmt: str = self.DATASET_COPY_STATEMENT.format(table_name=self.get_table_name(table_type))
+        conn = self.get_connection(dataset)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                for offset in range(0, rows, self.DATASET_CHUNK_ROWS):
+                    chunk: int = min(self.DATASET_CHUNK_ROWS, rows - offset)
+                    cur.copy_expert(stmt, io.BytesIO(self.get_copy_data(table_type, chunk, DBInsertMode.COPY)))
+        finally:
+            conn.close()
+
+    def clone_dataset(self, table_type: DBPrimaryKeyType, rows: int, layout: DBTableLayout | None = None) -> None:
+        """
+        Recreate the test database as a copy of a prepared dataset. The test
+        database is dropped first, terminating its sessions. An open pool is
+        closed before the drop and opened, pre-warmed, on the copy again. On
+        PostgreSQL 15 and later the files are copied directly instead of
+        through the WAL.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param rows: The number of rows in the dataset.
+        :type rows: int
+        :param layout: Optional partitioning of the table, defaults to a single heap.
+        :type layout: DBTableLayout | None
+        :return: None
+        :rtype: None
+        """
+        dataset: str = self.get_dataset_name(table_type, rows, layout)
+        if not self.has_dataset(table_type, rows, layout):
+            raise ValueError(f"Invalid dataset '{dataset}', prepare it first.")
+        if self.name == self.MAINTENANCE_DBNAME:
+            raise ValueError(f"Invalid test database '{self.name}' for a dataset clone.")
+        start: float = time.perf_counter()
+        pool_size: tuple[int, int] | None = None
+        if self.pool_max is not None:
+            pool_size = (self.pool_min, self.pool_max)
+            self.close_pool()
+        conn = self.get_connection(self.MAINTENANCE_DBNAME)
+        conn.autocommit = True
+        try:
+            strategy: str = " STRATEGY = FILE_COPY" if conn.server_version >= 150000 else ""
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL(self.DATABASE_DROP).format(name=sql.Identifier(self.name)))
+                cur.execute(sql.SQL(self.DATABASE_CLONE).format(
+                    name=sql.Identifier(self.name),
+                    template=sql.Identifier(dataset),
+                    strategy=sql.SQL(strategy)
+                ))
+        finally:
+            conn.close()
+            if pool_size is not None:
+                self.open_pool(*pool_size)
+        logging.info(f"Cloned dataset '{dataset}' in {time.perf_counter() - start:.2f} seconds.")
+
+    # The storage relations of a test table: the table itself, or the leaf
+    # partitions of a partitioned table.
+    LEAF_RELATIONS: str = """(SELECT oid AS relid FROM pg_class WHERE oid = %(table)s::regclass AND relkind = 'r'
+    UNION SELECT relid FROM pg_partition_tree(%(table)s) WHERE isleaf)"""
+    SERVER_STATS_QUERIES: list[tuple[int, int, str]] = [
+        (130000, 0, """SELECT count(*) AS "statements.queries", coalesce(sum(calls), 0) AS "statements.calls",
+    coalesce(sum(total_exec_time), 0) AS "statements.exec_time",
+    coalesce(sum(shared_blks_hit), 0) AS "statements.shared_blks_hit",
+    coalesce(sum(shared_blks_read), 0) AS "statements.shared_blks_read",
+    coalesce(sum(shared_blks_dirtied), 0) AS "statements.shared_blks_dirtied",
+    coalesce(sum(shared_blks_written), 0) AS "statements.shared_blks_written",
+    coalesce(sum(wal_records), 0) AS "statements.wal_records", coalesce(sum(wal_fpi), 0) AS "statements.wal_fpi",
+    coalesce(sum(wal_bytes), 0) AS "statements.wal_bytes"
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) AND query LIKE %(pattern)s;"""),
+        (160000, 0, """SELECT coalesce(sum(reads), 0) AS "io.reads", coalesce(sum(hits), 0) AS "io.hits",
+    coalesce(sum(writes), 0) AS "io.writes", coalesce(sum(extends), 0) AS "io.extends",
+    coalesce(sum(evictions), 0) AS "io.evictions"
+FROM pg_stat_io;"""),
+        (120000, 0, """SELECT coalesce(sum(s.heap_blks_read), 0) AS "table.heap_blks_read",
+    coalesce(sum(s.heap_blks_hit), 0) AS "table.heap_blks_hit",
+    coalesce(sum(s.idx_blks_read), 0) AS "table.idx_blks_read", coalesce(sum(s.idx_blks_hit), 0) AS "table.idx_blks_hit"
+FROM """ + LEAF_RELATIONS + """ t JOIN pg_statio_user_tables s ON s.relid = t.relid;"""),
+        (120000, 0, """SELECT coalesce(sum(s.seq_scan), 0) AS "table.seq_scan", coalesce(sum(s.idx_scan), 0) AS "table.idx_scan"
+FROM """ + LEAF_RELATIONS + """ t JOIN pg_stat_user_tables s ON s.relid = t.relid;"""),
+        (140000, 0, """SELECT wal_records AS "wal.records", wal_fpi AS "wal.fpi", wal_bytes AS "wal.bytes" FROM pg_stat_wal;"""),
+        (170000, 0, """SELECT num_timed AS "checkpointer.timed", num_requested AS "checkpointer.requested",
+    buffers_written AS "checkpointer.buffers_written"
+FROM pg_stat_checkpointer;"""),
+        (0, 170000, """SELECT checkpoints_timed AS "checkpointer.timed", checkpoints_req AS "checkpointer.requested",
+    buffers_checkpoint AS "checkpointer.buffers_written"
+FROM pg_stat_bgwriter;"""),
+        (0, 0, """SELECT buffers_clean AS "bgwriter.buffers_clean", maxwritten_clean AS "bgwriter.maxwritten_clean"
+FROM pg_stat_bgwriter;"""),
+    ]
+    SERVER_STATS_INDEX_QUERY: str = """SELECT indexrelname, idx_blks_read, idx_blks_hit
+FROM pg_statio_user_indexes WHERE relid IN """ + LEAF_RELATIONS + ";"
+    STATS_FLUSH_STATEMENT: str = "SELECT pg_stat_force_next_flush();"
+
+    def get_server_stats(self,
+                         conn: psycopg2.extensions.connection,
+                         table_type: DBPrimaryKeyType,
+                         children: int = 0) -> dict[str, float]:
+        """
+        Snapshot the cumulative server counters relevant to a test table:
+        pg_stat_statements (statements touching the table), pg_stat_io,
+        pg_statio_user_tables and pg_statio_user_indexes (buffer hits vs
+        reads), the scans of pg_stat_user_tables, pg_stat_wal and the
+        checkpointer and bgwriter statistics. The table counters are summed
+        over the partitions of a partitioned table. The index counters also
+        cover the indexes of the child tables.
+        Sources the server does not provide, such as pg_stat_statements when
+        it is not loaded, are skipped.
+
+        :param conn: An autocommit connection used for the snapshot.
+        :type conn: psycopg2.extensions.connection
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param children: The number of child tables referencing the table.
+        :type children: int
+        :return: The counters by name, e.g. "wal.bytes".
+        :rtype: dict[str, float]
+        """
+        table_name: str = self.get_table_name(table_type)
+        params: dict[str, str] = {"table": table_name, "pattern": f"%{table_name}%"}
+        stats: dict[str, float] = {}
+        with conn.cursor() as cur:
+            for min_version, max_version, query in self.SERVER_STATS_QUERIES:
+                if conn.server_version < min_version or (max_version and conn.server_version >= max_version):
+                    continue
+                try:
+                    cur.execute(query, params)
+                except psycopg2.Error as e:
+                    logging.debug(f"Skipping server statistics: {e}")
+                    continue
+                row: tuple | None = cur.fetchone()
+                if row is not None:
+                    stats.update({column.name: float(value) for column, value in zip(cur.description, row)})
+            tables: list[str] = [table_name] + [self.get_child_table_name(table_type, child) for child in range(children)]
+            for table in tables:
+                cur.execute(self.SERVER_STATS_INDEX_QUERY, {"table": table})
+                for index_name, blks_read, blks_hit in cur.fetchall():
+                    stats[f"index.{index_name}.idx_blks_read"] = float(blks_read)
+                    stats[f"index.{index_name}.idx_blks_hit"] = float(blks_hit)
+        return stats
+
+    @staticmethod
+    def get_server_stats_delta(before: dict[str, float], after: dict[str, float]) -> dict[str, float]:
+        """
+        Return the change of every counter present in both snapshots.
+
+        :param before: The snapshot taken before a phase.
+        :type before: dict[str, float]
+        :param after: The snapshot taken after the phase.
+        :type after: dict[str, float]
+        :return: The counter deltas by name.
+        :rtype: dict[str, float]
+        """
+        return {name: after[name] - value for name, value in before.items() if name in after}
+
+    LAYOUT_ANALYZE_STATEMENT: str = "ANALYZE {table_name};"
+    LAYOUT_SIZE_QUERY: str = """SELECT sum(pg_relation_size(c.oid)) AS "table.size", sum(pg_total_relation_size(c.oid)) AS "table.total_size",
+    sum(pg_indexes_size(c.oid)) AS "table.indexes_size", sum(c.relpages) AS "table.pages", sum(c.reltuples) AS "table.tuples",
+    count(*) AS "table.partitions"
+FROM """ + LEAF_RELATIONS + """ t JOIN pg_class c ON c.oid = t.relid;"""
+    LAYOUT_CORRELATION_QUERY: str = """SELECT correlation AS "id.correlation", n_distinct AS "id.n_distinct"
+FROM pg_stats WHERE schemaname = current_schema() AND tablename = %(table)s AND attname = 'id';"""
+    LAYOUT_INDEX_QUERY: str = """SELECT c.relname, pg_relation_size(c.oid), am.amname
+FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_am am ON am.oid = c.relam
+WHERE i.indrelid IN """ + LEAF_RELATIONS + ";"
+    LAYOUT_TUPLE_QUERY: str = """SELECT sum(s.tuple_count) AS "heap.tuple_count",
+    coalesce(100.0 * sum(s.tuple_len) / nullif(sum(s.table_len), 0), 0) AS "heap.tuple_percent",
+    sum(s.dead_tuple_count) AS "heap.dead_tuple_count",
+    coalesce(100.0 * sum(s.dead_tuple_len) / nullif(sum(s.table_len), 0), 0) AS "heap.dead_tuple_percent",
+    coalesce(100.0 * sum(s.free_space) / nullif(sum(s.table_len), 0), 0) AS "heap.free_percent"
+FROM """ + LEAF_RELATIONS + """ t CROSS JOIN LATERAL pgstattuple(t.relid) s;"""
+    LAYOUT_BTREE_QUERY: str = """SELECT tree_level, internal_pages, leaf_pages, deleted_pages, avg_leaf_density, leaf_fragmentation
+FROM pgstatindex(%(index)s::regclass);"""
+    LAYOUT_EXTENSION: str = "CREATE EXTENSION IF NOT EXISTS pgstattuple;"
+    LAYOUT_CHILD_QUERY: str = """SELECT pg_relation_size(c.oid) AS "size", pg_total_relation_size(c.oid) AS "total_size",
+    c.reltuples AS "tuples"
+FROM pg_class c WHERE c.oid = %(table)s::regclass;"""
+
+    def get_layout_stats(self,
+                         conn: psycopg2.extensions.connection,
+                         table_type: DBPrimaryKeyType,
+                         children: int = 0) -> dict[str, float]:
+        """
+        Analyze the physical layout of a test table: relation and index
+        sizes, the heap-order correlation of id from pg_stats (after running
+        ANALYZE), and, when the pgstattuple extension can be used, heap tuple
+        density and the B-tree depth, leaf density and leaf fragmentation of
+        every index. The sizes and heap metrics of a partitioned table are
+        summed over its partitions, and the index metrics are reported for
+        the index of every partition. Child tables add their sizes, e.g.
+        "test_uuidv4_c0.total_size", and the metrics of their indexes,
+        including the foreign key index.
+
+        :param conn: An autocommit connection used for the analysis.
+        :type conn: psycopg2.extensions.connection
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param children: The number of child tables referencing the table.
+        :type children: int
+        :return: The layout metrics by name, e.g. "index.test_uuidv4_pkey.leaf_fragmentation".
+        :rtype: dict[str, float]
+        """
+        table_name: str = self.get_table_name(table_type)
+        params: dict[str, str] = {"table": table_name}
+        stats: dict[str, float] = {}
+        with conn.cursor() as cur:
+            cur.execute(self.LAYOUT_ANALYZE_STATEMENT.format(table_name=table_name))
+            for query in (self.LAYOUT_SIZE_QUERY, self.LAYOUT_CORRELATION_QUERY):
+                cur.execute(query, params)
+                row: tuple | None = cur.fetchone()
+                if row is not None:
+                    stats.update({column.name: float(value) for column, value in zip(cur.description, row)
+                                  if value is not None})
+            if stats.get("table.tuples", 0) > 0:
+                stats["table.bytes_per_row"] = stats["table.total_size"] / stats["table.tuples"]
+            cur.execute(self.LAYOUT_INDEX_QUERY, params)
+            indexes: list[tuple] = cur.fetchall()
+            for child in range(children):
+                child_name: str = self.get_child_table_name(table_type, child)
+                cur.execute(self.LAYOUT_ANALYZE_STATEMENT.format(table_name=child_name))
+                cur.execute(self.LAYOUT_CHILD_QUERY, {"table": child_name})
+                stats.update({f"{child_name}.{column.name}": float(value)
+                              for column, value in zip(cur.description, cur.fetchone())})
+                cur.execute(self.LAYOUT_INDEX_QUERY, {"table": child_name})
+                indexes += cur.fetchall()
+            for index_name, index_size, _ in indexes:
+                stats[f"index.{index_name}.size"] = float(index_size)
+            try:
+                cur.execute(self.LAYOUT_EXTENSION)
+            except psycopg2.Error as e:
+                logging.info(f"Skipping pgstattuple analysis: {e}")
+                return stats
+            cur.execute(self.LAYOUT_TUPLE_QUERY, params)
+            stats.update({column.name: float(value) for column, value in zip(cur.description, cur.fetchone())})
+            for index_name, _, access_method in indexes:
+                if access_method != "btree":
+                    continue
+                cur.execute(self.LAYOUT_BTREE_QUERY, {"index": index_name})
+                stats.update({f"index.{index_name}.{column.name}": float(value)
+                              for column, value in zip(cur.description, cur.fetchone())})
+        return stats
+
+    def get_stats_flush_statement(self, server_version: int) -> str | None:
+        """
+        Return the statement making a backend publish its pending statistics
+        at the end of the statement, or None when the server flushes them
+        differently (before PostgreSQL 15).
+        """
+        return self.STATS_FLUSH_STATEMENT if server_version >= 150000 else None
+
+    TABLE_CREATE: str = """DROP TABLE IF EXISTS {table_name};{setup}
 CREATE TABLE {table_name} (
-    id {table_pk} PRIMARY KEY,
-    data CHAR({char_length}) NOT NULL
-);"""
+    {key_columns},
+    data CHAR({char_length}) NOT NULL{extra_columns}{constraint}
+){partition_by};{partitions}{finish}"""
+    PARTITION_TIME_COLUMN: str = "created_at"
+    PARTITION_TIME_DEFINITION: str = "TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()"
+    PARTITION_BY: str = " PARTITION BY {method} ({columns})"
+    PARTITION_RANGE: str = "CREATE TABLE {partition_name} PARTITION OF {table_name} FOR VALUES FROM ({lower}) TO ({upper});"
+    PARTITION_RANGE_BOUND: str = "now() + '{seconds:g} seconds'::interval"
+    PARTITION_HASH: str = "CREATE TABLE {partition_name} PARTITION OF {table_name} FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder});"
     TABLE_CHECK: str = "SELECT to_regclass('public.{table_name}');"
     TABLE_DROP: str = "DROP TABLE IF EXISTS {table_name};"
 
-    INSERT_STATEMENT: str = "INSERT INTO {table_name} (data) VALUES {placeholders} RETURNING id;"
-    SELECT_STATEMENT: str = "SELECT * FROM {table_name} WHERE id in ({placeholders});"
-    UPDATE_STATEMENT: str = "UPDATE {table_name} SET data = %s WHERE id in ({placeholders});"
-    DELETE_STATEMENT: str = "DELETE FROM {table_name} WHERE id in ({placeholders});"
+    STAGING_CREATE: str = "CREATE TEMP TABLE IF NOT EXISTS {staging_name} (data CHAR({char_length}) NOT NULL) ON COMMIT DELETE ROWS;"
+    COPY_STATEMENT: str = "COPY {staging_name} (data) FROM STDIN{options};"
+    COPY_KEYS_STATEMENT: str = "COPY {table_name} ({key_columns}, data) FROM STDIN{options};"
+    COPY_BINARY_HEADER: bytes = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+    COPY_BINARY_TRAILER: bytes = (-1).to_bytes(2, "big", signed=True)
+
+    INSERT_STATEMENT: str = "INSERT INTO {table_name} (data) VALUES {placeholders} RETURNING {key_columns};"
+    INSERT_KEYS_STATEMENT: str = "INSERT INTO {table_name} ({key_columns}, data) VALUES {placeholders};"
+    INSERT_SELECT_STATEMENT: str = "INSERT INTO {table_name} (data) SELECT data FROM {staging_name} RETURNING {key_columns};"
+    SELECT_STATEMENT: str = "SELECT * FROM {table_name} WHERE {key} in ({placeholders});"
+    UPDATE_STATEMENT: str = "UPDATE {table_name} SET data = %s WHERE {key} in ({placeholders});"
+    DELETE_STATEMENT: str = "DELETE FROM {table_name} WHERE {key} in ({placeholders});"
+
+    INSERT_ARRAY_STATEMENT: str = "INSERT INTO {table_name} (data) SELECT unnest(%s::text[]) RETURNING {key_columns};"
+    INSERT_KEYS_ARRAY_STATEMENT: str = "INSERT INTO {table_name} ({key_columns}, data) SELECT * FROM unnest({key_arrays}, %s::text[]);"
+    SELECT_ARRAY_STATEMENT: str = "SELECT * FROM {table_name} WHERE {key_predicate};"
+    UPDATE_ARRAY_STATEMENT: str = "UPDATE {table_name} SET data = %s WHERE {key_predicate};"
+    DELETE_ARRAY_STATEMENT: str = "DELETE FROM {table_name} WHERE {key_predicate};"
+
+    SCAN_STATEMENT: str = "SELECT * FROM {table_name} WHERE {key} > {placeholder} ORDER BY {key_columns} LIMIT {scan_length};"
+    RECENT_STATEMENT: str = "SELECT * FROM {table_name} ORDER BY {key_columns_desc} LIMIT {scan_length};"
+    # Shared buffers of the table, its partitions and their indexes, counted
+    # by the current transaction.
+    SCAN_BUFFERS_QUERY: str = """WITH leaf AS (SELECT oid AS relid FROM pg_class WHERE oid = %s::text::regclass AND relkind = 'r'
+    UNION SELECT relid FROM pg_partition_tree(%s::text::regclass) WHERE isleaf),
+rel AS (SELECT relid FROM leaf UNION ALL SELECT indexrelid FROM pg_index WHERE indrelid IN (SELECT relid FROM leaf))
+SELECT coalesce(sum(pg_stat_get_xact_blocks_hit(relid)), 0)::bigint,
+    coalesce(sum(pg_stat_get_xact_blocks_fetched(relid) - pg_stat_get_xact_blocks_hit(relid)), 0)::bigint
+FROM rel;"""
+
+    CHILD_CREATE: str = """DROP TABLE IF EXISTS {child_name};
+CREATE TABLE {child_name} (
+    child_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    {reference_columns},
+    data CHAR({char_length}) NOT NULL,
+    FOREIGN KEY ({references}) REFERENCES {table_name} ({key_columns}) ON DELETE CASCADE
+);
+CREATE INDEX {child_name}_parent_idx ON {child_name} ({references});"""
+    CHILD_DROP: str = "DROP TABLE IF EXISTS {child_name};"
+    # Child rows are not padded, so they grow with the width of the
+    # referenced key, as they would in a real schema.
+    CHILD_CHAR_LENGTH: int = 64
+    REFERENCE_PREFIX: str = "parent_"
 
-    CHAR_BIGINT_LENGTH: int = 244
-    CHAR_BIGINT_INSERT: str = ("A" * CHAR_BIGINT_LENGTH)
-    CHAR_BIGINT_UPDATE: str = ("B" * CHAR_BIGINT_LENGTH)
-    CHAR_UUID_LENGTH: int = 236
-    CHAR_UUID_INSERT: str = ("A" * CHAR_UUID_LENGTH)
-    CHAR_UUID_UPDATE: str = ("B" * CHAR_UUID_LENGTH)
+    FK_INSERT_STATEMENT: str = "INSERT INTO {child_name} ({references}, data) VALUES {placeholders}"
+    FK_INSERT_ARRAY_STATEMENT: str = "INSERT INTO {child_name} ({references}, data) SELECT * FROM unnest({key_arrays}, %s::text[])"
+    # The key columns are unambiguous without the alias: the child columns
+    # are child_id, data and the parent_ references.
+    JOIN_STATEMENT: str = """SELECT {parent_columns}, c.child_id, c.data FROM {table_name} p JOIN {child_name} c ON ({child_references}) = ({parent_columns})
+WHERE {key} in ({placeholders})"""
+    JOIN_ARRAY_STATEMENT: str = """SELECT {parent_columns}, c.child_id, c.data FROM {table_name} p JOIN {child_name} c ON ({child_references}) = ({parent_columns})
+WHERE {key_predicate}"""
 
-    def get_table_create_statement(self, table_type: DBPrimaryKeyType) -> str:
+    CHAR_FILL: dict[DBOperation, str] = {DBOperation.INSERT: "A", DBOperation.UPDATE: "B"}
+    CHILD_CHAR_FILL: str = "C"
+
+    def get_table_create_statement(self, table_type: DBPrimaryKeyType, layout: DBTableLayout | None = None) -> str:
         table_name: str = self.get_table_name(table_type)
-        char_length: int = self.get_char_length(table_type)
-        table_pk: str = self.get_table_pk(table_type)
-        stmt: str = self.TABLE_CREATE.format(table_name=table_name, table_pk=table_pk, char_length=char_length)
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        layout = layout if layout is not None else DBTableLayout()
+        extra_columns: list[str] = []
+        partition_by: str = ""
+        if layout.partitioning == DBPartitioning.RANGE:
+            extra_columns = [self.PARTITION_TIME_COLUMN]
+            partition_by = self.PARTITION_BY.format(method="RANGE", columns=self.PARTITION_TIME_COLUMN)
+        elif layout.partitioning == DBPartitioning.HASH:
+            partition_by = self.PARTITION_BY.format(method="HASH", columns=strategy.get_column_list())
+        stmt: str = self.TABLE_CREATE.format(
+            table_name=table_name,
+            setup="\n" + strategy.setup.format(table_name=table_name) if strategy.setup else "",
+            key_columns=strategy.get_column_definitions(table_name, extra_columns),
+            char_length=strategy.char_length,
+            extra_columns="".join(f",\n    {c} {self.PARTITION_TIME_DEFINITION}" for c in extra_columns),
+            constraint=strategy.get_table_constraint(extra_columns),
+            partition_by=partition_by,
+            partitions="".join("\n" + p for p in self.get_partition_statements(table_type, layout)),
+            finish="\n" + strategy.finish.format(table_name=table_name) if strategy.finish else ""
+        )
         logging.debug(f"Create table statement for type '{table_type}': {stmt}")
         return stmt
 
+    def get_partition_statements(self, table_type: DBPrimaryKeyType, layout: DBTableLayout) -> list[str]:
+        """
+        Return the statements creating the partitions of a partitioned test
+        table. The RANGE bounds are relative to now(), which is the same for
+        every statement of the CREATE TABLE transaction.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param layout: The partitioning of the table.
+        :type layout: DBTableLayout
+        :return: One CREATE TABLE ... PARTITION OF statement per partition.
+        :rtype: list[str]
+        """
+        table_name: str = self.get_table_name(table_type)
+        statements: list[str] = []
+        for i in range(layout.partitions if layout.partitioned else 0):
+            partition_name: str = self.get_partition_name(table_type, i)
+            if layout.partitioning == DBPartitioning.RANGE:
+                lower: str = "MINVALUE" if i == 0 else self.PARTITION_RANGE_BOUND.format(seconds=i * layout.interval)
+                upper: str = ("MAXVALUE" if i == layout.partitions - 1
+                              else self.PARTITION_RANGE_BOUND.format(seconds=(i + 1) * layout.interval))
+                statements.append(self.PARTITION_RANGE.format(partition_name=partition_name, table_name=table_name,
+                                                              lower=lower, upper=upper))
+            else:
+                statements.append(self.PARTITION_HASH.format(partition_name=partition_name, table_name=table_name,
+                                                             modulus=layout.partitions, remainder=i))
+        return statements
+
+    def get_partition_name(self, table_type: DBPrimaryKeyType, partition: int) -> str:
+        return f"{self.get_table_name(table_type)}_p{partition}"
+
     def get_table_check_statement(self, table_type: DBPrimaryKeyType) -> str:
         table_name: str = self.get_table_name(table_type)
         stmt: str = self.TABLE_CHECK.format(table_name=table_name)
@@ -141,76 +1133,385 @@ CREATE TABLE {table_name} (
         logging.debug(f"Drop table statement for type '{table_type}': {stmt}")
         return stmt
     
-    def get_table_operation_statement(self, table_type: DBPrimaryKeyType, operation: DBOperation, batch_size: int = 1) -> str:
-        if operation == DBOperation.INSERT:
-            return self._get_insert_statement(table_type, batch_size)
+    def get_table_operation_statement(self,
+                                      table_type: DBPrimaryKeyType,
+                                      operation: DBOperation,
+                                      batch_size: int = 1,
+                                      paramstyle: DBParamStyle = DBParamStyle.FORMAT,
+                                      family: DBStatementFamily = DBStatementFamily.LITERAL,
+                                      keygen: DBKeyGeneration = DBKeyGeneration.SERVER) -> str:
+        if family == DBStatementFamily.ARRAY:
+            stmt = self._get_array_statement(table_type, operation, keygen)
+        elif family != DBStatementFamily.LITERAL:
+            raise ValueError(f"Invalid statement family '{family}'.")
+        elif operation == DBOperation.INSERT and keygen == DBKeyGeneration.CLIENT:
+            stmt = self._get_insert_keys_statement(table_type, batch_size)
+        elif operation == DBOperation.INSERT:
+            stmt = self._get_insert_statement(table_type, batch_size)
         elif operation == DBOperation.SELECT:
-            return self._get_select_statement(table_type, batch_size)
+            stmt = self._get_select_statement(table_type, batch_size)
         elif operation == DBOperation.UPDATE:
-            return self._get_update_statement(table_type, batch_size)
-        elif operation == DBOperation.DELETE:
-            return self._get_delete_statement(table_type, batch_size)
-        raise ValueError(f"Invalid operation '{operation}'.")
+            stmt = self._get_update_statement(table_type, batch_size)
+        elif operation in (DBOperation.DELETE, DBOperation.CASCADE):
+            stmt = self._get_delete_statement(table_type, batch_size)
+        else:
+            raise ValueError(f"Invalid operation '{operation}'.")
+        return self._apply_paramstyle(stmt, paramstyle)
+
+    def get_scan_statement(self,
+                           table_type: DBPrimaryKeyType,
+                           operation: DBOperation,
+                           scan_length: int,
+                           paramstyle: DBParamStyle = DBParamStyle.FORMAT) -> str:
+        """
+        Return the statement of a range scan in key order. A SCAN reads the
+        next page of a keyset pagination, the scan_length rows following the
+        cursor key, and RECENT reads the scan_length rows with the highest
+        keys, which are the latest rows for time-ordered keys. Both serve
+        every statement family.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param operation: SCAN or RECENT.
+        :type operation: DBOperation
+        :param scan_length: The number of rows per scan.
+        :type scan_length: int
+        :param paramstyle: The placeholder style of the statement.
+        :type paramstyle: DBParamStyle
+        :return: The statement.
+        :rtype: str
+        """
+        if scan_length < 1:
+            raise ValueError(f"Invalid scan length '{scan_length}'.")
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        if operation == DBOperation.SCAN:
+            template: str = self.SCAN_STATEMENT
+        elif operation == DBOperation.RECENT:
+            template = self.RECENT_STATEMENT
+        else:
+            raise ValueError(f"Invalid scan operation '{operation}'.")
+        stmt: str = template.format(
+            table_name=self.get_table_name(table_type),
+            key=strategy.get_key_expression(),
+            placeholder=strategy.get_placeholder(),
+            key_columns=strategy.get_column_list(),
+            key_columns_desc=", ".join(f"{name} DESC" for name in strategy.names),
+            scan_length=scan_length
+        )
+        logging.debug(f"Scan {operation.value} statement for type '{table_type}': {stmt}")
+        return self._apply_paramstyle(stmt, paramstyle)
+
+    def get_scan_buffers_statement(self, paramstyle: DBParamStyle = DBParamStyle.FORMAT) -> str:
+        """
+        Return the query of the shared buffers hit and read so far by the
+        current transaction in a test table and its indexes, taking the
+        table name twice. Reading it before and after a statement in the same
+        transaction measures the buffers of that statement.
+        """
+        return self._apply_paramstyle(self.SCAN_BUFFERS_QUERY, paramstyle)
+
+    def get_child_operation_statement(self,
+                                      table_type: DBPrimaryKeyType,
+                                      operation: DBOperation,
+                                      children: int,
+                                      batch_size: int = 1,
+                                      paramstyle: DBParamStyle = DBParamStyle.FORMAT,
+                                      family: DBStatementFamily = DBStatementFamily.LITERAL) -> str:
+        """
+        Return the statement of an operation on the child tables, covering
+        every child table in one statement: an FK insert adds one row per key
+        to each child table, chaining the inserts as data-modifying CTEs, and
+        a join reads the children of the keys from each child table, as one
+        UNION ALL. The parameters of one child table are repeated for each.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param operation: FK_INSERT or JOIN.
+        :type operation: DBOperation
+        :param children: The number of child tables.
+        :type children: int
+        :param batch_size: The number of keys per batch.
+        :type batch_size: int
+        :param paramstyle: The placeholder style of the statement.
+        :type paramstyle: DBParamStyle
+        :param family: The statement family.
+        :type family: DBStatementFamily
+        :return: The statement.
+        :rtype: str
+        """
+        if children < 1:
+            raise ValueError(f"Invalid number of child tables '{children}'.")
+        if family not in DBStatementFamily:
+            raise ValueError(f"Invalid statement family '{family}'.")
+        table_name: str = self.get_table_name(table_type)
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        array: bool = family == DBStatementFamily.ARRAY
+        references: list[str] = self.get_reference_names(table_type)
+        parts: list[str] = []
+        for child in range(children):
+            child_name: str = self.get_child_table_name(table_type, child)
+            if operation == DBOperation.FK_INSERT:
+                row: str = "(" + ", ".join(["%s"] * (len(references) + 1)) + ")"
+                parts.append((self.FK_INSERT_ARRAY_STATEMENT if array else self.FK_INSERT_STATEMENT).format(
+                    child_name=child_name,
+                    references=", ".join(references),
+                    key_arrays=strategy.get_array_source(),
+                    placeholders=", ".join([row] * batch_size)
+                ))
+            elif operation == DBOperation.JOIN:
+                parts.append((self.JOIN_ARRAY_STATEMENT if array else self.JOIN_STATEMENT).format(
+                    table_name=table_name,
+                    child_name=child_name,
+                    parent_columns=", ".join(f"p.{name}" for name in strategy.names),
+                    child_references=", ".join(f"c.{name}" for name in references),
+                    key=strategy.get_key_expression(),
+                    key_predicate=strategy.get_array_predicate(),
+                    placeholders=", ".join([strategy.get_placeholder()] * batch_size)
+                ))
+            else:
+                raise ValueError(f"Invalid child operation '{operation}'.")
+        if operation == DBOperation.FK_INSERT:
+            ctes: str = ", ".join(f"c{child} AS ({part})" for child, part in enumerate(parts[:-1]))
+            stmt: str = (f"WITH {ctes} " if ctes else "") + parts[-1] + ";"
+        else:
+            stmt = "\nUNION ALL\n".join(parts) + ";"
+        logging.debug(f"Child {operation.value} statement for type '{table_type}' and batch size {batch_size}: {stmt}")
+        return self._apply_paramstyle(stmt, paramstyle)
+
+    def _get_array_statement(self,
+                             table_type: DBPrimaryKeyType,
+                             operation: DBOperation,
+                             keygen: DBKeyGeneration = DBKeyGeneration.SERVER) -> str:
+        """
+        Return the array-parameter variant of an operation. Keys and rows are
+        passed as one array parameter per column, so the statement text does
+        not depend on the batch size.
+        """
+        table_name: str = self.get_table_name(table_type)
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        if operation == DBOperation.INSERT and keygen == DBKeyGeneration.CLIENT:
+            template: str = self.INSERT_KEYS_ARRAY_STATEMENT
+        elif operation == DBOperation.INSERT:
+            template = self.INSERT_ARRAY_STATEMENT
+        elif operation == DBOperation.SELECT:
+            template = self.SELECT_ARRAY_STATEMENT
+        elif operation == DBOperation.UPDATE:
+            template = self.UPDATE_ARRAY_STATEMENT
+        elif operation in (DBOperation.DELETE, DBOperation.CASCADE):
+            template = self.DELETE_ARRAY_STATEMENT
+        else:
+            raise ValueError(f"Invalid operation '{operation}'.")
+        stmt: str = template.format(
+            table_name=table_name,
+            key_columns=strategy.get_column_list(),
+            key_arrays=strategy.get_array_source(),
+            key_predicate=strategy.get_array_predicate()
+        )
+        logging.debug(f"Array {operation.value} statement for type '{table_type}': {stmt}")
+        return stmt
+
+    def _apply_paramstyle(self, stmt: str, paramstyle: DBParamStyle) -> str:
+        """
+        Rewrite the %s placeholders of a statement for the given parameter style.
+        NUMERIC uses the $1, $2, ... placeholders expected by asyncpg.
+        """
+        if paramstyle == DBParamStyle.FORMAT:
+            return stmt
+        elif paramstyle == DBParamStyle.NUMERIC:
+            parts: list[str] = stmt.split("%s")
+            return parts[0] + "".join(f"${i}{part}" for i, part in enumerate(parts[1:], start=1))
+        raise ValueError(f"Invalid parameter style '{paramstyle}'.")
 
     def _get_insert_statement(self, table_type: DBPrimaryKeyType, batch_size: int = 1) -> str:
         table_name: str = self.get_table_name(table_type)
+        key_columns: str = get_strategy(table_type).get_column_list()
         placeholders: str = ", ".join(["(%s)"] * batch_size)
-        stmt: str = self.INSERT_STATEMENT.format(table_name=table_name, placeholders=placeholders)
+        stmt: str = self.INSERT_STATEMENT.format(table_name=table_name, placeholders=placeholders, key_columns=key_columns)
         logging.debug(f"Insert statement for type '{table_type}' and batch size {batch_size}: {stmt}")
         return stmt
 
+    def _get_insert_keys_statement(self, table_type: DBPrimaryKeyType, batch_size: int = 1) -> str:
+        table_name: str = self.get_table_name(table_type)
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        row: str = "(" + ", ".join(["%s"] * (len(strategy.columns) + 1)) + ")"
+        placeholders: str = ", ".join([row] * batch_size)
+        stmt: str = self.INSERT_KEYS_STATEMENT.format(table_name=table_name, placeholders=placeholders,
+                                                      key_columns=strategy.get_column_list())
+        logging.debug(f"Insert keys statement for type '{table_type}' and batch size {batch_size}: {stmt}")
+        return stmt
+
     def _get_select_statement(self, table_type: DBPrimaryKeyType, batch_size: int = 1) -> str:
         table_name: str = self.get_table_name(table_type)
-        placeholders: str = ", ".join(["%s"] * batch_size)
-        stmt: str = self.SELECT_STATEMENT.format(table_name=table_name, placeholders=placeholders)
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        placeholders: str = ", ".join([strategy.get_placeholder()] * batch_size)
+        stmt: str = self.SELECT_STATEMENT.format(table_name=table_name, placeholders=placeholders,
+                                                  key=strategy.get_key_expression())
         logging.debug(f"Select statement for type '{table_type}' and batch size {batch_size}: {stmt}")
         return stmt
 
     def _get_update_statement(self, table_type: DBPrimaryKeyType, batch_size: int = 1) -> str:
         table_name: str = self.get_table_name(table_type)
-        placeholders: str = ", ".join(["%s"] * batch_size)
-        stmt: str = self.UPDATE_STATEMENT.format(table_name=table_name, placeholders=placeholders)
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        placeholders: str = ", ".join([strategy.get_placeholder()] * batch_size)
+        stmt: str = self.UPDATE_STATEMENT.format(table_name=table_name, placeholders=placeholders,
+                                                  key=strategy.get_key_expression())
         logging.debug(f"Update statement for type '{table_type}' and batch size {batch_size}: {stmt}")
         return stmt
 
     def _get_delete_statement(self, table_type: DBPrimaryKeyType, batch_size: int = 1) -> str:
         table_name: str = self.get_table_name(table_type)
-        placeholders: str = ", ".join(["%s"] * batch_size)
-        stmt: str = self.DELETE_STATEMENT.format(table_name=table_name, placeholders=placeholders)
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        placeholders: str = ", ".join([strategy.get_placeholder()] * batch_size)
+        stmt: str = self.DELETE_STATEMENT.format(table_name=table_name, placeholders=placeholders,
+                                                  key=strategy.get_key_expression())
         logging.debug(f"Delete statement for type '{table_type}' and batch size {batch_size}: {stmt}")
         return stmt
 
+    def get_child_table_name(self, table_type: DBPrimaryKeyType, child: int) -> str:
+        return f"{self.get_table_name(table_type)}_c{child}"
+
+    def get_reference_names(self, table_type: DBPrimaryKeyType) -> list[str]:
+        return [self.REFERENCE_PREFIX + name for name in get_strategy(table_type).names]
+
+    def get_child_create_statement(self,
+                                   table_type: DBPrimaryKeyType,
+                                   child: int,
+                                   layout: DBTableLayout | None = None) -> str:
+        """
+        Return the statement creating a child table, whose foreign key
+        references the primary key of the test table and cascades deletes.
+        The foreign key columns have the types of the key columns and are
+        indexed, as PostgreSQL does not index the referencing side.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param child: The index of the child table.
+        :type child: int
+        :param layout: Optional partitioning of the test table, defaults to a single heap.
+        :type layout: DBTableLayout | None
+        :return: The CREATE TABLE and CREATE INDEX statements.
+        :rtype: str
+        """
+        if layout is not None and layout.partitioning == DBPartitioning.RANGE:
+            # The primary key includes the partition column, the id alone is not unique.
+            raise ValueError(f"Invalid child tables for partitioning '{layout.partitioning.value}'.")
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        references: list[str] = self.get_reference_names(table_type)
+        stmt: str = self.CHILD_CREATE.format(
+            child_name=self.get_child_table_name(table_type, child),
+            table_name=self.get_table_name(table_type),
+            reference_columns=",\n    ".join(f"{name} {column.sql_type.upper()} NOT NULL"
+                                             for name, column in zip(references, strategy.columns)),
+            char_length=self.CHILD_CHAR_LENGTH,
+            references=", ".join(references),
+            key_columns=strategy.get_column_list()
+        )
+        logging.debug(f"Create child table statement for type '{table_type}': {stmt}")
+        return stmt
+
+    def get_child_drop_statement(self, table_type: DBPrimaryKeyType, child: int) -> str:
+        return self.CHILD_DROP.format(child_name=self.get_child_table_name(table_type, child))
+
+    def get_child_data(self) -> str:
+        return self.CHILD_CHAR_FILL * self.CHILD_CHAR_LENGTH
+
+    def get_staging_name(self, table_type: DBPrimaryKeyType) -> str:
+        return f"{self.get_table_name(table_type)}_staging"
+
+    def get_staging_create_statement(self, table_type: DBPrimaryKeyType) -> str:
+        staging_name: str = self.get_staging_name(table_type)
+        char_length: int = self.get_char_length(table_type)
+        stmt: str = self.STAGING_CREATE.format(staging_name=staging_name, char_length=char_length)
+        logging.debug(f"Staging table statement for type '{table_type}': {stmt}")
+        return stmt
+
+    def get_copy_statement(self,
+                           table_type: DBPrimaryKeyType,
+                           insert_mode: DBInsertMode,
+                           keygen: DBKeyGeneration = DBKeyGeneration.SERVER) -> str:
+        """
+        Return the COPY statement of the insert phase. With server-generated
+        keys rows are copied into the staging table, so the keys can be
+        returned by the insert-select. Client-generated keys are copied
+        straight into the table.
+        """
+        if insert_mode == DBInsertMode.COPY:
+            options: str = ""
+        elif insert_mode == DBInsertMode.COPY_BINARY:
+            options = " WITH (FORMAT binary)"
+        else:
+            raise ValueError(f"Invalid insert mode '{insert_mode}' for COPY.")
+        if keygen == DBKeyGeneration.CLIENT:
+            stmt: str = self.COPY_KEYS_STATEMENT.format(table_name=self.get_table_name(table_type), options=options,
+                                                        key_columns=get_strategy(table_type).get_column_list())
+        else:
+            stmt = self.COPY_STATEMENT.format(staging_name=self.get_staging_name(table_type), options=options)
+        logging.debug(f"Copy statement for type '{table_type}': {stmt}")
+        return stmt
+
+    def get_insert_select_statement(self, table_type: DBPrimaryKeyType) -> str:
+        table_name: str = self.get_table_name(table_type)
+        staging_name: str = self.get_staging_name(table_type)
+        stmt: str = self.INSERT_SELECT_STATEMENT.format(table_name=table_name, staging_name=staging_name,
+                                                        key_columns=get_strategy(table_type).get_column_list())
+        logging.debug(f"Insert select statement for type '{table_type}': {stmt}")
+        return stmt
+
+    def get_copy_data(self,
+                      table_type: DBPrimaryKeyType,
+                      batch_size: int,
+                      insert_mode: DBInsertMode,
+                      keys: list[Any] | None = None) -> bytes:
+        """
+        Build the COPY payload for one insert batch.
+
+        :param table_type: The type of primary key for the table.
+        :type table_type: DBPrimaryKeyType
+        :param batch_size: The number of rows in the batch.
+        :type batch_size: int
+        :param insert_mode: COPY for the text format, COPY_BINARY for the binary format.
+        :type insert_mode: DBInsertMode
+        :param keys: Optional client-generated keys, one per row, written as the key columns.
+        :type keys: list[Any] | None
+        :return: The COPY payload.
+        :rtype: bytes
+        """
+        data: bytes = self.get_char_data(table_type, DBOperation.INSERT).encode("ascii")
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        if insert_mode == DBInsertMode.COPY:
+            if keys is not None:
+                return b"".join(strategy.get_copy_text(key).encode("ascii") + data + b"\n" for key in keys)
+            return (data + b"\n") * batch_size
+        elif insert_mode == DBInsertMode.COPY_BINARY:
+            field: bytes = len(data).to_bytes(4, "big") + data
+            if keys is not None:
+                count: bytes = (len(strategy.columns) + 1).to_bytes(2, "big")
+                rows: bytes = b"".join(count + strategy.get_copy_binary(key) + field for key in keys)
+                return self.COPY_BINARY_HEADER + rows + self.COPY_BINARY_TRAILER
+            row: bytes = (1).to_bytes(2, "big") + field
+            return self.COPY_BINARY_HEADER + row * batch_size + self.COPY_BINARY_TRAILER
+        raise ValueError(f"Invalid insert mode '{insert_mode}' for COPY.")
+
     def get_char_length(self, table_type: DBPrimaryKeyType) -> int:
-        if table_type == DBPrimaryKeyType.BIGINT:
-            return self.CHAR_BIGINT_LENGTH
-        elif table_type == DBPrimaryKeyType.UUIDV4 or table_type == DBPrimaryKeyType.UUIDV7:
-            return self.CHAR_UUID_LENGTH
-        raise ValueError(f"Invalid table type '{table_type}'.")
-    
+        return get_strategy(table_type).char_length
+
     def get_char_data(self, table_type: DBPrimaryKeyType, operation: DBOperation) -> str:
-        if table_type == DBPrimaryKeyType.BIGINT:
-            if operation == DBOperation.INSERT:
-                return self.CHAR_BIGINT_INSERT
-            elif operation == DBOperation.UPDATE:
-                return self.CHAR_BIGINT_UPDATE
-        elif table_type == DBPrimaryKeyType.UUIDV4 or table_type == DBPrimaryKeyType.UUIDV7:
-            if operation == DBOperation.INSERT:
-                return self.CHAR_UUID_INSERT
-            elif operation == DBOperation.UPDATE:
-                return self.CHAR_UUID_UPDATE
-        raise ValueError(f"Invalid table type '{table_type}' or operation '{operation}'.")
+        fill: str | None = self.CHAR_FILL.get(operation)
+        if fill is None:
+            raise ValueError(f"Invalid table type '{table_type}' or operation '{operation}'.")
+        return fill * self.get_char_length(table_type)
 
     def get_table_name(self, table_type: DBPrimaryKeyType) -> str:
         if table_type in DBPrimaryKeyType:
             return f"test_{table_type.value.lower()}"
         raise ValueError(f"Invalid table type '{table_type}'.")
 
+    def get_key_type(self, table_type: DBPrimaryKeyType) -> str:
+        return get_strategy(table_type).key_type
+
     def get_table_pk(self, table_type: DBPrimaryKeyType) -> str:
-        if table_type == DBPrimaryKeyType.BIGINT:
-            return "BIGSERIAL"
-        elif table_type == DBPrimaryKeyType.UUIDV4:
-            return "UUID DEFAULT gen_random_uuid()"
-        elif table_type == DBPrimaryKeyType.UUIDV7:
-            return "UUID DEFAULT uuidv7()"
-        raise ValueError(f"Invalid table type '{table_type}'.")
- 
\ No newline at end of file
+        """
+        Return the type and default of the id column.
+        """
+        column: KeyColumn = get_strategy(table_type).columns[-1]
+        return column.definition.format(table_name=self.get_table_name(table_type))
@@ -0,0 +1,105 @@
+import math
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed (HDR-style) latency histogram.
+
+    Values are recorded in nanoseconds into buckets whose width doubles with
+    every power of two, while each power of two is split into a fixed number of
+    linear sub-buckets. This keeps the relative error below 10^-digits over the
+    whole range in constant memory. Histograms with the same configuration can
+    be merged losslessly by adding their counts.
+    """
+    def __init__(self, digits: int = 2, highest: float = 3600.0) -> None:
+        """
+        Initialize a latency histogram.
+
+        :param digits: The number of significant decimal digits to preserve.
+        :type digits: int
+        :param highest: The highest trackable value in seconds. Larger values are clamped.
+        :type highest: float
+        """
+        if digits < 1 or digits > 5:
+            raise ValueError(f"Invalid number of significant digits '{digits}'.")
+        if highest <= 0:
+            raise ValueError(f"Invalid highest trackable value '{highest}'.")
+        self.digits = digits
+        self.highest = highest
+        self._sub_bits: int = math.ceil(math.log2(2 * 10 ** digits))
+        self._sub_count: int = 1 << self._sub_bits
+        self._half_count: int = self._sub_count >> 1
+        self._highest_ns: int = int(highest * 1e9)
+        self.counts: np.ndarray = np.zeros(self._index(self._highest_ns) + 1, dtype=np.int64)
+        self.total: int = 0
+        self.sum: float = 0.0
+        self.min: float = math.inf
+        self.max: float = 0.0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_count:
+            return value
+        shift: int = value.bit_length() - self._sub_bits
+        return self._sub_count + (shift - 1) * self._half_count + (value >> shift) - self._half_count
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self._sub_count:
+            return index
+        shift: int = (index - self._sub_count) // self._half_count + 1
+        top: int = (index - self._sub_count) % self._half_count + self._half_count
+        return ((top + 1) << shift) - 1
+
+    def record(self, value: float, count: int = 1) -> None:
+        """
+        Record a latency value.
+
+        :param value: The latency in seconds.
+        :type value: float
+        :param count: The number of times the value occurred.
+        :type count: int
+        """
+        ns: int = min(max(int(value * 1e9), 0), self._highest_ns)
+        self.counts[self._index(ns)] += count
+        self.total += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """
+        Add the counts of another histogram to this histogram.
+
+        :param other: The histogram to merge. It must use the same configuration.
+        :type other: LatencyHistogram
+        """
+        if other.digits != self.digits or other.highest != self.highest:
+            raise ValueError("Cannot merge histograms with different configurations.")
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else math.nan
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Return the value at the given percentile.
+
+        :param percentile: The percentile in the range [0, 100].
+        :type percentile: float
+        :return: The highest value equivalent to the bucket containing the percentile, in seconds.
+        :rtype: float
+        """
+        if percentile < 0 or percentile > 100:
+            raise ValueError(f"Invalid percentile '{percentile}'.")
+        if self.total == 0:
+            return math.nan
+        rank: int = max(math.ceil(percentile / 100 * self.total), 1)
+        index: int = int(np.searchsorted(np.cumsum(self.counts), rank))
+        value: float = self._highest_equivalent(index) / 1e9
+        return min(max(value, self.min), self.max)
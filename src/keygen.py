@@ -0,0 +1,219 @@
+import os
+import time
+import numpy as np
+
+from abc import ABC, abstractmethod
+
+
+class KeyGenerator(ABC):
+    """
+    Generates batches of primary keys on the client.
+
+    Keys are returned in the KeyStore layout of their strategy: an int64
+    array for integer keys, a (n, 16) uint8 array of raw bytes for UUIDs and
+    ULIDs and a (n, 2) int64 array for (tenant_id, id) keys, so a whole
+    batch is produced with a few vectorized NumPy operations.
+    """
+    @abstractmethod
+    def generate(self, n: int) -> np.ndarray:
+        """
+        Generate a batch of keys.
+
+        :param n: The number of keys to generate.
+        :type n: int
+        :return: The generated keys.
+        :rtype: np.ndarray
+        """
+
+
+class TimeOrderedKeyGenerator(KeyGenerator):
+    """
+    Base for keys made of a millisecond timestamp followed by a sequence
+    counter. Keys are strictly increasing per generator: within the same
+    millisecond the counter continues, and when it overflows the timestamp
+    is advanced ahead of the clock.
+    """
+    SEQUENCE_BITS: int = 12
+
+    def __init__(self) -> None:
+        self._last_ms: int = -1
+        self._last_seq: int = -1
+
+    def _first_sequence(self) -> int:
+        return 0
+
+    def _timestamps(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        now: int = time.time_ns() // 1_000_000
+        if now > self._last_ms:
+            base_ms: int = now
+            first: int = self._first_sequence()
+        else:
+            base_ms = self._last_ms
+            first = self._last_seq + 1
+        seq: np.ndarray = first + np.arange(n, dtype=np.int64)
+        ms: np.ndarray = base_ms + (seq >> self.SEQUENCE_BITS)
+        seq &= (1 << self.SEQUENCE_BITS) - 1
+        self._last_ms = int(ms[-1])
+        self._last_seq = int(seq[-1])
+        return ms, seq
+
+
+class UUIDv4KeyGenerator(KeyGenerator):
+    """
+    Random UUIDs (RFC 9562 version 4) from one os.urandom() call per batch.
+    """
+    def generate(self, n: int) -> np.ndarray:
+        keys: np.ndarray = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+        keys[:, 6] = (keys[:, 6] & 0x0F) | 0x40
+        keys[:, 8] = (keys[:, 8] & 0x3F) | 0x80
+        return keys
+
+
+class UUIDv7KeyGenerator(TimeOrderedKeyGenerator):
+    """
+    Time-ordered UUIDs (RFC 9562 version 7). The 12 rand_a bits hold a
+    counter that is monotonic within a millisecond and starts at a random
+    value in its lower half for every new millisecond.
+    """
+    def _first_sequence(self) -> int:
+        return int.from_bytes(os.urandom(2), "big") & 0x7FF
+
+    def generate(self, n: int) -> np.ndarray:
+        ms, seq = self._timestamps(n)
+        high: np.ndarray = ((ms << 16) | (0x7 << 12) | seq).astype(">u8")
+        low: np.ndarray = np.frombuffer(os.urandom(8 * n), dtype=np.uint64)
+        low = ((low & np.uint64(0x3FFFFFFFFFFFFFFF)) | np.uint64(0x8000000000000000)).astype(">u8")
+        keys: np.ndarray = np.empty((n, 16), dtype=np.uint8)
+        keys[:, :8] = high.view(np.uint8).reshape(n, 8)
+        keys[:, 8:] = low.view(np.uint8).reshape(n, 8)
+        return keys
+
+
+class SnowflakeKeyGenerator(TimeOrderedKeyGenerator):
+    """
+    64-bit time-ordered ids: 41 bits of milliseconds since EPOCH_MS, 10 bits
+    of node id and a 12-bit sequence.
+    """
+    EPOCH_MS: int = 1577836800000
+    NODE_BITS: int = 10
+
+    def __init__(self, node: int = 0) -> None:
+        """
+        Initialize a snowflake id generator.
+
+        :param node: The node id, unique per concurrent generator.
+        :type node: int
+        """
+        super().__init__()
+        if node < 0 or node >= (1 << self.NODE_BITS):
+            raise ValueError(f"Invalid node id '{node}'.")
+        self.node = node
+
+    def generate(self, n: int) -> np.ndarray:
+        ms, seq = self._timestamps(n)
+        return ((ms - self.EPOCH_MS) << (self.NODE_BITS + self.SEQUENCE_BITS)) | (self.node << self.SEQUENCE_BITS) | seq
+
+
+class SequenceKeyGenerator(KeyGenerator):
+    """
+    Increasing integer ids interleaved across nodes: node n of `nodes`
+    generates start + n, start + n + nodes, ... Client keys start far above
+    the ids of the server-side sequence, so both never collide. Together
+    the nodes use the ids from start up to the optional stop without gaps.
+    """
+    NODES: int = 1 << SnowflakeKeyGenerator.NODE_BITS
+
+    def __init__(self, node: int = 0, nodes: int = NODES, start: int = 1 << 40, stop: int | None = None) -> None:
+        """
+        Initialize a sequence id generator.
+
+        :param node: The node id, unique per concurrent generator.
+        :type node: int
+        :param nodes: The number of concurrent generators, the stride of the ids.
+        :type nodes: int
+        :param start: The first id of node 0.
+        :type start: int
+        :param stop: Optional exclusive upper bound of the ids, e.g. the range of the key column.
+        :type stop: int | None
+        """
+        if nodes < 1 or nodes > self.NODES or node < 0 or node >= nodes:
+            raise ValueError(f"Invalid node id '{node}' of {nodes} nodes.")
+        self.nodes: int = nodes
+        self.stop: int | None = stop
+        self._next: int = start + node
+
+    def generate(self, n: int) -> np.ndarray:
+        if self.stop is not None and self._next + self.nodes * (n - 1) >= self.stop:
+            raise ValueError(f"Invalid key beyond the key space ending at {self.stop}.")
+        keys: np.ndarray = self._next + self.nodes * np.arange(n, dtype=np.int64)
+        self._next += self.nodes * n
+        return keys
+
+
+class ULIDKeyGenerator(KeyGenerator):
+    """
+    ULIDs: 48 bits of milliseconds since the Unix epoch followed by 80
+    random bits, without the version and variant bits of a UUID. Keys of
+    the same millisecond are not ordered.
+    """
+    def generate(self, n: int) -> np.ndarray:
+        ms: np.ndarray = np.full(n, time.time_ns() // 1_000_000, dtype=">u8")
+        keys: np.ndarray = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+        keys[:, :6] = ms.view(np.uint8).reshape(n, 8)[:, 2:]
+        return keys
+
+
+class HashKeyGenerator(KeyGenerator):
+    """
+    Hash-distributed 64-bit ids: the splitmix64 finalizer, a bijection,
+    applied to a per-node counter. Keys are unique but scattered over the
+    whole key space, like hashint8extended() of a sequence on the server.
+    """
+    COUNTER_BITS: int = 40
+
+    def __init__(self, node: int = 0) -> None:
+        """
+        Initialize a hash id generator.
+
+        :param node: The node id, unique per concurrent generator.
+        :type node: int
+        """
+        if node < 0 or node >= SequenceKeyGenerator.NODES:
+            raise ValueError(f"Invalid node id '{node}'.")
+        self._next: int = node << self.COUNTER_BITS
+
+    def generate(self, n: int) -> np.ndarray:
+        x: np.ndarray = np.uint64(self._next) + np.arange(n, dtype=np.uint64)
+        self._next += n
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+        return x.view(np.int64)
+
+
+class TenantKeyGenerator(KeyGenerator):
+    """
+    (tenant_id, id) keys of a multi-tenant table: a random tenant out of
+    TENANTS and a sequence id, so inserts hit one insertion point per tenant.
+    """
+    TENANTS: int = 64
+
+    def __init__(self, node: int = 0, nodes: int = SequenceKeyGenerator.NODES) -> None:
+        """
+        Initialize a tenant key generator.
+
+        :param node: The node id, unique per concurrent generator.
+        :type node: int
+        :param nodes: The number of concurrent generators.
+        :type nodes: int
+        """
+        self._ids: SequenceKeyGenerator = SequenceKeyGenerator(node, nodes)
+        self._rng: np.random.Generator = np.random.default_rng()
+
+    def generate(self, n: int) -> np.ndarray:
+        keys: np.ndarray = np.empty((n, 2), dtype=np.int64)
+        keys[:, 0] = self._rng.integers(0, self.TENANTS, size=n)
+        keys[:, 1] = self._ids.generate(n)
+        return keys
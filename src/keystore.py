@@ -0,0 +1,231 @@
+import uuid
+import numpy as np
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class KeyStore(ABC):
+    """
+    Compact store for the primary keys returned to a worker.
+
+    Keys are kept in insertion order in one contiguous NumPy buffer, with a
+    parallel mask tracking deleted keys. Random sampling draws indices and
+    rejects deleted ones, take() returns the oldest live keys for sequential
+    deletes, and the buffer is compacted once most keys are deleted.
+    """
+    def __init__(self, capacity: int = 1024, seed: int | None = None) -> None:
+        """
+        Initialize a key store.
+
+        :param capacity: The number of keys to preallocate.
+        :type capacity: int
+        :param seed: Optional seed for the random sampler.
+        :type seed: int | None
+        """
+        self._keys: np.ndarray = self._allocate(max(capacity, 1))
+        self._deleted: np.ndarray = np.zeros(max(capacity, 1), dtype=bool)
+        self._size: int = 0
+        self._live: int = 0
+        self._cursor: int = 0
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def nbytes(self) -> int:
+        return self._keys.nbytes + self._deleted.nbytes
+
+    @abstractmethod
+    def _allocate(self, capacity: int) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def _encode(self, keys: list[Any]) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def _decode(self, keys: np.ndarray) -> list[Any]:
+        pass
+
+    def decode(self, keys: np.ndarray) -> list[Any]:
+        """
+        Convert keys in the store layout to query parameters.
+
+        :param keys: The encoded keys.
+        :type keys: np.ndarray
+        :return: The keys as query parameters, e.g. int or uuid.UUID values.
+        :rtype: list[Any]
+        """
+        return self._decode(keys)
+
+    def append(self, keys: list[Any] | np.ndarray) -> None:
+        """
+        Append keys in insertion order.
+
+        :param keys: The keys to append, either as values or already in the store layout.
+        :type keys: list[Any] | np.ndarray
+        """
+        n: int = len(keys)
+        if n == 0:
+            return
+        if self._size + n > len(self._keys):
+            self._grow(self._size + n)
+        self._keys[self._size:self._size + n] = keys if isinstance(keys, np.ndarray) else self._encode(keys)
+        self._deleted[self._size:self._size + n] = False
+        self._size += n
+        self._live += n
+
+    def _grow(self, required: int) -> None:
+        capacity: int = max(required, len(self._keys) * 2)
+        keys: np.ndarray = self._allocate(capacity)
+        keys[:self._size] = self._keys[:self._size]
+        deleted: np.ndarray = np.zeros(capacity, dtype=bool)
+        deleted[:self._size] = self._deleted[:self._size]
+        self._keys = keys
+        self._deleted = deleted
+
+    def sample(self, n: int, remove: bool = False) -> list[Any]:
+        """
+        Return n distinct live keys chosen uniformly at random.
+
+        :param n: The number of keys to return.
+        :type n: int
+        :param remove: Whether to mark the sampled keys as deleted.
+        :type remove: bool
+        :return: The sampled keys.
+        :rtype: list[Any]
+        """
+        if n > self._live:
+            raise ValueError(f"Sample larger than the {self._live} live keys.")
+        if self._live < self._size // 2:
+            self._compact()
+        if self._live == self._size:
+            indices: np.ndarray = self._rng.choice(self._size, size=n, replace=False)
+        else:
+            chosen: set[int] = set()
+            while len(chosen) < n:
+                for index in self._rng.integers(0, self._size, size=n - len(chosen)).tolist():
+                    if not self._deleted[index]:
+                        chosen.add(index)
+            indices = np.fromiter(chosen, dtype=np.int64, count=n)
+        if remove:
+            self._deleted[indices] = True
+            self._live -= n
+        return self._decode(self._keys[indices])
+
+    def take(self, n: int) -> list[Any]:
+        """
+        Remove and return the n oldest live keys.
+
+        :param n: The number of keys to take.
+        :type n: int
+        :return: The taken keys, oldest first.
+        :rtype: list[Any]
+        """
+        if n > self._live:
+            raise ValueError(f"Cannot take {n} of the {self._live} live keys.")
+        indices: list[int] = []
+        while len(indices) < n:
+            if not self._deleted[self._cursor]:
+                indices.append(self._cursor)
+            self._cursor += 1
+        selected: np.ndarray = np.array(indices, dtype=np.int64)
+        self._deleted[selected] = True
+        self._live -= n
+        return self._decode(self._keys[selected])
+
+    def delete(self, keys: list[Any]) -> None:
+        """
+        Mark keys as deleted.
+
+        :param keys: The keys to delete.
+        :type keys: list[Any]
+        """
+        encoded: np.ndarray = self._encode(keys)
+        live: np.ndarray = ~self._deleted[:self._size]
+        matches: np.ndarray = self._match(encoded) & live
+        self._deleted[:self._size] |= matches
+        self._live -= int(matches.sum())
+
+    def _match(self, encoded: np.ndarray) -> np.ndarray:
+        stored: np.ndarray = self._keys[:self._size]
+        if stored.ndim > 1:
+            # Multi-value keys are compared as opaque rows of bytes.
+            row: np.dtype = np.dtype((np.void, stored.itemsize * stored.shape[1]))
+            stored = np.ascontiguousarray(stored).view(row).ravel()
+            encoded = np.ascontiguousarray(encoded).view(row).ravel()
+        return np.isin(stored, encoded)
+
+    def _compact(self) -> None:
+        live: np.ndarray = ~self._deleted[:self._size]
+        keys: np.ndarray = self._keys[:self._size][live]
+        self._cursor = int(live[:self._cursor].sum())
+        self._size = len(keys)
+        self._keys[:self._size] = keys
+        self._deleted[:self._size] = False
+
+
+class BigIntKeyStore(KeyStore):
+    """
+    Stores BIGINT keys as an int64 array (8 bytes per key).
+    """
+    def _allocate(self, capacity: int) -> np.ndarray:
+        return np.empty(capacity, dtype=np.int64)
+
+    def _encode(self, keys: list[Any]) -> np.ndarray:
+        return np.asarray(keys, dtype=np.int64)
+
+    def _decode(self, keys: np.ndarray) -> list[Any]:
+        return keys.tolist()
+
+
+class UUIDKeyStore(KeyStore):
+    """
+    Stores UUID keys as 16 raw bytes per key.
+    """
+    def _allocate(self, capacity: int) -> np.ndarray:
+        return np.empty((capacity, 16), dtype=np.uint8)
+
+    def _encode(self, keys: list[Any]) -> np.ndarray:
+        raw: bytes = b"".join(k.bytes if not isinstance(k, str) else uuid.UUID(k).bytes for k in keys)
+        return np.frombuffer(raw, dtype=np.uint8).reshape(-1, 16)
+
+    def _decode(self, keys: np.ndarray) -> list[Any]:
+        raw: bytes = keys.tobytes()
+        return [uuid.UUID(bytes=raw[i:i + 16]) for i in range(0, len(raw), 16)]
+
+
+class UUIDBytesKeyStore(UUIDKeyStore):
+    """
+    Stores UUID keys of a BYTEA column as 16 raw bytes per key, returned as bytes.
+    """
+    def _encode(self, keys: list[Any]) -> np.ndarray:
+        return np.frombuffer(b"".join(bytes(k) for k in keys), dtype=np.uint8).reshape(-1, 16)
+
+    def _decode(self, keys: np.ndarray) -> list[Any]:
+        raw: bytes = keys.tobytes()
+        return [raw[i:i + 16] for i in range(0, len(raw), 16)]
+
+
+class UUIDTextKeyStore(UUIDKeyStore):
+    """
+    Stores UUID keys of a TEXT column as 16 raw bytes per key, returned as strings.
+    """
+    def _decode(self, keys: np.ndarray) -> list[Any]:
+        return [str(k) for k in super()._decode(keys)]
+
+
+class CompositeKeyStore(KeyStore):
+    """
+    Stores (tenant_id, id) keys as two int64 per key, returned as tuples.
+    """
+    def _allocate(self, capacity: int) -> np.ndarray:
+        return np.empty((capacity, 2), dtype=np.int64)
+
+    def _encode(self, keys: list[Any]) -> np.ndarray:
+        return np.asarray([tuple(k) for k in keys], dtype=np.int64).reshape(-1, 2)
+
+    def _decode(self, keys: np.ndarray) -> list[Any]:
+        return [tuple(k) for k in keys.tolist()]
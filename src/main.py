@@ -6,12 +6,48 @@ import sys
 import time
 
 from dotenv import load_dotenv
+from urllib.parse import quote
 
-from dbfactory import DBFactory, DBOperation, DBPrimaryKeyType
-from testpk import TestPrimaryKey
+from dbfactory import (DBFactory, DBInsertMode, DBKeyGeneration, DBOperation, DBPartitioning, DBPlanCacheMode, DBPrimaryKeyType,
+                       DBStatementFamily, DBTableLayout)
+from metrics import MetricsFormat, MetricsSink, get_metrics_sink
+from pkstrategy import get_strategy
+from report import build_report, to_latex_table
+from sweep import ResultStore, SweepSpec
+from testpk import TestEngine, TestPrimaryKey
+from workload import WorkloadMix
 
-LOGFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}.log"
-METRICFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}.csv"
+LOGFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}{options}.log"
+METRICFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}{options}.{format}"
+SUMMARYFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}{options}_summary.csv"
+TIMESERIESFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}{options}_timeseries.csv"
+SERVERSTATSFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}{options}_serverstats.csv"
+LAYOUTFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}{options}_layout.csv"
+REPETITIONSFILE_TMPLT: str = "{pktype}_{workers}_{batchsize}_{operations}{options}_repetitions.csv"
+
+# Options of a run that change what it measures or outputs. Those differing
+# from their defaults are appended to the file names, e.g. "_engine=process".
+RUN_OPTIONS: list[str] = [
+    "engine",
+    "insertmode",
+    "prepared", "plancachemode",
+    "statements",
+    "keygen",
+    "mix",
+    "target_rate",
+    "dataset",
+    "partitioning", "partitions", "partition_interval",
+    "children",
+    "scanlength", "scanbuffers",
+    "pipeline_depth",
+    "warmup", "repetitions", "precision", "confidence",
+]
+
+SWEEPLOGFILE: str = "sweep.log"
+REPORTFILE: str = "report.csv"
+REPORTTABLE_TMPLT: str = "report_{operation}_{metric}.tex"
+SWEEP_EXCLUDED: set[str] = {"host", "port", "user", "password", "dbname", "loglevel", "logdir",
+                            "metricsdir", "metricsformat", "poolmax", "poolmin"}
 
 def main() -> None:
     """
@@ -19,77 +55,582 @@ def main() -> None:
     :return: None
     :rtype: None
     """
-    arg = argparse.ArgumentParser(description="Run PrimaryKey Test using the specified configuration.")
+    if sys.argv[1:2] == ["sweep"]:
+        sweep(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["report"]:
+        report(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["dataset"]:
+        dataset(sys.argv[2:])
+        return
+    arg = get_parser()
+    args = arg.parse_args(sys.argv[1:])
+
+    os.makedirs(args.logdir, exist_ok=True)
+    options: str = get_run_options(args)
+    log_path = get_log_path(args.logdir, args.pktype, args.workers, args.batchsize, args.operations, options)
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper(), logging.INFO),
+                        filename=log_path, filemode='w',
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    validate_args(args)
+
+    os.makedirs(args.metricsdir, exist_ok=True)
+    metrics_path = get_metrics_path(args.metricsdir, args.pktype, args.workers, args.batchsize, args.operations,
+                                    MetricsFormat(args.metricsformat), options)
+    summary_path = get_summary_path(args.metricsdir, args.pktype, args.workers, args.batchsize, args.operations, options)
+    timeseries_path = get_timeseries_path(args.metricsdir, args.pktype, args.workers, args.batchsize, args.operations,
+                                          options)
+    serverstats_path = get_serverstats_path(args.metricsdir, args.pktype, args.workers, args.batchsize, args.operations,
+                                            options)
+    layout_path = get_layout_path(args.metricsdir, args.pktype, args.workers, args.batchsize, args.operations, options)
+    repetitions_path = get_repetitions_path(args.metricsdir, args.pktype, args.workers, args.batchsize, args.operations,
+                                            options)
+    if args.raw:
+        logging.info(f"Metrics will be written to: {metrics_path}")
+    logging.info(f"Summary will be written to: {summary_path}")
+    logging.info(f"Time series will be written to: {timeseries_path}")
+    if args.serverstats:
+        logging.info(f"Server statistics will be written to: {serverstats_path}")
+    if args.analyze:
+        logging.info(f"Layout analysis will be written to: {layout_path}")
+    if args.repetitions > 1:
+        logging.info(f"Repetition statistics will be written to: {repetitions_path}")
+
+    load_dotenv()
+
+    db_factory: DBFactory = DBFactory(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        dbname=args.dbname
+    )
+    sink: MetricsSink | None = get_metrics_sink(metrics_path, MetricsFormat(args.metricsformat)) if args.raw else None
+    if args.poolmax is not None:
+        db_factory.open_pool(minconn=args.poolmin if args.poolmin is not None else min(args.workers, args.poolmax),
+                             maxconn=args.poolmax)
+    tester: TestPrimaryKey = create_tester(args, db_factory, sink)
+    try:
+        tester.run_test()
+    finally:
+        if sink is not None:
+            sink.close()
+        db_factory.close_pool()
+    summary: pd.DataFrame = tester.get_summary()
+    summary.to_csv(summary_path, index=False)
+    logging.info(f"Summary:\n{summary.to_string(index=False)}")
+    tester.get_timeseries().to_csv(timeseries_path, index=False)
+    if args.serverstats:
+        server_stats: pd.DataFrame = tester.get_server_stats()
+        server_stats.to_csv(serverstats_path, index=False)
+        logging.info(f"Server statistics:\n{server_stats.T.to_string(header=False)}")
+    if args.analyze:
+        layout_stats: pd.DataFrame = tester.get_layout_stats()
+        layout_stats.to_csv(layout_path, index=False)
+        logging.info(f"Layout analysis:\n{layout_stats.T.to_string(header=False)}")
+    if args.repetitions > 1:
+        repetition_stats: pd.DataFrame = tester.get_repetition_stats()
+        repetition_stats.to_csv(repetitions_path, index=False)
+        logging.info(f"Repetition statistics:\n{repetition_stats.to_string(index=False)}")
+
+def sweep(argv: list[str]) -> None:
+    """
+    Run every configuration of a sweep spec in this process, reusing one
+    connection pool, in random order, skipping the cells a previous,
+    interrupted sweep already completed. Results of all cells go to one
+    partitioned result store.
+    :param argv: The command line arguments after "sweep".
+    :type argv: list[str]
+    :return: None
+    :rtype: None
+    """
+    arg = argparse.ArgumentParser(prog="main.py sweep", description="Run a matrix of PrimaryKey Tests in one process.")
+    add_connection_args(arg)
+    arg.add_argument("--loglevel", help="Logging level (Defaults to INFO)",
+                     choices=[e for e in logging._nameToLevel.keys()], default="INFO", type=str)
+    arg.add_argument("--logdir", help="Log directory (Defaults to .)", type=str, default=".")
+    arg.add_argument("--spec", help="JSON sweep spec: option names mapped to a value, or to a list of values for an axis",
+                     type=str, required=True)
+    arg.add_argument("--store", help="Result store directory (Defaults to ./results)", type=str, default="results")
+    arg.add_argument("--seed", help="Seed of the randomized run order (Defaults to random)", type=int)
+    arg.add_argument("--resume", help="Skip cells completed by a previous sweep into the same store (Defaults to true)",
+                     action=argparse.BooleanOptionalAction, default=True)
+    arg.add_argument("--poolmax", help="Size of the shared connection pool (Defaults to the most workers of any cell plus one)",
+                     type=int)
+    args = arg.parse_args(argv)
+
+    os.makedirs(args.logdir, exist_ok=True)
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper(), logging.INFO),
+                        filename=os.path.abspath(os.path.join(args.logdir, SWEEPLOGFILE)), filemode='a',
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    spec: SweepSpec = SweepSpec.load(args.spec)
+    excluded: set[str] = SWEEP_EXCLUDED & (set(spec.axes) | set(spec.fixed))
+    if excluded:
+        raise ValueError(f"Invalid sweep options '{', '.join(sorted(excluded))}'.")
+    parser: argparse.ArgumentParser = get_parser()
+    cells: list[tuple[str, argparse.Namespace]] = []
+    for cell in spec.get_run_order(args.seed):
+        cell_args: argparse.Namespace = parser.parse_args(SweepSpec.to_argv(cell))
+        validate_args(cell_args)
+        cells.append((spec.get_cell_id(cell), cell_args))
+
+    store: ResultStore = ResultStore(args.store)
+    if not args.resume:
+        store.reset()
+    completed: set[str] = store.completed()
+    pending: list[tuple[str, argparse.Namespace]] = [(cell_id, a) for cell_id, a in cells if cell_id not in completed]
+    logging.info(f"Sweep of {len(cells)} cells into {store.root}, {len(cells) - len(pending)} already completed.")
+
+    load_dotenv()
+
+    db_factory: DBFactory = DBFactory(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        dbname=args.dbname
+    )
+    max_workers: int = max(a.workers for _, a in cells)
+    poolmax: int = args.poolmax if args.poolmax is not None else max_workers + 1
+    if poolmax < max_workers:
+        raise ValueError(f"The pool size must be at least the {max_workers} workers of the largest cell.")
+    db_factory.open_pool(minconn=min(max_workers, poolmax), maxconn=poolmax)
+    try:
+        for index, (cell_id, cell_args) in enumerate(pending, start=1):
+            logging.info(f"Running cell {index}/{len(pending)}: {cell_id}")
+            start: float = time.perf_counter()
+            run_cell(db_factory, store, cell_id, cell_args)
+            elapsed: float = time.perf_counter() - start
+            store.mark_done(cell_id, elapsed)
+            logging.info(f"Completed cell {cell_id} in {elapsed:.2f} seconds.")
+    finally:
+        db_factory.close_pool()
+
+def report(argv: list[str]) -> None:
+    """
+    Aggregate the raw metrics files of a metrics directory, or the cells of
+    a sweep result store, into one report, with a LaTeX comparison table of the throughput and p99 latency of every
+    operation. Options a run left out are reported with their defaults.
+    :param argv: The command line arguments after "report".
+    :type argv: list[str]
+    :return: None
+    :rtype: None
+    """
+    arg = argparse.ArgumentParser(prog="main.py report", description="Aggregate the metrics of PrimaryKey Tests.")
+    arg.add_argument("--loglevel", help="Logging level (Defaults to INFO)",
+                     choices=[e for e in logging._nameToLevel.keys()], default="INFO", type=str)
+    arg.add_argument("--metricsdir", help="Metrics directory or sweep result store to scan (Defaults to $PWD)",
+                     type=str, default=".")
+    arg.add_argument("--output", help="Output directory of the report (Defaults to --metricsdir)", type=str)
+    arg.add_argument("--jobs", help="Processes reading metrics files (Defaults to the number of CPUs)", type=int)
+    arg.add_argument("--cache", help="Reuse the summaries of unchanged files (Defaults to true)",
+                     action=argparse.BooleanOptionalAction, default=True)
+    args = arg.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper(), logging.INFO),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.jobs is not None and args.jobs < 1:
+        raise ValueError("The number of jobs must be at least 1.")
+
+    output: str = args.output if args.output is not None else args.metricsdir
+    os.makedirs(output, exist_ok=True)
+    defaults: dict[str, str] = {option: str(value) for option, value in vars(get_parser().parse_args([])).items()
+                                if value is not None}
+    summary: pd.DataFrame = build_report(args.metricsdir, jobs=args.jobs, cache=args.cache, defaults=defaults)
+    if summary.empty:
+        logging.warning(f"No metrics files found in {os.path.abspath(args.metricsdir)}.")
+        return
+    summary.to_csv(os.path.join(output, REPORTFILE), index=False)
+    for operation in summary["operation"].unique():
+        for metric, caption, scale, digits, higher_is_better in (
+            ("throughput", f"{operation.capitalize()} throughput (rows/s)", 1.0, 0, True),
+            ("p99", f"{operation.capitalize()} p99 latency (ms)", 1000.0, 2, False),
+        ):
+            table: str = to_latex_table(summary, operation, metric, caption, f"tab:{operation}-{metric}",
+                                        scale=scale, digits=digits, higher_is_better=higher_is_better)
+            with open(os.path.join(output, REPORTTABLE_TMPLT.format(operation=operation, metric=metric)), "w") as f:
+                f.write(table)
+    logging.info(f"Report of {len(summary)} rows written to {os.path.abspath(output)}.")
+
+def dataset(argv: list[str]) -> None:
+    """
+    Prepare pre-populated datasets: bulk-load a table per primary key type
+    and save it as a template database, so test runs with --dataset clone
+    it instead of starting from an empty table.
+    :param argv: The command line arguments after "dataset".
+    :type argv: list[str]
+    :return: None
+    :rtype: None
+    """
+    arg = argparse.ArgumentParser(prog="main.py dataset", description="Prepare pre-populated datasets for PrimaryKey Tests.")
+    add_connection_args(arg)
+    arg.add_argument("--loglevel", help="Logging level (Defaults to INFO)",
+                     choices=[e for e in logging._nameToLevel.keys()], default="INFO", type=str)
+    arg.add_argument("--pktype", help="Primary key types to prepare (Defaults to all)", nargs="+",
+                     choices=[e.value for e in DBPrimaryKeyType], type=str, default=[e.value for e in DBPrimaryKeyType])
+    arg.add_argument("--rows", help="Number of rows to load", type=int, required=True)
+    arg.add_argument("--loaders", help="Number of parallel COPY loaders (Defaults to 4)", type=int, default=4)
+    add_layout_args(arg)
+    args = arg.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper(), logging.INFO),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    load_dotenv()
+
+    db_factory: DBFactory = DBFactory(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        dbname=args.dbname
+    )
+    for pktype in args.pktype:
+        db_factory.prepare_dataset(DBPrimaryKeyType(pktype), args.rows, loaders=args.loaders, layout=get_layout(args))
+
+def run_cell(db_factory: DBFactory, store: ResultStore, cell_id: str, args: argparse.Namespace) -> None:
+    """
+    Run one configuration of a sweep and write its results to the store.
+    :param db_factory: The shared database factory.
+    :type db_factory: DBFactory
+    :param store: The result store.
+    :type store: ResultStore
+    :param cell_id: The identifier of the cell.
+    :type cell_id: str
+    :param args: The parsed options of the cell.
+    :type args: argparse.Namespace
+    :return: None
+    :rtype: None
+    """
+    sink: MetricsSink | None = None
+    if args.raw:
+        sink = get_metrics_sink(store.get_path("metrics", cell_id, temporary=True), MetricsFormat.PARQUET)
+    tester: TestPrimaryKey = create_tester(args, db_factory, sink)
+    try:
+        tester.run_test()
+    finally:
+        if sink is not None:
+            sink.close()
+    if sink is not None:
+        store.publish("metrics", cell_id)
+    store.write("summary", cell_id, tester.get_summary())
+    store.write("timeseries", cell_id, tester.get_timeseries())
+    if args.serverstats:
+        store.write("serverstats", cell_id, tester.get_server_stats())
+    if args.analyze:
+        store.write("layout", cell_id, tester.get_layout_stats())
+    if args.repetitions > 1:
+        store.write("repetitions", cell_id, tester.get_repetition_stats())
+
+def add_layout_args(arg: argparse.ArgumentParser) -> None:
+    """
+    Add the table layout options shared by test runs and dataset preparation.
+    :param arg: The parser to extend.
+    :type arg: argparse.ArgumentParser
+    :return: None
+    :rtype: None
+    """
+    arg.add_argument("--partitioning", help="Partition the table by insertion time (range) or by primary key (hash) (Defaults to none)",
+                     choices=[e.value for e in DBPartitioning], type=str, default=DBPartitioning.NONE.value)
+    arg.add_argument("--partitions", help="Number of partitions (Defaults to 8)", type=int, default=8)
+    arg.add_argument("--partition-interval", help="Seconds of inserts per range partition (Defaults to 10)",
+                     type=float, default=10.0)
+
+def get_layout(args: argparse.Namespace) -> DBTableLayout:
+    """
+    Build the table layout from the parsed options.
+    :param args: The parsed options.
+    :type args: argparse.Namespace
+    :return: The table layout
+    :rtype: DBTableLayout
+    """
+    return DBTableLayout(DBPartitioning(args.partitioning), args.partitions, args.partition_interval)
+
+def add_connection_args(arg: argparse.ArgumentParser) -> None:
     arg.add_argument("--host", help="Database host (Defaults to $DB_HOST or localhost)", type=str)
     arg.add_argument("--port", help="Database port (Defaults to $DB_PORT or 5432)", type=int)
     arg.add_argument("--user", help="Database user (Defaults to $DB_USER or postgres)", type=str)
     arg.add_argument("--password", help="Database password (Defaults to $DB_PASSWORD or password)", type=str)
     arg.add_argument("--dbname", help="Database name (Defaults to $DB_NAME or testdb)", type=str)
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line parser of a single test run.
+    :return: The argument parser
+    :rtype: argparse.ArgumentParser
+    """
+    arg = argparse.ArgumentParser(description="Run PrimaryKey Test using the specified configuration.",
+                                  epilog="Run 'main.py sweep --help' to run a matrix of configurations in one process, "
+                                  "'main.py report --help' to aggregate the metrics of many runs, "
+                                  "or 'main.py dataset --help' to prepare pre-populated tables.")
+    add_connection_args(arg)
     arg.add_argument("--loglevel", help="Logging level (Defaults to INFO)",
                      choices=[e for e in logging._nameToLevel.keys()], default="INFO", type=str)
     arg.add_argument("--logdir", help="Log directory (Defaults to .)", type=str, default=".")
     arg.add_argument("--pktype", help="Primary key type to test",
                      choices=[e.value for e in DBPrimaryKeyType], type=str, default=DBPrimaryKeyType.BIGINT.value)
-    arg.add_argument("--workers", help="Number of worker threads (Defaults to 1)",
-                     choices=[1, 2, 4, 8, 16], type=int, default=1)
+    arg.add_argument("--workers", help="Number of workers (Defaults to 1)",
+                     choices=[1, 2, 4, 8, 16, 32, 64, 128, 256, 512], type=int, default=1)
+    arg.add_argument("--engine", help="Load engine driving the workers (Defaults to thread)",
+                     choices=[e.value for e in TestEngine], type=str, default=TestEngine.THREAD.value)
+    arg.add_argument("--pipeline-depth", help="Batches in flight per connection with the pipeline engine (Defaults to 8)",
+                     type=int, default=8)
     arg.add_argument("--batchsize", help="Batch size for operations (Defaults to 1)",
                      choices=[1, 2, 10, 25, 50, 100, 250, 500, 1000], type=int, default=1)
+    arg.add_argument("--insertmode", help="How the insert phase sends rows (Defaults to values)",
+                     choices=[e.value for e in DBInsertMode], type=str, default=DBInsertMode.VALUES.value)
+    arg.add_argument("--keygen", help="Where primary keys are generated: server defaults with RETURNING, or client-side explicit ids (Defaults to server)",
+                     choices=[e.value for e in DBKeyGeneration], type=str, default=DBKeyGeneration.SERVER.value)
+    arg.add_argument("--statements", help="Statement family: one placeholder per key, or one array parameter (Defaults to literal)",
+                     choices=[e.value for e in DBStatementFamily], type=str, default=DBStatementFamily.LITERAL.value)
+    arg.add_argument("--prepared", help="Use server-side prepared statements (Defaults to false)",
+                     action=argparse.BooleanOptionalAction, default=False)
+    arg.add_argument("--plancachemode", help="plan_cache_mode for prepared statements (Defaults to the server setting)",
+                     choices=[e.value for e in DBPlanCacheMode], type=str)
+    arg.add_argument("--poolmax", help="Use a connection pool of at most this many connections (Defaults to no pool)",
+                     type=int)
+    arg.add_argument("--poolmin", help="Connections opened when the pool is created (Defaults to --workers)",
+                     type=int)
+    arg.add_argument("--mix", help="Interleave operations with this mix instead of running phases, "
+                     "e.g. select=50,insert=30,update=15,delete=5 or a preset: " + ", ".join(WorkloadMix.PRESETS) +
+                     " (ycsb-e reads with range scans once --scanlength is set)",
+                     type=WorkloadMix.parse)
+    arg.add_argument("--target-rate", help="Run open-loop at this total rate in rows/s, measuring latency from the "
+                     "intended start of every batch (Defaults to closed-loop)", type=float)
     arg.add_argument("--operations", help="Number of operations to perform (Defaults to 1000)",
                      type=int, default=1000)
+    arg.add_argument("--warmup", help="Rows of untimed warmup batches run by the workers before the timed phases, "
+                     "split like the operations (Defaults to 0)", type=int, default=0)
+    arg.add_argument("--repetitions", help="Run the test this many times, each on a fresh table (Defaults to 1)",
+                     type=int, default=1)
+    arg.add_argument("--precision", help="Stop repeating once the confidence interval of the throughput of every "
+                     "operation is within this fraction of its mean, e.g. 0.02 (Defaults to all repetitions)", type=float)
+    arg.add_argument("--confidence", help="Confidence level of the repetition statistics (Defaults to 0.95)",
+                     type=float, default=0.95)
     arg.add_argument("--metricsdir", help=f"Metrics output directory (defaults to $PWD)", type=str, default=".")
-    
-    args = arg.parse_args(sys.argv[1:])
-
-    os.makedirs(args.logdir, exist_ok=True)
-    log_path = get_log_path(args.logdir, args.pktype, args.workers, args.batchsize, args.operations)
-    logging.basicConfig(level=getattr(logging, args.loglevel.upper(), logging.INFO),
-                        filename=log_path, filemode='w',
-                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    arg.add_argument("--metricsformat", help="Metrics output file format (Defaults to csv)",
+                     choices=[e.value for e in MetricsFormat], type=str, default=MetricsFormat.CSV.value)
+    arg.add_argument("--chunksize", help="Samples buffered per worker before they are flushed to disk (Defaults to 65536)",
+                     type=int, default=65536)
+    arg.add_argument("--interval", help="Window of the throughput time series in seconds (Defaults to 1)",
+                     type=float, default=1.0)
+    arg.add_argument("--progress", help="Show a live progress line on stderr (Defaults to true on a terminal)",
+                     action=argparse.BooleanOptionalAction, default=sys.stderr.isatty())
+    arg.add_argument("--serverstats", help="Capture server statistics around every phase (Defaults to false)",
+                     action=argparse.BooleanOptionalAction, default=False)
+    arg.add_argument("--analyze", help="Analyze table and index layout after the inserts and after the deletes (Defaults to false)",
+                     action=argparse.BooleanOptionalAction, default=False)
+    arg.add_argument("--dataset", help="Clone the test database from the dataset of this many rows prepared by "
+                     "'main.py dataset' (Defaults to an empty table)", type=int)
+    arg.add_argument("--raw", help="Write raw per-batch samples in addition to the summary (Defaults to true)",
+                     action=argparse.BooleanOptionalAction, default=True)
+    arg.add_argument("--children", help="Number of child tables with a foreign key to the test table, adding the "
+                     "fkinsert, join and cascade operations (Defaults to 0)", type=int, default=0)
+    arg.add_argument("--scanlength", help="Rows per range scan, adding the scan (keyset pagination in key order) and "
+                     "recent (highest keys) operations (Defaults to no scans)", type=int)
+    arg.add_argument("--scanbuffers", help="Measure the shared buffers hit and read by every range scan (Defaults to true)",
+                     action=argparse.BooleanOptionalAction, default=True)
+    add_layout_args(arg)
+    return arg
 
+def validate_args(args: argparse.Namespace) -> None:
+    """
+    Check the options of a test run that the parser cannot check on its own.
+    :param args: The parsed options.
+    :type args: argparse.Namespace
+    :return: None
+    :rtype: None
+    """
     if args.operations < (args.batchsize * args.workers):
         raise ValueError("The number of operations must be greater than or equal to the batch size.")
     if (args.operations % (args.batchsize * args.workers)) != 0:
         raise ValueError("The number of operations must be a multiple of the batch size.")
+    if args.chunksize < 1:
+        raise ValueError("The chunk size must be at least 1.")
+    if args.interval <= 0:
+        raise ValueError("The interval must be greater than 0.")
+    if args.target_rate is not None and args.target_rate <= 0:
+        raise ValueError("The target rate must be greater than 0.")
+    layout: DBTableLayout = get_layout(args)
+    if args.children < 0:
+        raise ValueError("The number of child tables must be at least 0.")
+    if args.children > 0 and layout.partitioning == DBPartitioning.RANGE:
+        raise ValueError("Child tables cannot reference a table partitioned by range.")
+    if args.scanlength is not None and args.scanlength < 1:
+        raise ValueError("The scan length must be at least 1.")
+    if args.warmup < 0 or (args.warmup % (args.batchsize * args.workers)) != 0:
+        raise ValueError("The number of warmup rows must be a non-negative multiple of the batch size.")
+    if args.repetitions < 1:
+        raise ValueError("The number of repetitions must be at least 1.")
+    if args.precision is not None and (args.precision <= 0 or args.repetitions < TestPrimaryKey.MIN_REPETITIONS):
+        raise ValueError(f"The precision must be greater than 0, with at least {TestPrimaryKey.MIN_REPETITIONS} repetitions.")
+    if not 0 < args.confidence < 1:
+        raise ValueError("The confidence must be between 0 and 1.")
+    if args.poolmax is not None and args.poolmax < args.workers:
+        raise ValueError("The pool size must be at least the number of workers.")
+    if args.pipeline_depth < 1:
+        raise ValueError("The pipeline depth must be at least 1.")
+    if args.engine == TestEngine.PIPELINE.value:
+        if args.insertmode != DBInsertMode.VALUES.value:
+            raise ValueError(f"The insert mode '{args.insertmode}' cannot be pipelined.")
+        if args.scanlength is not None:
+            raise ValueError("Range scans cannot be pipelined.")
+    capacity: int | None = get_strategy(DBPrimaryKeyType(args.pktype)).capacity
+    if args.keygen == DBKeyGeneration.CLIENT.value and capacity is not None:
+        # A mix loads its rows before inserting up to as many again.
+        keys: int = args.operations * (2 if args.mix is not None else 1) + args.warmup
+        if keys > capacity:
+            raise ValueError(f"The {keys} client-side keys do not fit in the {capacity} keys of '{args.pktype}'.")
+    if args.mix is not None:
+        operations: list[DBOperation] = TestPrimaryKey.TestPrimaryKeyWorkerBase.get_operations(
+            args.children, args.scanlength is not None)
+        unsupported: list[str] = [op.value for op, weight in args.mix.weights.items() if weight > 0 and op not in operations]
+        if unsupported:
+            raise ValueError(f"The operations '{', '.join(unsupported)}' of the mix are not available with "
+                             f"{args.children} child tables and scan length {args.scanlength}.")
 
-    os.makedirs(args.metricsdir, exist_ok=True)
-    metrics_path = get_metrics_path(args.metricsdir, args.pktype, args.workers, args.batchsize, args.operations)
-    logging.info(f"Metrics will be written to: {metrics_path}")
-
-    load_dotenv()
-
-    db_factory: DBFactory = DBFactory(
-        host=args.host,
-        port=args.port,
-        user=args.user,
-        password=args.password,
-        dbname=args.dbname
-    )
-    tester: TestPrimaryKey = TestPrimaryKey(
+def create_tester(args: argparse.Namespace, db_factory: DBFactory, sink: MetricsSink | None) -> TestPrimaryKey:
+    """
+    Create the test of a run from its parsed options.
+    :param args: The parsed options.
+    :type args: argparse.Namespace
+    :param db_factory: The database factory.
+    :type db_factory: DBFactory
+    :param sink: Optional sink for the raw samples.
+    :type sink: MetricsSink | None
+    :return: The configured test
+    :rtype: TestPrimaryKey
+    """
+    return TestPrimaryKey(
         dbfactory=db_factory,
         pktype=DBPrimaryKeyType(args.pktype),
         workers=args.workers,
         batchsize=args.batchsize,
-        operations=args.operations
+        operations=args.operations,
+        sink=sink,
+        chunksize=args.chunksize,
+        raw=args.raw,
+        engine=TestEngine(args.engine),
+        depth=args.pipeline_depth,
+        warmup=args.warmup,
+        repetitions=args.repetitions,
+        precision=args.precision,
+        confidence=args.confidence,
+        insertmode=DBInsertMode(args.insertmode),
+        family=DBStatementFamily(args.statements),
+        keygen=DBKeyGeneration(args.keygen),
+        mix=args.mix.with_scans() if args.mix is not None and args.scanlength is not None else args.mix,
+        target_rate=args.target_rate,
+        interval=args.interval,
+        progress=args.progress,
+        serverstats=args.serverstats,
+        analyze=args.analyze,
+        dataset=args.dataset,
+        layout=get_layout(args),
+        children=args.children,
+        scan_length=args.scanlength,
+        scanbuffers=args.scanbuffers,
+        prepared=args.prepared,
+        plancachemode=DBPlanCacheMode(args.plancachemode) if args.plancachemode is not None else None
+    )
+
+def get_run_options(args: argparse.Namespace) -> str:
+    """
+    Name the RUN_OPTIONS of a test run that differ from their defaults, as
+    the file name suffix of its outputs, e.g. "_engine=process_keygen=client".
+    Values are quoted, underscores included, so report.py can parse them.
+    :param args: The parsed options.
+    :type args: argparse.Namespace
+    :return: The file name suffix, empty for the defaults
+    :rtype: str
+    """
+    defaults: argparse.Namespace = get_parser().parse_args([])
+    return "".join(
+        f"_{option.replace('_', '-')}={quote(str(getattr(args, option)), safe='').replace('_', '%5F')}"
+        for option in RUN_OPTIONS if getattr(args, option) != getattr(defaults, option)
     )
-    results: pd.DataFrame = tester.run_test()
-    results.to_csv(metrics_path, index=False)
 
-def get_metrics_path(metrics_dir: str, pktype: str, workers: int, batchsize: int, operations: int):
+def get_metrics_path(metrics_dir: str, pktype: str, workers: int, batchsize: int, operations: int,
+                     metrics_format: MetricsFormat = MetricsFormat.CSV, options: str = ""):
     metrics_file: str = METRICFILE_TMPLT.format(
         pktype=pktype,
         workers=workers,
         batchsize=batchsize,
-        operations=operations
+        operations=operations,
+        options=options,
+        format=metrics_format.value
     )
     metrics_path: str = os.path.abspath(os.path.join(metrics_dir, metrics_file))
     return metrics_path
 
-def get_log_path(log_dir: str, pktype: str,  workers: int, batchsize: int, operations: int) -> str:
+def get_summary_path(metrics_dir: str, pktype: str, workers: int, batchsize: int, operations: int,
+                     options: str = "") -> str:
+    summary_file: str = SUMMARYFILE_TMPLT.format(
+        pktype=pktype,
+        workers=workers,
+        batchsize=batchsize,
+        operations=operations,
+        options=options
+    )
+    summary_path: str = os.path.abspath(os.path.join(metrics_dir, summary_file))
+    return summary_path
+
+def get_timeseries_path(metrics_dir: str, pktype: str, workers: int, batchsize: int, operations: int,
+                        options: str = "") -> str:
+    timeseries_file: str = TIMESERIESFILE_TMPLT.format(
+        pktype=pktype,
+        workers=workers,
+        batchsize=batchsize,
+        operations=operations,
+        options=options
+    )
+    timeseries_path: str = os.path.abspath(os.path.join(metrics_dir, timeseries_file))
+    return timeseries_path
+
+def get_serverstats_path(metrics_dir: str, pktype: str, workers: int, batchsize: int, operations: int,
+                         options: str = "") -> str:
+    serverstats_file: str = SERVERSTATSFILE_TMPLT.format(
+        pktype=pktype,
+        workers=workers,
+        batchsize=batchsize,
+        operations=operations,
+        options=options
+    )
+    serverstats_path: str = os.path.abspath(os.path.join(metrics_dir, serverstats_file))
+    return serverstats_path
+
+def get_layout_path(metrics_dir: str, pktype: str, workers: int, batchsize: int, operations: int,
+                    options: str = "") -> str:
+    layout_file: str = LAYOUTFILE_TMPLT.format(
+        pktype=pktype,
+        workers=workers,
+        batchsize=batchsize,
+        operations=operations,
+        options=options
+    )
+    layout_path: str = os.path.abspath(os.path.join(metrics_dir, layout_file))
+    return layout_path
+
+def get_repetitions_path(metrics_dir: str, pktype: str, workers: int, batchsize: int, operations: int,
+                         options: str = "") -> str:
+    repetitions_file: str = REPETITIONSFILE_TMPLT.format(
+        pktype=pktype,
+        workers=workers,
+        batchsize=batchsize,
+        operations=operations,
+        options=options
+    )
+    repetitions_path: str = os.path.abspath(os.path.join(metrics_dir, repetitions_file))
+    return repetitions_path
+
+def get_log_path(log_dir: str, pktype: str,  workers: int, batchsize: int, operations: int, options: str = "") -> str:
     log_file: str = LOGFILE_TMPLT.format(
         pktype=pktype,
         workers=workers,
         batchsize=batchsize,
-        operations=operations
+        operations=operations,
+        options=options
     )
     log_path: str = os.path.abspath(os.path.join(log_dir, log_file))
     return log_path
@@ -0,0 +1,636 @@
+import enum
+import logging
+import math
+import numpy as np
+import pandas as pd
+
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any
+
+from dbfactory import DBOperation
+from histogram import LatencyHistogram
+
+
+class MetricsFormat(enum.Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+class MetricsSink(ABC):
+    """
+    Thread-safe, append-only writer for metric chunks.
+
+    Chunks are written as soon as they are received, so the samples of an
+    interrupted run that were already flushed remain on disk.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Initialize a metrics sink.
+
+        :param path: The path of the output file.
+        :type path: str
+        """
+        self.path = path
+        self.rows: int = 0
+        self._lock: Lock = Lock()
+        self._closed: bool = False
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """
+        Append a chunk of samples to the output file.
+
+        :param chunk: The samples to append.
+        :type chunk: pd.DataFrame
+        """
+        if chunk.empty:
+            return
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"Metrics sink '{self.path}' is closed.")
+            self._write(chunk)
+            self.rows += len(chunk)
+            logging.debug(f"Wrote {len(chunk)} samples to '{self.path}'.")
+
+    def close(self) -> None:
+        """
+        Flush and close the output file.
+        """
+        with self._lock:
+            if not self._closed:
+                self._close()
+                self._closed = True
+                logging.info(f"Wrote {self.rows} samples to '{self.path}'.")
+
+    @abstractmethod
+    def _write(self, chunk: pd.DataFrame) -> None:
+        pass
+
+    @abstractmethod
+    def _close(self) -> None:
+        pass
+
+    def __enter__(self) -> "MetricsSink":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class CSVMetricsSink(MetricsSink):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._file = open(path, "w", newline="")
+        self._header: bool = True
+
+    def _write(self, chunk: pd.DataFrame) -> None:
+        chunk.to_csv(self._file, header=self._header, index=False)
+        self._file.flush()
+        self._header = False
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class ParquetMetricsSink(MetricsSink):
+    """
+    Writes every chunk as a Parquet row group. The footer is only written on
+    close, so prefer the Arrow format when runs may be interrupted.
+    """
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._writer: Any = None
+
+    def _write(self, chunk: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class ArrowMetricsSink(MetricsSink):
+    """
+    Writes chunks as record batches of an Arrow IPC stream. A truncated stream
+    can still be read up to the last complete batch.
+    """
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._file = open(path, "wb")
+        self._writer: Any = None
+
+    def _write(self, chunk: pd.DataFrame) -> None:
+        import pyarrow as pa
+
+        batch = pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = pa.ipc.new_stream(self._file, batch.schema)
+        self._writer.write_batch(batch)
+        self._file.flush()
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._file.close()
+
+
+class QueueMetricsSink(MetricsSink):
+    """
+    Forwards chunks to a multiprocessing queue, so worker processes can stream
+    samples to the sink owned by the parent process.
+    """
+    def __init__(self, messages: Any) -> None:
+        super().__init__("<queue>")
+        self._messages = messages
+
+    def _write(self, chunk: pd.DataFrame) -> None:
+        self._messages.put(("chunk", chunk))
+
+    def _close(self) -> None:
+        pass
+
+
+def get_metrics_sink(path: str, metrics_format: MetricsFormat) -> MetricsSink:
+    """
+    Create a metrics sink for the specified output format.
+
+    :param path: The path of the output file.
+    :type path: str
+    :param metrics_format: The output file format.
+    :type metrics_format: MetricsFormat
+    :return: A new metrics sink.
+    :rtype: MetricsSink
+    """
+    if metrics_format == MetricsFormat.CSV:
+        return CSVMetricsSink(path)
+    elif metrics_format == MetricsFormat.PARQUET:
+        return ParquetMetricsSink(path)
+    elif metrics_format == MetricsFormat.ARROW:
+        return ArrowMetricsSink(path)
+    raise ValueError(f"Invalid metrics format '{metrics_format}'.")
+
+
+def read_metrics(path: str) -> pd.DataFrame:
+    """
+    Read a metrics file written by a MetricsSink.
+
+    :param path: The path of the metrics file.
+    :type path: str
+    :return: DataFrame with all samples in the file.
+    :rtype: pd.DataFrame
+    """
+    if path.endswith(f".{MetricsFormat.PARQUET.value}"):
+        return pd.read_parquet(path)
+    elif path.endswith(f".{MetricsFormat.ARROW.value}"):
+        import pyarrow as pa
+
+        with open(path, "rb") as f:
+            return pa.ipc.open_stream(f).read_pandas()
+    return pd.read_csv(path)
+
+
+class OperationStats:
+    """
+    Latency histogram and throughput counters for one operation, and the
+    shared buffers hit and read by the batches whose buffers were measured.
+    """
+    PERCENTILES: dict[str, float] = {"p50": 50.0, "p90": 90.0, "p99": 99.0, "p999": 99.9}
+
+    def __init__(self, digits: int = 2) -> None:
+        self.histogram: LatencyHistogram = LatencyHistogram(digits=digits)
+        self.prepare_time: float = 0.0
+        self.blks_hit: int = 0
+        self.blks_read: int = 0
+        self.buffer_batches: int = 0
+        self.rows: int = 0
+        self.start: float = math.inf
+        self.end: float = -math.inf
+
+    def record(self, batchsize: int, start: float, end: float) -> None:
+        self.histogram.record(end - start)
+        self.rows += batchsize
+        if start < self.start:
+            self.start = start
+        if end > self.end:
+            self.end = end
+
+    def record_buffers(self, blks_hit: int, blks_read: int) -> None:
+        self.blks_hit += blks_hit
+        self.blks_read += blks_read
+        self.buffer_batches += 1
+
+    def merge(self, other: "OperationStats") -> None:
+        self.histogram.merge(other.histogram)
+        self.prepare_time += other.prepare_time
+        self.blks_hit += other.blks_hit
+        self.blks_read += other.blks_read
+        self.buffer_batches += other.buffer_batches
+        self.rows += other.rows
+        self.start = min(self.start, other.start)
+        self.end = max(self.end, other.end)
+
+    def elapsed(self) -> float:
+        return self.end - self.start if self.rows else 0.0
+
+    def throughput(self) -> float:
+        elapsed: float = self.elapsed()
+        return self.rows / elapsed if elapsed > 0 else math.nan
+
+
+class IntervalCounters:
+    """
+    Fixed-window counters of one worker, for throughput time series.
+
+    Every batch adds to the counters of the window containing its end time,
+    so recording is a handful of array increments. Latencies are counted in
+    power-of-two buckets: bucket b holds latencies below 2^b microseconds,
+    and the last bucket is open-ended. Counters with the same interval and
+    origin can be merged by adding them.
+    """
+    OPERATIONS: list[DBOperation] = list(DBOperation)
+    OPERATION_CODES: dict[DBOperation, int] = {op: code for code, op in enumerate(OPERATIONS)}
+    BUCKETS: int = 32
+
+    def __init__(self, interval: float = 1.0, origin: float = 0.0, capacity: int = 64) -> None:
+        """
+        Initialize interval counters.
+
+        :param interval: The window length in seconds.
+        :type interval: float
+        :param origin: The start of the first window, from time.perf_counter().
+        :type origin: float
+        :param capacity: The number of windows to preallocate.
+        :type capacity: int
+        """
+        if interval <= 0:
+            raise ValueError(f"Invalid interval '{interval}'.")
+        self.interval = interval
+        self.origin = origin
+        self.windows: int = 0
+        capacity = max(capacity, 1)
+        self._batches: np.ndarray = np.zeros((capacity, len(self.OPERATIONS)), dtype=np.int64)
+        self._rows: np.ndarray = np.zeros((capacity, len(self.OPERATIONS)), dtype=np.int64)
+        self._duration: np.ndarray = np.zeros((capacity, len(self.OPERATIONS)), dtype=np.float64)
+        self._buckets: np.ndarray = np.zeros((capacity, len(self.OPERATIONS), self.BUCKETS), dtype=np.int64)
+
+    def record(self, operation: DBOperation, batchsize: int, end: float, duration: float) -> None:
+        """
+        Count a single timed batch.
+
+        :param operation: The operation that was timed.
+        :type operation: DBOperation
+        :param batchsize: The number of rows in the batch.
+        :type batchsize: int
+        :param end: The end time of the batch, from time.perf_counter().
+        :type end: float
+        :param duration: The latency of the batch in seconds.
+        :type duration: float
+        """
+        window: int = max(int((end - self.origin) / self.interval), 0)
+        if window >= len(self._batches):
+            self._grow(window + 1)
+        code: int = self.OPERATION_CODES[operation]
+        self._batches[window, code] += 1
+        self._rows[window, code] += batchsize
+        self._duration[window, code] += duration
+        self._buckets[window, code, min(int(duration * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+        if window >= self.windows:
+            self.windows = window + 1
+
+    def _grow(self, required: int) -> None:
+        capacity: int = max(required, len(self._batches) * 2)
+        self._batches = np.resize(self._batches, (capacity, len(self.OPERATIONS)))
+        self._batches[self.windows:] = 0
+        self._rows = np.resize(self._rows, (capacity, len(self.OPERATIONS)))
+        self._rows[self.windows:] = 0
+        self._duration = np.resize(self._duration, (capacity, len(self.OPERATIONS)))
+        self._duration[self.windows:] = 0
+        self._buckets = np.resize(self._buckets, (capacity, len(self.OPERATIONS), self.BUCKETS))
+        self._buckets[self.windows:] = 0
+
+    def merge(self, other: "IntervalCounters") -> None:
+        """
+        Add the counters of another worker.
+
+        :param other: The counters to merge. They must use the same interval and origin.
+        :type other: IntervalCounters
+        """
+        if other.interval != self.interval or other.origin != self.origin:
+            raise ValueError("Cannot merge interval counters with different windows.")
+        if other.windows > len(self._batches):
+            self._grow(other.windows)
+        n: int = other.windows
+        self._batches[:n] += other._batches[:n]
+        self._rows[:n] += other._rows[:n]
+        self._duration[:n] += other._duration[:n]
+        self._buckets[:n] += other._buckets[:n]
+        self.windows = max(self.windows, n)
+
+    def rows(self) -> int:
+        return int(self._rows[:self.windows].sum())
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Build the time series of the counted windows.
+
+        :return: DataFrame with one row per window and operation. time is the
+            start of the window in seconds since the origin, throughput is in
+            rows per second and the percentiles are bucket upper bounds in seconds.
+        :rtype: pd.DataFrame
+        """
+        windows, codes = np.nonzero(self._batches[:self.windows])
+        batches: np.ndarray = self._batches[windows, codes]
+        cumulative: np.ndarray = np.cumsum(self._buckets[windows, codes], axis=1)
+        edges: np.ndarray = np.exp2(np.arange(self.BUCKETS)) / 1e6
+        names: np.ndarray = np.array([op.value for op in self.OPERATIONS], dtype=object)
+        series: dict[str, Any] = {
+            "time": windows * self.interval,
+            "operation": names[codes],
+            "batches": batches,
+            "rows": self._rows[windows, codes],
+            "throughput": self._rows[windows, codes] / self.interval,
+            "mean": self._duration[windows, codes] / batches,
+        }
+        for name, percentile in (("p50", 50.0), ("p99", 99.0)):
+            rank: np.ndarray = np.maximum(np.ceil(percentile / 100 * batches), 1)
+            series[name] = edges[(cumulative < rank[:, None]).sum(axis=1)]
+        return pd.DataFrame(series)
+
+
+def merge_stats(stats: list[dict[DBOperation, OperationStats]]) -> dict[DBOperation, OperationStats]:
+    """
+    Merge per-worker operation statistics.
+
+    :param stats: The operation statistics of every worker.
+    :type stats: list[dict[DBOperation, OperationStats]]
+    :return: The merged statistics per operation.
+    :rtype: dict[DBOperation, OperationStats]
+    """
+    merged: dict[DBOperation, OperationStats] = {}
+    for worker_stats in stats:
+        for operation, op_stats in worker_stats.items():
+            if operation not in merged:
+                merged[operation] = OperationStats(digits=op_stats.histogram.digits)
+            merged[operation].merge(op_stats)
+    return merged
+
+
+def summarize_stats(stats: dict[DBOperation, OperationStats]) -> pd.DataFrame:
+    """
+    Summarize operation statistics into latency percentiles and throughput.
+
+    :param stats: The statistics per operation.
+    :type stats: dict[DBOperation, OperationStats]
+    :return: DataFrame with one row per operation. Latencies are per batch, in seconds.
+        The prepare column is the total time spent preparing statements, summed over workers.
+        Operations whose buffers were measured add the mean shared buffers hit and read per batch.
+    :rtype: pd.DataFrame
+    """
+    rows: list[dict[str, Any]] = []
+    for operation, op_stats in stats.items():
+        histogram: LatencyHistogram = op_stats.histogram
+        if histogram.total == 0:
+            continue
+        row: dict[str, Any] = {
+            "operation": operation.value,
+            "batches": histogram.total,
+            "rows": op_stats.rows,
+            "mean": histogram.mean(),
+        }
+        for name, percentile in OperationStats.PERCENTILES.items():
+            row[name] = histogram.percentile(percentile)
+        row["max"] = histogram.max
+        row["prepare"] = op_stats.prepare_time
+        row["elapsed"] = op_stats.elapsed()
+        row["throughput"] = op_stats.throughput()
+        if op_stats.buffer_batches:
+            row["blks_hit"] = op_stats.blks_hit / op_stats.buffer_batches
+            row["blks_read"] = op_stats.blks_read / op_stats.buffer_batches
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+REPETITION_METRICS: list[str] = ["throughput", "mean", "p50", "p99"]
+OUTLIER_SCORE: float = 3.5
+# Below these counts the median absolute deviation is too unstable to reject
+# values, and a bootstrap interval of the remaining values is too narrow.
+OUTLIER_MIN_VALUES: int = 5
+INTERVAL_MIN_VALUES: int = 3
+
+
+def find_outliers(values: np.ndarray) -> np.ndarray:
+    """
+    Flag outlying values by their modified z-score, from the median and the
+    median absolute deviation, which a single outlier cannot inflate the way
+    it inflates the mean and standard deviation. Needs at least
+    OUTLIER_MIN_VALUES values, fewer are never flagged.
+
+    :param values: The values, e.g. the throughput of every repetition.
+    :type values: np.ndarray
+    :return: A boolean mask of the outliers.
+    :rtype: np.ndarray
+    """
+    if len(values) < OUTLIER_MIN_VALUES:
+        return np.zeros(len(values), dtype=bool)
+    median: float = float(np.median(values))
+    mad: float = float(np.median(np.abs(values - median)))
+    if mad == 0:
+        return np.zeros(len(values), dtype=bool)
+    return 0.6745 * np.abs(values - median) / mad > OUTLIER_SCORE
+
+
+def summarize_repetitions(summaries: pd.DataFrame,
+                          metrics: list[str] | None = None,
+                          confidence: float = 0.95,
+                          resamples: int = 10000,
+                          seed: int | None = 0) -> pd.DataFrame:
+    """
+    Summarize the repetitions of one configuration per operation and metric.
+
+    Outlying repetitions (see find_outliers()) are counted and excluded. The
+    mean and standard deviation are taken over the remaining repetitions,
+    with a percentile bootstrap confidence interval of the mean, which does
+    not assume the metric to be normally distributed. The relative half
+    width of the interval is the precision reached. Without at least
+    INTERVAL_MIN_VALUES remaining repetitions there is no interval and no
+    precision.
+
+    :param summaries: The summaries of the repetitions, see summarize_stats().
+    :type summaries: pd.DataFrame
+    :param metrics: The summary columns to summarize, defaults to REPETITION_METRICS.
+    :type metrics: list[str] | None
+    :param confidence: The confidence level of the intervals.
+    :type confidence: float
+    :param resamples: The number of bootstrap resamples.
+    :type resamples: int
+    :param seed: Optional seed of the bootstrap.
+    :type seed: int | None
+    :return: DataFrame with one row per operation and metric.
+    :rtype: pd.DataFrame
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    alpha: float = 1.0 - confidence
+    rows: list[dict[str, Any]] = []
+    for operation, group in summaries.groupby("operation", sort=False):
+        for metric in metrics if metrics is not None else REPETITION_METRICS:
+            values: np.ndarray = group[metric].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            outliers: np.ndarray = find_outliers(values)
+            kept: np.ndarray = values[~outliers]
+            row: dict[str, Any] = {
+                "operation": operation,
+                "metric": metric,
+                "repetitions": len(values),
+                "outliers": int(outliers.sum()),
+                "mean": kept.mean() if len(kept) else math.nan,
+                "std": kept.std(ddof=1) if len(kept) > 1 else math.nan,
+                "ci_lo": math.nan,
+                "ci_hi": math.nan,
+            }
+            if len(kept) >= INTERVAL_MIN_VALUES:
+                means: np.ndarray = rng.choice(kept, size=(resamples, len(kept))).mean(axis=1)
+                row["ci_lo"], row["ci_hi"] = np.quantile(means, [alpha / 2, 1 - alpha / 2])
+            row["precision"] = (row["ci_hi"] - row["ci_lo"]) / 2 / abs(row["mean"]) if row["mean"] else math.nan
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class MetricRecorder:
+    """
+    Array-backed recorder for per-batch worker metrics.
+
+    Samples are written into preallocated NumPy buffers so recording a sample
+    is a constant-time store with no allocation. The DataFrame is only built
+    once, when the worker has finished. When a sink is given, the buffers are
+    used as a bounded chunk that is flushed to the sink whenever it fills up.
+    Every sample also updates a latency histogram for its operation, so
+    percentiles remain available when raw samples are disabled, and the
+    interval counters of the window it ended in. With a repetition, the
+    samples are tagged with it in a leading repetition column.
+    """
+    OPERATIONS: list[DBOperation] = list(DBOperation)
+    OPERATION_CODES: dict[DBOperation, int] = {op: code for code, op in enumerate(OPERATIONS)}
+
+    def __init__(self,
+                 workerid: int,
+                 capacity: int,
+                 sink: MetricsSink | None = None,
+                 raw: bool = True,
+                 digits: int = 2,
+                 interval: float = 1.0,
+                 origin: float = 0.0,
+                 repetition: int | None = None) -> None:
+        """
+        Initialize a metric recorder.
+
+        :param workerid: The id of the worker owning this recorder.
+        :type workerid: int
+        :param capacity: The number of samples to preallocate.
+        :type capacity: int
+        :param sink: Optional sink receiving a chunk each time the buffers are full.
+        :type sink: MetricsSink | None
+        :param raw: Whether to keep raw samples in addition to the histograms.
+        :type raw: bool
+        :param digits: The number of significant digits of the latency histograms.
+        :type digits: int
+        :param interval: The window length of the interval counters in seconds.
+        :type interval: float
+        :param origin: The start of the first window, from time.perf_counter().
+        :type origin: float
+        :param repetition: Optional repetition of the test the samples belong to.
+        :type repetition: int | None
+        """
+        if raw and capacity < 1:
+            raise ValueError(f"Invalid capacity '{capacity}'.")
+        self.workerid = workerid
+        self.repetition = repetition
+        self.sink = sink
+        self.raw = raw
+        self.stats: dict[DBOperation, OperationStats] = {
+            op: OperationStats(digits=digits) for op in self.OPERATIONS
+        }
+        self.series: IntervalCounters = IntervalCounters(interval=interval, origin=origin)
+        capacity = capacity if raw else 0
+        self._size: int = 0
+        self._operation: np.ndarray = np.empty(capacity, dtype=np.int8)
+        self._batchsize: np.ndarray = np.empty(capacity, dtype=np.int32)
+        self._duration: np.ndarray = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._duration)
+
+    def record(self, operation: DBOperation, batchsize: int, start: float, end: float) -> None:
+        """
+        Record a single timed batch.
+
+        :param operation: The operation that was timed.
+        :type operation: DBOperation
+        :param batchsize: The number of rows in the batch.
+        :type batchsize: int
+        :param start: The start time of the batch, from time.perf_counter().
+        :type start: float
+        :param end: The end time of the batch, from time.perf_counter().
+        :type end: float
+        """
+        self.stats[operation].record(batchsize, start, end)
+        self.series.record(operation, batchsize, end, end - start)
+        if not self.raw:
+            return
+        i = self._size
+        if i == len(self._duration):
+            if self.sink is not None:
+                self.flush()
+                i = 0
+            else:
+                self._grow()
+        self._operation[i] = self.OPERATION_CODES[operation]
+        self._batchsize[i] = batchsize
+        self._duration[i] = end - start
+        self._size = i + 1
+
+    def _grow(self) -> None:
+        capacity: int = len(self._duration) * 2
+        self._operation = np.resize(self._operation, capacity)
+        self._batchsize = np.resize(self._batchsize, capacity)
+        self._duration = np.resize(self._duration, capacity)
+
+    def flush(self) -> None:
+        """
+        Write the buffered samples to the sink and empty the buffers.
+        """
+        if self.sink is None:
+            raise ValueError("Metric recorder has no sink.")
+        if not self.raw:
+            return
+        self.sink.write(self.to_dataframe())
+        self._size = 0
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Build a DataFrame from the buffered samples.
+
+        :return: DataFrame with one row per recorded batch.
+        :rtype: pd.DataFrame
+        """
+        n: int = self._size
+        names: np.ndarray = np.array([op.value for op in self.OPERATIONS], dtype=object)
+        df: pd.DataFrame = pd.DataFrame({
+            "workerid": np.full(n, self.workerid, dtype=np.int32),
+            "operation": names[self._operation[:n]],
+            "batchsize": self._batchsize[:n].copy(),
+            "duration": self._duration[:n].copy(),
+        })
+        if self.repetition is not None:
+            df.insert(0, "repetition", np.full(n, self.repetition, dtype=np.int32))
+        return df
@@ -0,0 +1,272 @@
+import enum
+
+from typing import Any, Callable
+
+from keygen import (HashKeyGenerator, KeyGenerator, SequenceKeyGenerator, SnowflakeKeyGenerator, TenantKeyGenerator,
+                    ULIDKeyGenerator, UUIDv4KeyGenerator, UUIDv7KeyGenerator)
+from keystore import BigIntKeyStore, CompositeKeyStore, KeyStore, UUIDBytesKeyStore, UUIDKeyStore, UUIDTextKeyStore
+
+
+class DBPrimaryKeyType(enum.Enum):
+    BIGINT = "bigint"
+    UUIDV4 = "uuidv4"
+    UUIDV7 = "uuidv7"
+    INT4IDENTITY = "int4identity"
+    INT8IDENTITY = "int8identity"
+    ULID = "ulid"
+    UUIDBYTEA = "uuidbytea"
+    UUIDTEXT = "uuidtext"
+    HASHID = "hashid"
+    COMPOSITE = "composite"
+
+
+# Bytes of key and data per row, identical for every strategy so only the
+# layout of the key differs between candidates.
+ROW_WIDTH: int = 252
+
+COPY_TEXT_ENCODERS: dict[str, Callable[[Any], str]] = {
+    "bytea": lambda value: "\\\\x" + bytes(value).hex(),
+}
+COPY_BINARY_ENCODERS: dict[str, Callable[[Any], bytes]] = {
+    "integer": lambda value: value.to_bytes(4, "big", signed=True),
+    "bigint": lambda value: value.to_bytes(8, "big", signed=True),
+    "uuid": lambda value: value.bytes,
+    "bytea": bytes,
+    "text": lambda value: str(value).encode("ascii"),
+}
+
+
+class KeyColumn:
+    """
+    One column of a primary key.
+    """
+    def __init__(self, name: str, sql_type: str, definition: str) -> None:
+        """
+        Initialize a key column.
+
+        :param name: The column name.
+        :type name: str
+        :param sql_type: The SQL type used in casts, e.g. "bigint".
+        :type sql_type: str
+        :param definition: The column type and default, formatted with {table_name}.
+        :type definition: str
+        """
+        self.name: str = name
+        self.sql_type: str = sql_type
+        self.definition: str = definition
+
+
+class PrimaryKeyStrategy:
+    """
+    Everything that is specific to one primary key candidate: the key
+    columns with their DDL and server-side defaults, the client-side key
+    generator, the KeyStore codec of the keys returned to a worker and the
+    width of the key, from which the padding of the data column is derived.
+
+    Single-column keys are passed as plain values, composite keys as tuples
+    with one value per column.
+    """
+    def __init__(self,
+                 columns: list[KeyColumn],
+                 width: int,
+                 generator: Callable[[int, int], KeyGenerator],
+                 store: type[KeyStore],
+                 setup: str = "",
+                 finish: str = "",
+                 capacity: int | None = None) -> None:
+        """
+        Initialize a primary key strategy.
+
+        :param columns: The key columns, in index order.
+        :type columns: list[KeyColumn]
+        :param width: The stored width of the key in bytes, including varlena headers and alignment.
+        :type width: int
+        :param generator: Factory of the client-side key generator, given the node id and the number of nodes.
+        :type generator: Callable[[int, int], KeyGenerator]
+        :param store: The KeyStore class holding the keys.
+        :type store: type[KeyStore]
+        :param setup: Optional statements run before the table is created, formatted with {table_name}.
+        :type setup: str
+        :param finish: Optional statements run after the table is created, formatted with {table_name}.
+        :type finish: str
+        :param capacity: The number of client-side keys that fit in the key, or None if practically unbounded.
+        :type capacity: int | None
+        """
+        if not columns or width <= 0 or width >= ROW_WIDTH:
+            raise ValueError(f"Invalid primary key strategy with width {width}.")
+        self.columns: list[KeyColumn] = columns
+        self.width: int = width
+        self.generator: Callable[[int, int], KeyGenerator] = generator
+        self.store: type[KeyStore] = store
+        self.setup: str = setup
+        self.finish: str = finish
+        self.capacity: int | None = capacity
+        self.composite: bool = len(columns) > 1
+
+    @property
+    def char_length(self) -> int:
+        return ROW_WIDTH - self.width
+
+    @property
+    def names(self) -> list[str]:
+        return [column.name for column in self.columns]
+
+    @property
+    def key_type(self) -> str:
+        return ", ".join(column.sql_type for column in self.columns)
+
+    def get_column_definitions(self, table_name: str, extra_columns: list[str] | None = None) -> str:
+        """
+        Return the key column definitions of the CREATE TABLE statement.
+        A single key column carries the PRIMARY KEY constraint itself,
+        unless other columns, such as a partition key, extend the key.
+        """
+        definitions: list[str] = [f"{c.name} {c.definition.format(table_name=table_name)}" for c in self.columns]
+        if not self.composite and not extra_columns:
+            return definitions[0] + " PRIMARY KEY"
+        return ",\n    ".join(definitions)
+
+    def get_table_constraint(self, extra_columns: list[str] | None = None) -> str:
+        columns: list[str] = self.names + (extra_columns or [])
+        return f",\n    PRIMARY KEY ({', '.join(columns)})" if len(columns) > 1 else ""
+
+    def get_column_list(self) -> str:
+        return ", ".join(self.names)
+
+    def get_key_expression(self) -> str:
+        return f"({self.get_column_list()})" if self.composite else self.columns[0].name
+
+    def get_placeholder(self) -> str:
+        return "(" + ", ".join(["%s"] * len(self.columns)) + ")" if self.composite else "%s"
+
+    def get_array_source(self) -> str:
+        return ", ".join(f"%s::{column.sql_type}[]" for column in self.columns)
+
+    def get_array_predicate(self) -> str:
+        """
+        Return the predicate matching the keys of one array parameter per key
+        column.
+        """
+        if self.composite:
+            return f"{self.get_key_expression()} IN (SELECT * FROM unnest({self.get_array_source()}))"
+        return f"{self.columns[0].name} = ANY({self.get_array_source()})"
+
+    def create_generator(self, node: int = 0, nodes: int = SequenceKeyGenerator.NODES) -> KeyGenerator:
+        return self.generator(node, nodes)
+
+    def create_store(self, capacity: int = 1024, seed: int | None = None) -> KeyStore:
+        return self.store(capacity, seed)
+
+    def to_params(self, keys: list[Any]) -> list[Any]:
+        """
+        Flatten keys to the parameters of the key placeholders.
+        """
+        if self.composite:
+            return [value for key in keys for value in key]
+        return keys
+
+    def to_arrays(self, keys: list[Any]) -> list[Any]:
+        """
+        Split keys into the array parameters of get_array_source().
+        """
+        if self.composite:
+            return [list(values) for values in zip(*keys)] if keys else [[] for _ in self.columns]
+        return [keys]
+
+    def from_rows(self, rows: list[Any]) -> list[Any]:
+        """
+        Extract the keys from the rows returned by an insert.
+        """
+        if self.composite:
+            n: int = len(self.columns)
+            return [tuple(row[i] for i in range(n)) for row in rows]
+        return [row[0] for row in rows]
+
+    def get_copy_text(self, key: Any) -> str:
+        """
+        Return the key fields of one row in the COPY text format, each
+        followed by a tab.
+        """
+        values: tuple[Any, ...] = key if self.composite else (key,)
+        return "".join(COPY_TEXT_ENCODERS.get(c.sql_type, str)(v) + "\t" for c, v in zip(self.columns, values))
+
+    def get_copy_binary(self, key: Any) -> bytes:
+        """
+        Return the key fields of one row in the COPY binary format, each
+        preceded by its length.
+        """
+        values: tuple[Any, ...] = key if self.composite else (key,)
+        fields: list[bytes] = [COPY_BINARY_ENCODERS[c.sql_type](v) for c, v in zip(self.columns, values)]
+        return b"".join(len(field).to_bytes(4, "big") + field for field in fields)
+
+
+STRATEGIES: dict[DBPrimaryKeyType, PrimaryKeyStrategy] = {}
+
+
+def register_strategy(table_type: DBPrimaryKeyType, strategy: PrimaryKeyStrategy) -> None:
+    """
+    Register the strategy of a primary key type.
+
+    :param table_type: The type of primary key for the table.
+    :type table_type: DBPrimaryKeyType
+    :param strategy: The strategy of the type.
+    :type strategy: PrimaryKeyStrategy
+    """
+    STRATEGIES[table_type] = strategy
+
+
+def get_strategy(table_type: DBPrimaryKeyType) -> PrimaryKeyStrategy:
+    """
+    Return the strategy of a primary key type.
+
+    :param table_type: The type of primary key for the table.
+    :type table_type: DBPrimaryKeyType
+    :return: The registered strategy.
+    :rtype: PrimaryKeyStrategy
+    """
+    strategy: PrimaryKeyStrategy | None = STRATEGIES.get(table_type)
+    if strategy is None:
+        raise ValueError(f"Invalid table type '{table_type}'.")
+    return strategy
+
+
+# Client-side integer keys start in the upper half of the integer range,
+# far above the ids of the server-side sequence.
+INT4_CLIENT_START: int = 1 << 30
+INT4_LIMIT: int = 1 << 31
+
+# A ULID in a uuid column: the 48-bit millisecond timestamp overlaid on a
+# random UUID, whose version and variant bits remain set.
+ULID_DEFAULT: str = ("encode(overlay(uuid_send(gen_random_uuid()) placing "
+                     "substring(int8send((extract(epoch from clock_timestamp()) * 1000)::bigint) from 3) "
+                     "from 1 for 6), 'hex')::uuid")
+
+register_strategy(DBPrimaryKeyType.BIGINT, PrimaryKeyStrategy(
+    [KeyColumn("id", "bigint", "BIGSERIAL")], 8, lambda node, nodes: SnowflakeKeyGenerator(node), BigIntKeyStore))
+register_strategy(DBPrimaryKeyType.UUIDV4, PrimaryKeyStrategy(
+    [KeyColumn("id", "uuid", "UUID DEFAULT gen_random_uuid()")], 16, lambda node, nodes: UUIDv4KeyGenerator(), UUIDKeyStore))
+register_strategy(DBPrimaryKeyType.UUIDV7, PrimaryKeyStrategy(
+    [KeyColumn("id", "uuid", "UUID DEFAULT uuidv7()")], 16, lambda node, nodes: UUIDv7KeyGenerator(), UUIDKeyStore))
+register_strategy(DBPrimaryKeyType.INT4IDENTITY, PrimaryKeyStrategy(
+    [KeyColumn("id", "integer", "INTEGER GENERATED BY DEFAULT AS IDENTITY")], 4,
+    lambda node, nodes: SequenceKeyGenerator(node, nodes, start=INT4_CLIENT_START, stop=INT4_LIMIT), BigIntKeyStore,
+    capacity=INT4_LIMIT - INT4_CLIENT_START))
+register_strategy(DBPrimaryKeyType.INT8IDENTITY, PrimaryKeyStrategy(
+    [KeyColumn("id", "bigint", "BIGINT GENERATED BY DEFAULT AS IDENTITY")], 8, SequenceKeyGenerator, BigIntKeyStore))
+register_strategy(DBPrimaryKeyType.ULID, PrimaryKeyStrategy(
+    [KeyColumn("id", "uuid", f"UUID DEFAULT {ULID_DEFAULT}")], 16, lambda node, nodes: ULIDKeyGenerator(), UUIDKeyStore))
+register_strategy(DBPrimaryKeyType.UUIDBYTEA, PrimaryKeyStrategy(
+    [KeyColumn("id", "bytea", "BYTEA DEFAULT uuid_send(gen_random_uuid())")], 17,
+    lambda node, nodes: UUIDv4KeyGenerator(), UUIDBytesKeyStore))
+register_strategy(DBPrimaryKeyType.UUIDTEXT, PrimaryKeyStrategy(
+    [KeyColumn("id", "text", "TEXT DEFAULT gen_random_uuid()::text")], 37,
+    lambda node, nodes: UUIDv4KeyGenerator(), UUIDTextKeyStore))
+register_strategy(DBPrimaryKeyType.HASHID, PrimaryKeyStrategy(
+    [KeyColumn("id", "bigint", "BIGINT DEFAULT hashint8extended(nextval('{table_name}_id_seq'), 0)")], 8,
+    lambda node, nodes: HashKeyGenerator(node), BigIntKeyStore,
+    setup="CREATE SEQUENCE IF NOT EXISTS {table_name}_id_seq;",
+    finish="ALTER SEQUENCE {table_name}_id_seq OWNED BY {table_name}.id;"))
+# The bigint id is aligned to 8 bytes after the integer tenant_id.
+register_strategy(DBPrimaryKeyType.COMPOSITE, PrimaryKeyStrategy(
+    [KeyColumn("tenant_id", "integer", f"INTEGER NOT NULL DEFAULT floor(random() * {TenantKeyGenerator.TENANTS})::integer"),
+     KeyColumn("id", "bigint", "BIGINT GENERATED BY DEFAULT AS IDENTITY")], 16, TenantKeyGenerator, CompositeKeyStore))
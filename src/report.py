@@ -0,0 +1,275 @@
+import logging
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+from urllib.parse import unquote
+
+from metrics import MetricsFormat, read_metrics
+from sweep import ResultStore
+
+METRICS_PATTERN: re.Pattern = re.compile(
+    r"^(?P<pktype>.+?)_(?P<workers>\d+)_(?P<batchsize>\d+)_(?P<operations>\d+)(?P<options>(?:_[a-z-]+=[^_]+)*)\.(?P<format>"
+    + "|".join(e.value for e in MetricsFormat) + r")$"
+)
+OPTION_PATTERN: re.Pattern = re.compile(r"_(?P<option>[a-z-]+)=(?P<value>[^_]+)")
+CONFIG_COLUMNS: list[str] = ["pktype", "workers", "batchsize", "operations"]
+FILE_COLUMNS: list[str] = ["file", "size", "mtime_ns"]
+CACHE_FILE: str = ".report_cache.parquet"
+Z_95: float = 1.959963984540054
+QUANTILES: dict[str, float] = {"p50": 0.50, "p90": 0.90, "p99": 0.99}
+
+
+def scan_metrics(metrics_dir: str) -> Iterator[tuple[str, os.stat_result, dict[str, str]]]:
+    """
+    Find the raw metrics files of single runs (METRICFILE_TMPLT in main.py).
+    The run options in a file name, see get_run_options() in main.py, are
+    added to its configuration under their option names.
+
+    :param metrics_dir: The metrics directory.
+    :type metrics_dir: str
+    :return: The path, stat result and configuration of every metrics file.
+    :rtype: Iterator[tuple[str, os.stat_result, dict[str, str]]]
+    """
+    with os.scandir(metrics_dir) as entries:
+        for entry in entries:
+            match: re.Match | None = METRICS_PATTERN.match(entry.name)
+            if match is not None and entry.is_file():
+                config: dict[str, str] = {c: match[c] for c in CONFIG_COLUMNS}
+                for option in OPTION_PATTERN.finditer(match["options"]):
+                    config[option["option"].replace("-", "_")] = unquote(option["value"])
+                yield entry.path, entry.stat(), config
+
+
+def scan_store(store_root: str) -> Iterator[tuple[str, os.stat_result, dict[str, str]]]:
+    """
+    Find the raw metrics of every cell of a sweep result store (ResultStore
+    in sweep.py). The configuration of a cell is read from its partition
+    path, completed by the configuration columns of its summary table.
+
+    :param store_root: The root directory of the store.
+    :type store_root: str
+    :return: The path, stat result and configuration of every metrics file.
+    :rtype: Iterator[tuple[str, os.stat_result, dict[str, str]]]
+    """
+    metrics_root: str = os.path.join(store_root, "metrics")
+    for directory, _, files in os.walk(metrics_root):
+        if ResultStore.PART_FILE not in files:
+            continue
+        cell_id: str = os.path.relpath(directory, metrics_root)
+        config: dict[str, str] = dict(part.split("=", 1) for part in cell_id.split(os.sep))
+        config = {option: unquote(value) for option, value in config.items()}
+        missing: list[str] = [c for c in CONFIG_COLUMNS if c not in config]
+        if missing:
+            summary_path: str = os.path.join(store_root, "summary", cell_id, ResultStore.PART_FILE)
+            if not os.path.exists(summary_path):
+                logging.warning(f"Skipping cell '{cell_id}' without a summary.")
+                continue
+            first: pd.Series = pd.read_parquet(summary_path, columns=missing).iloc[0]
+            config.update({c: str(first[c]) for c in missing})
+        path: str = os.path.join(directory, ResultStore.PART_FILE)
+        yield path, os.stat(path), config
+
+
+def summarize_samples(samples: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarize raw samples per operation with 95% confidence intervals.
+
+    The interval of the mean latency uses the normal approximation and the
+    intervals of the percentiles are distribution-free, from the order
+    statistics around the percentile rank. Throughput is rows per second of
+    the busiest worker, summing the durations of its batches.
+
+    :param samples: Raw samples with operation, workerid, batchsize and duration columns.
+    :type samples: pd.DataFrame
+    :return: DataFrame with one row per operation.
+    :rtype: pd.DataFrame
+    """
+    codes, names = pd.factorize(samples["operation"], sort=True)
+    duration: np.ndarray = samples["duration"].to_numpy(dtype=np.float64)
+    batches: np.ndarray = np.bincount(codes, minlength=len(names))
+    total: np.ndarray = np.bincount(codes, weights=duration, minlength=len(names))
+    squares: np.ndarray = np.bincount(codes, weights=duration * duration, minlength=len(names))
+    mean: np.ndarray = total / batches
+    variance: np.ndarray = np.maximum(squares - batches * mean * mean, 0) / np.maximum(batches - 1, 1)
+    half: np.ndarray = Z_95 * np.sqrt(variance / batches)
+    busy: pd.Series = samples.groupby([codes, samples["workerid"].to_numpy()])["duration"].sum().groupby(level=0).max()
+    rows: np.ndarray = np.bincount(codes, weights=samples["batchsize"].to_numpy(), minlength=len(names))
+
+    ordered: np.ndarray = duration[np.lexsort((duration, codes))]
+    starts: np.ndarray = np.concatenate(([0], np.cumsum(batches)[:-1]))
+
+    def order_statistic(rank: np.ndarray) -> np.ndarray:
+        return ordered[starts + np.clip(rank, 1, batches).astype(np.int64) - 1]
+
+    summary: dict[str, np.ndarray] = {
+        "operation": np.asarray(names, dtype=object),
+        "batches": batches,
+        "rows": rows.astype(np.int64),
+        "elapsed": busy.to_numpy(),
+        "throughput": rows / busy.to_numpy(),
+        "mean": mean,
+        "mean_lo": mean - half,
+        "mean_hi": mean + half,
+    }
+    for name, q in QUANTILES.items():
+        spread: np.ndarray = Z_95 * np.sqrt(batches * q * (1 - q))
+        summary[name] = order_statistic(np.ceil(batches * q))
+        summary[f"{name}_lo"] = order_statistic(np.floor(batches * q - spread))
+        summary[f"{name}_hi"] = order_statistic(np.ceil(batches * q + spread))
+    summary["max"] = order_statistic(batches)
+    return pd.DataFrame(summary)
+
+
+def summarize_file(path: str) -> pd.DataFrame:
+    """
+    Read and summarize one raw metrics file.
+
+    :param path: The path of the metrics file.
+    :type path: str
+    :return: The summary of the file, see summarize_samples().
+    :rtype: pd.DataFrame
+    """
+    return summarize_samples(read_metrics(path))
+
+
+def build_report(metrics_dir: str, jobs: int | None = None, cache: bool = True,
+                 defaults: dict[str, str] | None = None) -> pd.DataFrame:
+    """
+    Summarize every metrics file in a directory, or every cell of a sweep
+    result store, in parallel processes. Options other than CONFIG_COLUMNS,
+    e.g. the engine of a sweep axis or of a file name, are added as columns,
+    holding the given default for the runs that left them out, or empty.
+
+    The summaries are cached next to the metrics, keyed by file path, size
+    and modification time, so only new or changed files are read again.
+
+    :param metrics_dir: The metrics directory or the root of a result store.
+    :type metrics_dir: str
+    :param jobs: The number of processes, defaults to the number of CPUs.
+    :type jobs: int | None
+    :param cache: Whether to read and update the summary cache.
+    :type cache: bool
+    :param defaults: Optional default values of the options, by option name.
+    :type defaults: dict[str, str] | None
+    :return: DataFrame with one row per configuration and operation.
+    :rtype: pd.DataFrame
+    """
+    cache_path: str = os.path.join(metrics_dir, CACHE_FILE)
+    store: bool = os.path.exists(os.path.join(metrics_dir, ResultStore.CHECKPOINT_FILE))
+    files: list[tuple[str, os.stat_result, dict[str, str]]] = sorted(
+        scan_store(metrics_dir) if store else scan_metrics(metrics_dir), key=lambda f: f[0])
+    cached: pd.DataFrame = pd.read_parquet(cache_path) if cache and os.path.exists(cache_path) else pd.DataFrame()
+    keys: set[tuple[str, int, int]] = set(zip(*(cached[c] for c in FILE_COLUMNS))) if not cached.empty else set()
+    fresh: list[tuple[str, os.stat_result, dict[str, str]]] = [
+        f for f in files if (os.path.relpath(f[0], metrics_dir), f[1].st_size, f[1].st_mtime_ns) not in keys
+    ]
+    logging.info(f"Summarizing {len(fresh)} of {len(files)} metrics files, {len(files) - len(fresh)} cached.")
+
+    paths: list[str] = [path for path, _, _ in fresh]
+    if len(paths) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            summaries: list[pd.DataFrame] = list(executor.map(summarize_file, paths))
+    else:
+        summaries = [summarize_file(path) for path in paths]
+    for (path, stat, config), summary in zip(fresh, summaries):
+        for i, column in enumerate(CONFIG_COLUMNS):
+            summary.insert(i, column, config[column] if column == "pktype" else int(config[column]))
+        for i, option in enumerate(o for o in config if o not in CONFIG_COLUMNS):
+            summary.insert(len(CONFIG_COLUMNS) + i, option, config[option])
+        summary.insert(0, "mtime_ns", stat.st_mtime_ns)
+        summary.insert(0, "size", stat.st_size)
+        summary.insert(0, "file", os.path.relpath(path, metrics_dir))
+
+    # A rewritten file keeps its name, so only rows matching its current size
+    # and modification time are still valid.
+    current: set[tuple[str, int, int]] = {
+        (os.path.relpath(path, metrics_dir), stat.st_size, stat.st_mtime_ns) for path, stat, _ in files
+    }
+    kept: list[pd.DataFrame] = [
+        cached[[key in current for key in zip(*(cached[c] for c in FILE_COLUMNS))]]
+    ] if not cached.empty else []
+    report: pd.DataFrame = pd.concat(kept + summaries, ignore_index=True) if kept or summaries else pd.DataFrame()
+    if cache and summaries:
+        report.to_parquet(cache_path, index=False)
+    if report.empty:
+        return report
+    options: list[str] = list(dict.fromkeys(o for _, _, config in files for o in config if o not in CONFIG_COLUMNS))
+    columns: list[str] = CONFIG_COLUMNS + options
+    report = report[columns + [c for c in report.columns if c not in columns + FILE_COLUMNS]]
+    for option in options:
+        if defaults is not None and option in defaults:
+            report[option] = report[option].fillna(defaults[option])
+    return report.sort_values(columns + ["operation"], na_position="first", ignore_index=True)
+
+
+def escape_latex(text: str) -> str:
+    """
+    Escape the LaTeX special characters of an option name or value.
+
+    :param text: The text to escape.
+    :type text: str
+    :return: The escaped text.
+    :rtype: str
+    """
+    return re.sub(r"([_%&#$])", r"\\\1", text)
+
+
+def to_latex_table(report: pd.DataFrame, operation: str, metric: str, caption: str, label: str,
+                   scale: float = 1.0, digits: int = 1, higher_is_better: bool = True) -> str:
+    """
+    Format one metric of one operation as a booktabs table comparing the
+    primary key types, one row per workers and batch size, with the best
+    value of every row in bold. Other configuration columns and options
+    that differ between the runs, e.g. the engine, lead the row labels, so
+    runs of different configurations never share a cell.
+
+    :param report: The report from build_report().
+    :type report: pd.DataFrame
+    :param operation: The operation to tabulate.
+    :type operation: str
+    :param metric: The report column to tabulate.
+    :type metric: str
+    :param caption: The table caption.
+    :type caption: str
+    :param label: The table label.
+    :type label: str
+    :param scale: Factor applied to the values, e.g. 1000 for milliseconds.
+    :type scale: float
+    :param digits: The number of decimals.
+    :type digits: int
+    :param higher_is_better: Whether the highest value of a row is the best.
+    :type higher_is_better: bool
+    :return: The LaTeX source of the table.
+    :rtype: str
+    """
+    rows: pd.DataFrame = report[report["operation"] == operation]
+    options: list[str] = [
+        c for c in report.columns[:report.columns.get_loc("operation")]
+        if c not in ("pktype", "workers", "batchsize") and rows[c].nunique(dropna=False) > 1
+    ]
+    rows = rows.assign(**{c: rows[c].fillna("--").astype(str) for c in options})
+    table: pd.DataFrame = rows.pivot_table(index=options + ["workers", "batchsize"], columns="pktype", values=metric,
+                                           aggfunc="mean") * scale
+    best: pd.Series = table.max(axis=1) if higher_is_better else table.min(axis=1)
+    lines: list[str] = [
+        "\\begin{table}",
+        f"  \\caption{{{caption}}}",
+        f"  \\label{{{label}}}",
+        "  \\begin{tabular}{" + "l" * len(options) + "rr" + "r" * len(table.columns) + "}",
+        "    \\toprule",
+        "    " + " & ".join([escape_latex(o) for o in options] + ["Workers", "Batch"] + [str(c) for c in table.columns])
+        + " \\\\",
+        "    \\midrule",
+    ]
+    for key, values in table.iterrows():
+        cells: list[str] = [escape_latex(str(level)) for level in key]
+        for value in values:
+            cell: str = "--" if pd.isna(value) else f"{value:,.{digits}f}".replace(",", "{,}")
+            cells.append(f"\\textbf{{{cell}}}" if value == best[key] else cell)
+        lines.append("    " + " & ".join(cells) + " \\\\")
+    lines += ["    \\bottomrule", "  \\end{tabular}", "\\end{table}", ""]
+    return "\n".join(lines)
@@ -0,0 +1,238 @@
+import datetime
+import itertools
+import json
+import os
+import random
+import pandas as pd
+
+from typing import Any
+from urllib.parse import quote
+
+
+class SweepSpec:
+    """
+    Matrix of test configurations.
+
+    A spec maps command line options (without the leading dashes) to values.
+    Options with a list of values are the axes of the matrix, every other
+    option is fixed, e.g.
+    {"pktype": ["bigint", "uuidv7"], "workers": [1, 4], "batchsize": [10], "operations": 8000}.
+    """
+    def __init__(self, matrix: dict[str, Any]) -> None:
+        """
+        Initialize a sweep spec.
+
+        :param matrix: The option values, lists for the axes of the matrix.
+        :type matrix: dict[str, Any]
+        """
+        self.axes: dict[str, list[Any]] = {k: v for k, v in matrix.items() if isinstance(v, list)}
+        self.fixed: dict[str, Any] = {k: v for k, v in matrix.items() if not isinstance(v, list)}
+        if not self.axes or any(len(values) == 0 for values in self.axes.values()):
+            raise ValueError(f"Invalid sweep matrix '{matrix}'.")
+
+    @staticmethod
+    def load(path: str) -> "SweepSpec":
+        """
+        Load a sweep spec from a JSON file.
+
+        :param path: The path of the spec file.
+        :type path: str
+        :return: The loaded spec.
+        :rtype: SweepSpec
+        """
+        with open(path) as f:
+            matrix: Any = json.load(f)
+        if not isinstance(matrix, dict):
+            raise ValueError(f"Invalid sweep spec '{path}'.")
+        return SweepSpec(matrix)
+
+    def cells(self) -> list[dict[str, Any]]:
+        """
+        Expand the matrix into the options of every configuration.
+
+        :return: The options of each cell, in matrix order.
+        :rtype: list[dict[str, Any]]
+        """
+        return [{**self.fixed, **dict(zip(self.axes, values))} for values in itertools.product(*self.axes.values())]
+
+    def get_cell_id(self, cell: dict[str, Any]) -> str:
+        """
+        Build the identifier of a cell, which is also its partition path in
+        the result store, e.g. "operations=8000/pktype=bigint/workers=4".
+        The fixed options are part of it, so a store resumed with different
+        fixed options runs its cells again instead of skipping cells
+        measured under other settings.
+
+        :param cell: The options of the cell.
+        :type cell: dict[str, Any]
+        :return: The cell identifier.
+        :rtype: str
+        """
+        return "/".join(f"{option}={quote(str(cell[option]), safe='')}" for option in [*self.fixed, *self.axes])
+
+    @staticmethod
+    def to_argv(cell: dict[str, Any]) -> list[str]:
+        """
+        Convert the options of a cell to command line arguments, so they are
+        parsed and validated exactly like a single run.
+
+        :param cell: The options of the cell.
+        :type cell: dict[str, Any]
+        :return: The command line arguments.
+        :rtype: list[str]
+        """
+        argv: list[str] = []
+        for option, value in cell.items():
+            flag: str = "--" + option.replace("_", "-")
+            if isinstance(value, bool):
+                argv.append(flag if value else "--no-" + flag[2:])
+            elif value is not None:
+                argv.extend([flag, str(value)])
+        return argv
+
+    def get_run_order(self, seed: int | None = None) -> list[dict[str, Any]]:
+        """
+        Shuffle the cells, so slow drift of the machine (caches, vacuum,
+        storage wear) does not line up with one axis of the matrix.
+
+        :param seed: Optional seed of the shuffle.
+        :type seed: int | None
+        :return: The cells in run order.
+        :rtype: list[dict[str, Any]]
+        """
+        cells: list[dict[str, Any]] = self.cells()
+        random.Random(seed).shuffle(cells)
+        return cells
+
+
+class ResultStore:
+    """
+    Consolidated, Hive-partitioned Parquet store for the results of a sweep.
+
+    Every table (summary, timeseries, ...) is a dataset directory with one
+    file per cell under the cell's partition path. Completed cells are
+    appended to a checkpoint file once all their tables are written, so an
+    interrupted sweep resumes with the first incomplete cell.
+    """
+    CHECKPOINT_FILE: str = "_checkpoint.jsonl"
+    PART_FILE: str = "part-0.parquet"
+
+    def __init__(self, root: str) -> None:
+        """
+        Initialize a result store.
+
+        :param root: The root directory of the store.
+        :type root: str
+        """
+        self.root: str = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.root, self.CHECKPOINT_FILE)
+
+    def get_path(self, table: str, cell_id: str, temporary: bool = False) -> str:
+        """
+        Return the file of a table for a cell, creating its partition directory.
+        The temporary file is hidden from readers until it is published.
+
+        :param table: The table name.
+        :type table: str
+        :param cell_id: The cell identifier.
+        :type cell_id: str
+        :param temporary: Whether to return the path to write to before publishing.
+        :type temporary: bool
+        :return: The path of the Parquet file.
+        :rtype: str
+        """
+        directory: str = os.path.join(self.root, table, cell_id)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, "." + self.PART_FILE if temporary else self.PART_FILE)
+
+    def publish(self, table: str, cell_id: str) -> None:
+        """
+        Atomically replace the file of a table for a cell with its temporary file.
+
+        :param table: The table name.
+        :type table: str
+        :param cell_id: The cell identifier.
+        :type cell_id: str
+        """
+        os.replace(self.get_path(table, cell_id, temporary=True), self.get_path(table, cell_id))
+
+    def write(self, table: str, cell_id: str, df: pd.DataFrame) -> None:
+        """
+        Write the rows of a table for a cell, replacing any earlier attempt.
+        Columns that are partition keys of the cell are dropped, as they are
+        restored from the path when the table is read.
+
+        :param table: The table name.
+        :type table: str
+        :param cell_id: The cell identifier.
+        :type cell_id: str
+        :param df: The rows to write.
+        :type df: pd.DataFrame
+        """
+        partitions: list[str] = [part.split("=", 1)[0] for part in cell_id.split("/")]
+        df = df.drop(columns=[c for c in partitions if c in df.columns])
+        df.to_parquet(self.get_path(table, cell_id, temporary=True), index=False)
+        self.publish(table, cell_id)
+
+    def read(self, table: str) -> pd.DataFrame:
+        """
+        Read a table across all cells.
+
+        :param table: The table name.
+        :type table: str
+        :return: The rows of every cell, with the partition keys as columns.
+        :rtype: pd.DataFrame
+        """
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(os.path.join(self.root, table), format="parquet", partitioning="hive")
+        return dataset.to_table().to_pandas()
+
+    def completed(self) -> set[str]:
+        """
+        Return the identifiers of the cells recorded in the checkpoint.
+
+        :return: The completed cells.
+        :rtype: set[str]
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+        done: set[str] = set()
+        with open(self.checkpoint_path) as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["cell"])
+                except (ValueError, KeyError):
+                    # A line torn by preemption; the cell is run again.
+                    continue
+        return done
+
+    def mark_done(self, cell_id: str, elapsed: float) -> None:
+        """
+        Record a completed cell in the checkpoint.
+
+        :param cell_id: The cell identifier.
+        :type cell_id: str
+        :param elapsed: The run time of the cell in seconds.
+        :type elapsed: float
+        """
+        entry: dict[str, Any] = {
+            "cell": cell_id,
+            "elapsed": elapsed,
+            "finished": datetime.datetime.now(datetime.timezone.utc).isoformat()
+        }
+        with open(self.checkpoint_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self) -> None:
+        """
+        Forget all completed cells, so the next sweep runs every cell again.
+        """
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
@@ -1,170 +1,1230 @@
+import asyncio
+import enum
+import io
 import logging
-import random
+import math
+import multiprocessing
+import queue
+import sys
+import threading
 import time
+import numpy as np
 import pandas as pd
 
+from collections import deque
 from threading import Thread
-from typing import Any
+from typing import Any, Callable, Iterator
+
+from dbfactory import (DBFactory, DBInsertMode, DBKeyGeneration, DBOperation, DBParamStyle, DBPipeline, DBPlanCacheMode,
+                       DBPrimaryKeyType, DBStatementCache, DBStatementFamily, DBTableLayout)
+from keygen import KeyGenerator
+from keystore import KeyStore
+from metrics import (IntervalCounters, MetricRecorder, MetricsSink, OperationStats, QueueMetricsSink, merge_stats,
+                     summarize_repetitions, summarize_stats)
+from pkstrategy import PrimaryKeyStrategy, get_strategy
+from workload import WorkloadMix
+
+class TestEngine(enum.Enum):
+    THREAD = "thread"
+    ASYNCIO = "asyncio"
+    PROCESS = "process"
+    PIPELINE = "pipeline"
+
+
+WorkerOutcome = tuple[pd.DataFrame, dict[DBOperation, OperationStats], IntervalCounters]
 
-from dbfactory import DBFactory, DBOperation, DBPrimaryKeyType
 
 class TestPrimaryKey:
-    class TestPrimaryKeyWorker(Thread):
+    MIN_REPETITIONS: int = 3
+    LAYOUT_PHASES: set[str] = {DBOperation.INSERT.value, DBOperation.DELETE.value, DBOperation.CASCADE.value, "mixed"}
+
+    class TestPrimaryKeyWorkerBase:
+        """
+        Engine-independent part of a worker: statements, batch parameters and
+        the keys returned by the insert phase.
+
+        Without a workload mix the worker runs every operation as a phase, in
+        PHASES order, or CHILD_PHASES order when child tables reference the
+        test table. With a mix it first loads `operations` rows untimed and
+        then runs one interleaved stream of `operations / batchsize` batches.
+
+        With child tables, an FK insert batch adds one child row per key to
+        every child table, a join batch reads the children of its keys and
+        the deletes cascade to the children, as the cascade operation.
+
+        With a scan length, scan batches page through the table in key order
+        from a cursor, starting at a random key and starting over at another
+        one at the end of the table, and recent batches read the rows with
+        the highest keys. Scan batches count the rows they return, and with
+        scan buffers the shared buffers they hit and read are measured in the
+        same transaction, outside the timed statement.
+
+        With warmup rows, the worker first runs untimed batches inserting that
+        many rows, reading and updating them and deleting as many rows again,
+        so connections, plans and caches are warm when the timing starts.
+
+        With a phase barrier, workers and the parent meet at the start and end
+        of every phase, so the parent can snapshot server statistics around it.
+
+        Workers are closed-loop unless a rate is given. Open-loop workers
+        schedule batch k at start + k * batchsize / rate and measure its
+        latency from that intended start, so time spent waiting behind a slow
+        batch is included and the histograms are free of coordinated omission.
+        """
+        PHASES: list[DBOperation] = [DBOperation.INSERT, DBOperation.SELECT, DBOperation.UPDATE, DBOperation.DELETE]
+        CHILD_PHASES: list[DBOperation] = [DBOperation.INSERT, DBOperation.FK_INSERT, DBOperation.SELECT, DBOperation.JOIN,
+                                           DBOperation.UPDATE, DBOperation.CASCADE]
+        CHILD_OPERATIONS: set[DBOperation] = {DBOperation.FK_INSERT, DBOperation.JOIN}
+        SCAN_OPERATIONS: list[DBOperation] = [DBOperation.SCAN, DBOperation.RECENT]
+        FETCH: set[DBOperation] = {DBOperation.INSERT, DBOperation.SELECT, DBOperation.JOIN, DBOperation.SCAN,
+                                   DBOperation.RECENT}
+        PARAMSTYLE: DBParamStyle = DBParamStyle.FORMAT
+        PHASE_MIXED: str = "mixed"
+
         def __init__(self,
                      id: int,
                      dbfactory: DBFactory,
                      pktype: DBPrimaryKeyType,
                      batchsize: int,
                      operations: int,
+                     sink: MetricsSink | None = None,
+                     chunksize: int = 65536,
+                     raw: bool = True,
+                     insertmode: DBInsertMode = DBInsertMode.VALUES,
+                     family: DBStatementFamily = DBStatementFamily.LITERAL,
+                     prepared: bool = False,
+                     plancachemode: DBPlanCacheMode | None = None,
+                     keygen: DBKeyGeneration = DBKeyGeneration.SERVER,
+                     mix: WorkloadMix | None = None,
+                     children: int = 0,
+                     scan_length: int | None = None,
+                     scanbuffers: bool = True,
+                     warmup: int = 0,
+                     rate: float | None = None,
+                     offset: float = 0.0,
+                     interval: float = 1.0,
+                     origin: float = 0.0,
+                     progress: Any = None,
+                     barrier: Any = None,
+                     phase_barrier: Any = None,
+                     workers: int = 1,
+                     repetition: int | None = None,
         ) -> None:
-            super().__init__()
             self.id = id
+            self.workers = workers
+            self.repetition = repetition
             self.dbfactory = dbfactory
             self.pktype = pktype
             self.batchsize = batchsize
             self.operations = operations
+            self.sink = sink
+            self.chunksize = chunksize
+            self.raw = raw
+            self.insertmode = insertmode
+            self.family = family
+            self.prepared = prepared
+            self.plancachemode = plancachemode
+            self.keygen = keygen
+            self.mix = mix
+            self.children = children
+            self.scan_length = scan_length
+            self.scanbuffers = scanbuffers
+            self.warmup = warmup
+            self.rate = rate
+            self.offset = offset
+            self.interval = interval
+            self.origin = origin
+            self.progress = progress
+            self.barrier = barrier
+            self.phase_barrier = phase_barrier
+            self.start_time: float = 0.0
+            self.error: Exception | None = None
             self.results = pd.DataFrame()
+            self.stats: dict[DBOperation, OperationStats] = {}
+            self.series: IntervalCounters = IntervalCounters(interval, origin)
+            self.strategy: PrimaryKeyStrategy = get_strategy(self.pktype)
+            self.keys: KeyStore = self.strategy.create_store(capacity=self.operations)
+            self._array: bool = self.family == DBStatementFamily.ARRAY
+            self._copy: bool = self.insertmode != DBInsertMode.VALUES
+            self._ins_data: str = self.dbfactory.get_char_data(self.pktype, DBOperation.INSERT)
+            self._ins_args: list[Any] = [self._ins_data] * self.batchsize
+            if self._array:
+                self._ins_args = [self._ins_args]
+            self._copy_stmt: str = ""
+            if self._copy:
+                self._ins_args = [self.dbfactory.get_copy_data(self.pktype, self.batchsize, self.insertmode)]
+                self._copy_stmt = self.dbfactory.get_copy_statement(self.pktype, self.insertmode, self.keygen)
+            self._keygen: KeyGenerator | None = None
+            self._fetch: set[DBOperation] = self.FETCH
+            self._pending: Any = None
+            self._rng: np.random.Generator = np.random.default_rng()
+            if self.keygen == DBKeyGeneration.CLIENT:
+                self._keygen = self.strategy.create_generator(self.id, self.workers)
+                self._fetch = self.FETCH - {DBOperation.INSERT}
+            self._upd_arg: str = self.dbfactory.get_char_data(self.pktype, DBOperation.UPDATE)
+            self._operations: list[DBOperation] = self.get_operations(self.children, self.scan_length is not None)
+            self._child_data: str = self.dbfactory.get_child_data()
+            self._cursor: Any = None
+            self._buffers_stmt: str = self.dbfactory.get_scan_buffers_statement(self.PARAMSTYLE)
+            self._buffers_args: list[str] = [self.dbfactory.get_table_name(self.pktype)] * 2
+
+        def _create_recorder(self) -> MetricRecorder:
+            capacity: int = (self.operations // self.batchsize) * len(self._operations)
+            if self.sink is not None:
+                capacity = min(capacity, self.chunksize)
+            return MetricRecorder(workerid=self.id, capacity=capacity, sink=self.sink, raw=self.raw,
+                                  interval=self.interval, origin=self.origin, repetition=self.repetition)
+
+        def _get_statements(self) -> dict[DBOperation, str]:
+            statements: dict[DBOperation, str] = {
+                operation: self.dbfactory.get_child_operation_statement(
+                    table_type=self.pktype,
+                    operation=operation,
+                    children=self.children,
+                    batch_size=self.batchsize,
+                    paramstyle=self.PARAMSTYLE,
+                    family=self.family
+                ) if operation in self.CHILD_OPERATIONS else self.dbfactory.get_scan_statement(
+                    table_type=self.pktype,
+                    operation=operation,
+                    scan_length=self.scan_length,
+                    paramstyle=self.PARAMSTYLE
+                ) if operation in self.SCAN_OPERATIONS else self.dbfactory.get_table_operation_statement(
+                    table_type=self.pktype,
+                    operation=operation,
+                    batch_size=self.batchsize,
+                    paramstyle=self.PARAMSTYLE,
+                    family=self.family,
+                    keygen=self.keygen
+                ) for operation in self._operations
+            }
+            if self._copy:
+                if self._keygen is None:
+                    statements[DBOperation.INSERT] = self.dbfactory.get_insert_select_statement(self.pktype)
+                else:
+                    statements[DBOperation.INSERT] = self._copy_stmt
+            return statements
+
+        def _is_preparable(self, operation: DBOperation) -> bool:
+            return not (operation == DBOperation.INSERT and self._copy and self._keygen is not None)
+
+        def _get_insert_args(self) -> list[Any]:
+            """
+            Return the parameters of an insert batch. Client-generated keys are
+            kept pending until the batch has been executed.
+            """
+            if self._keygen is None:
+                return self._ins_args
+            self._pending = self._keygen.generate(self.batchsize)
+            keys: list[Any] = self.keys.decode(self._pending)
+            if self._copy:
+                return [self.dbfactory.get_copy_data(self.pktype, self.batchsize, self.insertmode, keys)]
+            elif self._array:
+                return self.strategy.to_arrays(keys) + [self._ins_args[0]]
+            elif self.strategy.composite:
+                return [value for key in keys for value in (*key, self._ins_data)]
+            return [value for key in keys for value in (key, self._ins_data)]
+
+        def _get_key_args(self, keys: list[Any]) -> list[Any]:
+            return self.strategy.to_arrays(keys) if self._array else self.strategy.to_params(keys)
+
+        def _get_child_args(self, keys: list[Any]) -> list[Any]:
+            """
+            Return the parameters of an FK insert of one child row per key,
+            repeated for every child table.
+            """
+            if self._array:
+                args: list[Any] = self.strategy.to_arrays(keys) + [[self._child_data] * len(keys)]
+            elif self.strategy.composite:
+                args = [value for key in keys for value in (*key, self._child_data)]
+            else:
+                args = [value for key in keys for value in (key, self._child_data)]
+            return args * self.children
+
+        def _get_args(self, operation: DBOperation) -> list[Any]:
+            """
+            Return the parameters of one batch. Phased deletes remove the
+            oldest keys, mixed deletes remove random keys. FK inserts and joins
+            use random keys, scans continue from the cursor.
+
+            :param operation: The operation of the batch.
+            :type operation: DBOperation
+            :return: The parameters of the batch.
+            :rtype: list[Any]
+            """
+            if operation == DBOperation.INSERT:
+                return self._get_insert_args()
+            elif operation == DBOperation.SELECT:
+                keys = self.keys.sample(self.batchsize)
+                return self._get_key_args(keys)
+            elif operation == DBOperation.UPDATE:
+                keys = self.keys.sample(self.batchsize)
+                return [self._upd_arg] + self._get_key_args(keys)
+            elif operation in (DBOperation.DELETE, DBOperation.CASCADE):
+                keys = self.keys.take(self.batchsize) if self.mix is None else self.keys.sample(self.batchsize, remove=True)
+                return self._get_key_args(keys)
+            elif operation == DBOperation.FK_INSERT:
+                return self._get_child_args(self.keys.sample(self.batchsize))
+            elif operation == DBOperation.JOIN:
+                return self._get_key_args(self.keys.sample(self.batchsize)) * self.children
+            elif operation == DBOperation.SCAN:
+                if self._cursor is None:
+                    self._cursor = self.keys.sample(1)[0]
+                return self.strategy.to_params([self._cursor])
+            elif operation == DBOperation.RECENT:
+                return []
+            raise ValueError(f"Invalid operation '{operation}'.")
+
+        def _get_load(self) -> Iterator[list[Any]]:
+            """
+            Generate the parameters of the untimed insert batches loading the
+            table before a mixed stream.
+
+            :return: An iterator over the parameters of each batch.
+            :rtype: Iterator[list[Any]]
+            """
+            if self.mix is None:
+                return
+            logging.info(f"Worker {self.id} loading {self.operations} rows")
+            for _ in range(0, self.operations, self.batchsize):
+                yield self._get_insert_args()
+
+        def _get_warmup(self) -> Iterator[tuple[DBOperation, list[Any]]]:
+            """
+            Generate the operation and parameters of the untimed warmup batches,
+            one pass over the warmup rows per operation, in phase order. Child
+            and scan operations are not warmed up.
+
+            :return: An iterator over the operation and parameters of each batch.
+            :rtype: Iterator[tuple[DBOperation, list[Any]]]
+            """
+            if self.warmup == 0:
+                return
+            logging.info(f"Worker {self.id} warming up with {self.warmup} rows")
+            for operation in self._operations:
+                if operation in self.CHILD_OPERATIONS or operation in self.SCAN_OPERATIONS:
+                    continue
+                for _ in range(0, self.warmup, self.batchsize):
+                    yield operation, self._get_args(operation)
+
+        @classmethod
+        def get_operations(cls, children: int = 0, scans: bool = False) -> list[DBOperation]:
+            """
+            Return the operations a worker can run, in phase order. Scans run
+            after the reads, before the table is modified again.
+            """
+            operations: list[DBOperation] = list(cls.CHILD_PHASES if children > 0 else cls.PHASES)
+            if scans:
+                index: int = operations.index(DBOperation.UPDATE)
+                operations[index:index] = cls.SCAN_OPERATIONS
+            return operations
+
+        @classmethod
+        def get_phases(cls, mix: WorkloadMix | None, children: int = 0, scans: bool = False) -> list[str]:
+            """
+            Return the names of the timed phases: one per operation, or a
+            single mixed phase.
+            """
+            if mix is not None:
+                return [cls.PHASE_MIXED]
+            return [operation.value for operation in cls.get_operations(children, scans)]
+
+        def _get_stream(self, phase: str) -> Iterator[tuple[DBOperation, list[Any]]]:
+            """
+            Generate the operation and parameters of every timed batch of a
+            phase. In a mixed stream a batch needing more keys than are live
+            becomes an insert, so the key store never runs dry.
+
+            :param phase: The name of the phase, as returned by get_phases().
+            :type phase: str
+            :return: An iterator over the operation and parameters of each batch.
+            :rtype: Iterator[tuple[DBOperation, list[Any]]]
+            """
+            if phase != self.PHASE_MIXED:
+                operations: Iterator[DBOperation] = (
+                    DBOperation(phase) for _ in range(0, self.operations, self.batchsize)
+                )
+            else:
+                operations = iter(self.mix.schedule(-(-self.operations // self.batchsize), self._rng))
+            for operation in operations:
+                if self.mix is not None and operation != DBOperation.INSERT and len(self.keys) < self.batchsize:
+                    operation = DBOperation.INSERT
+                yield operation, self._get_args(operation)
+
+        def _get_intended(self, index: int) -> float | None:
+            """
+            Return the intended start time of a batch, or None when closed-loop.
+
+            :param index: The index of the batch in the timed stream.
+            :type index: int
+            :return: The intended start time, from time.perf_counter().
+            :rtype: float | None
+            """
+            if self.rate is None:
+                return None
+            return self.start_time + self.offset + index * self.batchsize / self.rate
+
+        def _mark_start(self) -> None:
+            self.start_time = time.perf_counter()
+            logging.info(f"Worker {self.id} started timed phases at {self.start_time:.6f}")
+
+        def _on_results(self, operation: DBOperation, results: list[Any]) -> int:
+            """
+            Keep the keys of an insert and advance the cursor of a scan.
+
+            :param operation: The operation of the batch.
+            :type operation: DBOperation
+            :param results: The rows returned by the batch.
+            :type results: list[Any]
+            :return: The number of rows of the batch.
+            :rtype: int
+            """
+            if operation == DBOperation.INSERT:
+                if self._keygen is not None:
+                    self.keys.append(self._pending)
+                else:
+                    self.keys.append(self.strategy.from_rows(results))
+            elif operation == DBOperation.SCAN:
+                # A short page is the end of the table: start over at another key.
+                self._cursor = self.strategy.from_rows(results[-1:])[0] if len(results) == self.scan_length else None
+            if operation in self.SCAN_OPERATIONS:
+                return len(results)
+            return self.batchsize
+
+        def _is_measured(self, operation: DBOperation) -> bool:
+            return self.scanbuffers and operation in self.SCAN_OPERATIONS
+
+        def _finish(self, recorder: MetricRecorder) -> None:
+            if self.sink is not None:
+                recorder.flush()
+            self.results = recorder.to_dataframe()
+            self.stats = recorder.stats
+            self.series = recorder.series
+            logging.info(f"Worker {self.id} completed all operations.")
+
+    class TestPrimaryKeyWorker(TestPrimaryKeyWorkerBase, Thread):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            TestPrimaryKey.TestPrimaryKeyWorkerBase.__init__(self, *args, **kwargs)
+            Thread.__init__(self)
 
         def run(self) -> None:
             """
             Run the worker to perform primary key operations.
             """
             logging.info(f"Worker {self.id} starting test with PK type {self.pktype.value}")
-            output: pd.DataFrame = pd.DataFrame()
-            ins_done: int = 0
-            ins_stmt: str = self.dbfactory.get_table_operation_statement(
-                table_type=self.pktype,
-                operation=DBOperation.INSERT,
-                batch_size=self.batchsize
-            )
-            ins_args: list[str] = [self.dbfactory.get_char_data(self.pktype, DBOperation.INSERT)] * self.batchsize
-            sel_done: int = 0
-            sel_stmt: str = self.dbfactory.get_table_operation_statement(
-                table_type=self.pktype,
-                operation=DBOperation.SELECT,
-                batch_size=self.batchsize
-            )
-            upd_done: int = 0
-            upd_stmt: str = self.dbfactory.get_table_operation_statement(
-                table_type=self.pktype,
-                operation=DBOperation.UPDATE,
-                batch_size=self.batchsize
-            )
-            upd_arg: str = self.dbfactory.get_char_data(self.pktype, DBOperation.UPDATE)
-            del_done: int = 0
-            del_stmt: str = self.dbfactory.get_table_operation_statement(
-                table_type=self.pktype,
-                operation=DBOperation.DELETE,
-                batch_size=self.batchsize
-            )
-            keys: list[Any] = []
-            with self.dbfactory.get_connection() as conn:
+            try:
+                self._run()
+            except Exception as e:
+                self.error = e
+                if self.barrier is not None:
+                    self.barrier.abort()
+                if self.phase_barrier is not None:
+                    self.phase_barrier.abort()
+                raise
+
+        def _run(self) -> None:
+            recorder: MetricRecorder = self._create_recorder()
+            statements: dict[DBOperation, str] = self._get_statements()
+            with self.dbfactory.connection() as conn:
                 conn.autocommit = True
+                if self._copy and self._keygen is None:
+                    with conn.cursor() as cur:
+                        cur.execute(self.dbfactory.get_staging_create_statement(self.pktype))
+                if self.prepared:
+                    cache: DBStatementCache = self.dbfactory.get_statement_cache(conn, self.plancachemode)
+                    for operation, stmt in statements.items():
+                        if self._is_preparable(operation):
+                            batch_size: int | None = None if self._array else self.batchsize
+                            statements[operation] = cache.prepare(self.pktype, operation, batch_size, stmt)
+                    for (_, operation, _), prepare_time in cache.prepare_times.items():
+                        recorder.stats[operation].prepare_time += prepare_time
                 with conn.cursor() as cur:
-                    while ins_done < self.operations:
-                        logging.info(f"Worker {self.id} performing {DBOperation.INSERT.value} for batch size {self.batchsize}")
-                        start = time.perf_counter()
-                        cur.execute(ins_stmt, ins_args)
-                        results: list[tuple] = cur.fetchall()
-                        end = time.perf_counter()
-                        logging.debug(f"Worker {self.id} inserted keys: {len(results)}")
-                        keys.extend([row[0] for row in results])
-                        output = pd.concat([output, pd.DataFrame({
-                            "workerid": [self.id],
-                            "operation": [DBOperation.INSERT.value],
-                            "batchsize": [self.batchsize],
-                            "duration": [end - start],
-                        })], ignore_index=True)
-                        ins_done += self.batchsize
+                    for args in self._get_load():
+                        self._on_results(DBOperation.INSERT,
+                                         self._execute(cur, DBOperation.INSERT, statements[DBOperation.INSERT], args))
+                    for operation, args in self._get_warmup():
+                        self._on_results(operation, self._execute(cur, operation, statements[operation], args))
+                    if self.barrier is not None:
+                        self.barrier.wait()
+                    self._mark_start()
+                    index: int = 0
+                    flush: str | None = self.dbfactory.get_stats_flush_statement(conn.server_version)
+                    for phase in self.get_phases(self.mix, self.children, self.scan_length is not None):
+                        if self.phase_barrier is not None:
+                            self.phase_barrier.wait()
+                            self._mark_start()
+                            index = 0
+                        for operation, args in self._get_stream(phase):
+                            intended: float | None = self._get_intended(index)
+                            index += 1
+                            if intended is not None:
+                                time.sleep(max(intended - time.perf_counter(), 0.0))
+                            measured: bool = self._is_measured(operation)
+                            if measured:
+                                cur.execute("BEGIN;")
+                                before: tuple = self._read_buffers(cur)
+                            start = time.perf_counter()
+                            results: list[tuple] = self._execute(cur, operation, statements[operation], args)
+                            end = time.perf_counter()
+                            if measured:
+                                after: tuple = self._read_buffers(cur)
+                                cur.execute("COMMIT;")
+                                recorder.stats[operation].record_buffers(after[0] - before[0], after[1] - before[1])
+                            rows: int = self._on_results(operation, results)
+                            recorder.record(operation, rows, start if intended is None else intended, end)
+                            if self.progress is not None:
+                                self.progress[self.id] += self.batchsize
+                        if self.phase_barrier is not None:
+                            if flush is not None:
+                                cur.execute(flush)
+                            self.phase_barrier.wait()
+            self._finish(recorder)
 
-                with conn.cursor() as cur:
-                    while sel_done < self.operations:
-                        logging.info(f"Worker {self.id} performing {DBOperation.SELECT.value} for batch size {self.batchsize}")
-                        sel_keys = random.sample(keys, self.batchsize)
-                        start = time.perf_counter()
-                        cur.execute(sel_stmt, sel_keys)
-                        results: list[tuple] = cur.fetchall()
-                        end = time.perf_counter()
-                        logging.debug(f"Worker {self.id} selected keys: {len(results)}")
-                        output = pd.concat([output, pd.DataFrame({
-                            "workerid": [self.id],
-                            "operation": [DBOperation.SELECT.value],
-                            "batchsize": [self.batchsize],
-                            "duration": [end - start],
-                        })], ignore_index=True)
-                        sel_done += self.batchsize
+        def _read_buffers(self, cur: Any) -> tuple:
+            cur.execute(self._buffers_stmt, self._buffers_args)
+            return cur.fetchone()
 
-                with conn.cursor() as cur:
-                    while upd_done < self.operations:
-                        logging.info(f"Worker {self.id} performing {DBOperation.UPDATE.value} for batch size {self.batchsize}")
-                        upd_keys = random.sample(keys, self.batchsize)
+        def _execute(self, cur: Any, operation: DBOperation, stmt: str, args: list[Any]) -> list[tuple]:
+            if operation == DBOperation.INSERT and self._copy:
+                if self._keygen is not None:
+                    cur.copy_expert(self._copy_stmt, io.BytesIO(args[0]))
+                    return []
+                cur.execute("BEGIN;")
+                cur.copy_expert(self._copy_stmt, io.BytesIO(args[0]))
+                cur.execute(stmt)
+                results: list[tuple] = cur.fetchall()
+                cur.execute("COMMIT;")
+                return results
+            cur.execute(stmt, args)
+            return cur.fetchall() if operation in self._fetch else []
+
+    class TestPrimaryKeyPipelineWorker(TestPrimaryKeyWorker):
+        """
+        Thread worker keeping up to `depth` batches in flight on one pipelined
+        connection. A batch is sent without waiting for the batches before it,
+        and results are received as they arrive, or from the oldest batch
+        when `depth` batches are in flight. Latency runs from sending a batch,
+        or from its intended start, until its result is received, so it
+        includes the time queued behind the batches ahead of it.
+
+        Batch parameters are drawn when a batch is sent, so reads only sample
+        keys whose inserts have completed. Scans and COPY inserts depend on
+        the previous batch and are not pipelined.
+        """
+        PARAMSTYLE: DBParamStyle = DBParamStyle.NUMERIC
+
+        def __init__(self, *args: Any, depth: int = 1, **kwargs: Any) -> None:
+            TestPrimaryKey.TestPrimaryKeyWorker.__init__(self, *args, **kwargs)
+            self.depth = depth
+            self._in_flight: deque[tuple[DBOperation, Any, float | None, float]] = deque()
+
+        def _run(self) -> None:
+            recorder: MetricRecorder = self._create_recorder()
+            statements: dict[DBOperation, str] = self._get_statements()
+            pipeline: DBPipeline = self.dbfactory.get_pipeline()
+            try:
+                if self.plancachemode is not None:
+                    pipeline.execute(f"SET plan_cache_mode = {self.plancachemode.value};")
+                if self.prepared:
+                    for operation, stmt in statements.items():
                         start = time.perf_counter()
-                        cur.execute(upd_stmt, [upd_arg] + upd_keys)
-                        end = time.perf_counter()
-                        output = pd.concat([output, pd.DataFrame({
-                            "workerid": [self.id],
-                            "operation": [DBOperation.UPDATE.value],
-                            "batchsize": [self.batchsize],
-                            "duration": [end - start],
-                        })], ignore_index=True)
-                        upd_done += self.batchsize
+                        pipeline.prepare(stmt)
+                        recorder.stats[operation].prepare_time += time.perf_counter() - start
+                for args in self._get_load():
+                    self._submit(pipeline, DBOperation.INSERT, statements[DBOperation.INSERT], args, None)
+                self._drain(pipeline, None)
+                for operation, args in self._get_warmup():
+                    self._submit(pipeline, operation, statements[operation], args, None)
+                    self._drain(pipeline, None)
+                if self.barrier is not None:
+                    self.barrier.wait()
+                self._mark_start()
+                index: int = 0
+                flush: str | None = self.dbfactory.get_stats_flush_statement(pipeline.conn.info.server_version)
+                for phase in self.get_phases(self.mix, self.children, self.scan_length is not None):
+                    if self.phase_barrier is not None:
+                        self.phase_barrier.wait()
+                        self._mark_start()
+                        index = 0
+                    for operation, args in self._get_stream(phase):
+                        intended: float | None = self._get_intended(index)
+                        index += 1
+                        if intended is not None:
+                            self._wait(pipeline, recorder, intended)
+                        self._submit(pipeline, operation, statements[operation], args, intended, recorder)
+                    self._drain(pipeline, recorder)
+                    if self.phase_barrier is not None:
+                        if flush is not None:
+                            pipeline.execute(flush)
+                        self.phase_barrier.wait()
+            finally:
+                pipeline.close()
+            self._finish(recorder)
 
-                with conn.cursor() as cur:
-                    while del_done < self.operations:
-                        logging.info(f"Worker {self.id} performing {DBOperation.DELETE.value} for batch size {self.batchsize}")
-                        del_keys = keys[del_done:del_done+self.batchsize]
+        def _submit(self, pipeline: DBPipeline, operation: DBOperation, stmt: str, args: list[Any],
+                    intended: float | None, recorder: MetricRecorder | None = None) -> None:
+            """
+            Send a batch once fewer than `depth` batches are in flight,
+            receiving the results that have already arrived first.
+            """
+            while self._in_flight and (len(self._in_flight) >= self.depth or pipeline.ready()):
+                self._receive(pipeline, recorder)
+            self._in_flight.append((operation, self._pending, intended, time.perf_counter()))
+            pipeline.submit(stmt, args)
+
+        def _wait(self, pipeline: DBPipeline, recorder: MetricRecorder, intended: float) -> None:
+            """
+            Receive results until the intended start of the next batch.
+            """
+            while True:
+                remaining: float = intended - time.perf_counter()
+                if not self._in_flight:
+                    time.sleep(max(remaining, 0.0))
+                    return
+                if pipeline.ready(max(remaining, 0.0)):
+                    self._receive(pipeline, recorder)
+                elif remaining <= 0.0:
+                    return
+
+        def _drain(self, pipeline: DBPipeline, recorder: MetricRecorder | None) -> None:
+            while self._in_flight:
+                self._receive(pipeline, recorder)
+
+        def _receive(self, pipeline: DBPipeline, recorder: MetricRecorder | None) -> None:
+            """
+            Receive the result of the oldest batch in flight and record its
+            latency, unless it is an untimed load batch.
+            """
+            operation, pending, intended, start = self._in_flight.popleft()
+            results: list[tuple] = pipeline.receive()
+            end = time.perf_counter()
+            self._pending = pending
+            rows: int = self._on_results(operation, results)
+            if recorder is not None:
+                recorder.record(operation, rows, start if intended is None else intended, end)
+                if self.progress is not None:
+                    self.progress[self.id] += self.batchsize
+
+    class TestPrimaryKeyAsyncWorker(TestPrimaryKeyWorkerBase):
+        """
+        Worker driving one asyncpg connection as a coroutine. All async workers
+        share the event loop of TestPrimaryKey.run_test.
+        """
+        PARAMSTYLE: DBParamStyle = DBParamStyle.NUMERIC
+
+        async def run(self) -> None:
+            """
+            Run the worker to perform primary key operations.
+            """
+            logging.info(f"Worker {self.id} starting async test with PK type {self.pktype.value}")
+            recorder: MetricRecorder = self._create_recorder()
+            statements: dict[DBOperation, Any] = self._get_statements()
+            conn = await self.dbfactory.get_async_connection()
+            try:
+                if self._copy and self._keygen is None:
+                    await conn.execute(self.dbfactory.get_staging_create_statement(self.pktype))
+                if self.prepared:
+                    statements = await self._prepare(conn, statements, recorder)
+                for args in self._get_load():
+                    self._on_results(DBOperation.INSERT,
+                                     await self._execute(conn, DBOperation.INSERT, statements[DBOperation.INSERT], args))
+                for operation, args in self._get_warmup():
+                    self._on_results(operation, await self._execute(conn, operation, statements[operation], args))
+                if self.barrier is not None:
+                    await self.barrier.wait()
+                self._mark_start()
+                index: int = 0
+                version = conn.get_server_version()
+                flush: str | None = self.dbfactory.get_stats_flush_statement(version.major * 10000 + version.minor)
+                for phase in self.get_phases(self.mix, self.children, self.scan_length is not None):
+                    if self.phase_barrier is not None:
+                        await self.phase_barrier.wait()
+                        self._mark_start()
+                        index = 0
+                    for operation, args in self._get_stream(phase):
+                        intended: float | None = self._get_intended(index)
+                        index += 1
+                        if intended is not None:
+                            await asyncio.sleep(max(intended - time.perf_counter(), 0.0))
+                        measured: bool = self._is_measured(operation)
+                        if measured:
+                            transaction = conn.transaction()
+                            await transaction.start()
+                            before: Any = await conn.fetchrow(self._buffers_stmt, *self._buffers_args)
                         start = time.perf_counter()
-                        cur.execute(del_stmt, del_keys)
+                        results: list[Any] = await self._execute(conn, operation, statements[operation], args)
                         end = time.perf_counter()
-                        output = pd.concat([output, pd.DataFrame({
-                            "workerid": [self.id],
-                            "operation": [DBOperation.DELETE.value],
-                            "batchsize": [self.batchsize],
-                            "duration": [end - start],
-                        })], ignore_index=True)
-                        del_done += self.batchsize
-
-            self.results = output
-            logging.info(f"Worker {self.id} completed all operations.")
+                        if measured:
+                            after: Any = await conn.fetchrow(self._buffers_stmt, *self._buffers_args)
+                            await transaction.commit()
+                            recorder.stats[operation].record_buffers(after[0] - before[0], after[1] - before[1])
+                        rows: int = self._on_results(operation, results)
+                        recorder.record(operation, rows, start if intended is None else intended, end)
+                        if self.progress is not None:
+                            self.progress[self.id] += self.batchsize
+                    if self.phase_barrier is not None:
+                        if flush is not None:
+                            await conn.execute(flush)
+                        await self.phase_barrier.wait()
+            finally:
+                await conn.close()
+            self._finish(recorder)
+
+        async def _prepare(self, conn: Any, statements: dict[DBOperation, Any], recorder: MetricRecorder) -> dict[DBOperation, Any]:
+            """
+            Prepare every statement explicitly on the connection.
+            asyncpg already caches implicitly prepared statements, so this only
+            makes the preparation and the plan cache mode explicit and timed.
+            """
+            if self.plancachemode is not None:
+                await conn.execute(f"SET plan_cache_mode = {self.plancachemode.value};")
+            prepared: dict[DBOperation, Any] = {}
+            for operation, stmt in statements.items():
+                if not self._is_preparable(operation):
+                    prepared[operation] = stmt
+                    continue
+                start = time.perf_counter()
+                prepared[operation] = await conn.prepare(stmt)
+                recorder.stats[operation].prepare_time += time.perf_counter() - start
+            return prepared
+
+        async def _execute(self, conn: Any, operation: DBOperation, stmt: Any, args: list[Any]) -> list[Any]:
+            if operation == DBOperation.INSERT and self._copy:
+                copy_format: str = "binary" if self.insertmode == DBInsertMode.COPY_BINARY else "text"
+                if self._keygen is not None:
+                    await conn.copy_to_table(self.dbfactory.get_table_name(self.pktype), source=io.BytesIO(args[0]),
+                                             columns=self.strategy.names + ["data"], format=copy_format)
+                    return []
+                async with conn.transaction():
+                    await conn.copy_to_table(
+                        self.dbfactory.get_staging_name(self.pktype),
+                        source=io.BytesIO(args[0]),
+                        columns=["data"],
+                        format=copy_format
+                    )
+                    return await (stmt.fetch() if self.prepared else conn.fetch(stmt))
+            if self.prepared:
+                return await stmt.fetch(*args)
+            if operation in self._fetch:
+                return await conn.fetch(stmt, *args)
+            await conn.execute(stmt, *args)
+            return []
 
     def __init__(self,
                  dbfactory: DBFactory,
                  pktype: DBPrimaryKeyType,
                  workers: int,
                  batchsize: int,
-                 operations: int
+                 operations: int,
+                 sink: MetricsSink | None = None,
+                 chunksize: int = 65536,
+                 raw: bool = True,
+                 engine: TestEngine = TestEngine.THREAD,
+                 insertmode: DBInsertMode = DBInsertMode.VALUES,
+                 family: DBStatementFamily = DBStatementFamily.LITERAL,
+                 prepared: bool = False,
+                 plancachemode: DBPlanCacheMode | None = None,
+                 keygen: DBKeyGeneration = DBKeyGeneration.SERVER,
+                 mix: WorkloadMix | None = None,
+                 target_rate: float | None = None,
+                 interval: float = 1.0,
+                 progress: bool = False,
+                 serverstats: bool = False,
+                 analyze: bool = False,
+                 dataset: int | None = None,
+                 layout: DBTableLayout | None = None,
+                 children: int = 0,
+                 scan_length: int | None = None,
+                 scanbuffers: bool = True,
+                 depth: int = 1,
+                 warmup: int = 0,
+                 repetitions: int = 1,
+                 precision: float | None = None,
+                 confidence: float = 0.95
     ) -> None:
         self.dbfactory = dbfactory
         self.pktype = pktype
         self.workers = workers
         self.batchsize = batchsize
         self.operations = operations
+        self.sink = sink
+        self.chunksize = chunksize
+        self.raw = raw
+        self.engine = engine
+        self.insertmode = insertmode
+        self.family = family
+        self.prepared = prepared
+        self.plancachemode = plancachemode
+        self.keygen = keygen
+        self.mix = mix
+        self.target_rate = target_rate
+        self.interval = interval
+        self.progress = progress
+        self.serverstats = serverstats
+        self.analyze = analyze
+        self.dataset = dataset
+        self.layout: DBTableLayout = layout if layout is not None else DBTableLayout()
+        self.children = children
+        self.scan_length = scan_length
+        self.scanbuffers = scanbuffers
+        self.depth = depth
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.precision = precision
+        self.confidence = confidence
+        self._outputs: list[dict[str, pd.DataFrame]] = []
+        self._capture: bool = serverstats or analyze
+        self._phase_snapshot: dict[str, float] = {}
+        self.stats: dict[DBOperation, OperationStats] = {}
+        self.server_stats: dict[str, dict[str, float]] = {}
+        self.layout_stats: dict[str, dict[str, float]] = {}
+        self.series: IntervalCounters = IntervalCounters(interval)
     
     def run_test(self) -> pd.DataFrame:
         """
         Run the primary key test.
+        When a sink is configured, samples are streamed to it in chunks of at
+        most `chunksize` rows per worker and the returned DataFrame is empty.
+        The merged latency histograms are kept for get_summary() and the
+        merged interval counters for get_timeseries(). Progress is logged once
+        per interval while the workers run. With serverstats, the server
+        counter deltas of every phase are kept for get_server_stats(). With
+        analyze, the table layout is analyzed after the inserts and after the
+        deletes (after the mixed phase in mixed mode), and kept for
+        get_layout_stats(). With a dataset, the test database is first
+        cloned from the prepared dataset of that many rows instead of starting
+        from an empty table. The table, or the dataset, has the partitioning
+        of the layout. With children, that many child tables referencing the
+        table are created empty and the child operations run as well. With a
+        scan length, the range scans run as well. The pipeline engine runs
+        thread workers keeping `depth` batches in flight per connection.
+        With warmup, every worker first runs untimed batches of its share of
+        the warmup rows, see TestPrimaryKeyWorkerBase.
+        With repetitions, the test runs that many times, each time on a fresh
+        table, and every output gains a repetition column. With a precision,
+        the repetitions stop early, after at least MIN_REPETITIONS, once the
+        confidence interval of the throughput of every operation is within
+        that fraction of its mean, see get_repetition_stats(). The raw
+        samples of all repetitions are pooled, with their repetition column.
         :return: DataFrame with metrics for all workers
         :rtype: pd.DataFrame
         """
+        self._outputs = []
+        results: list[pd.DataFrame] = []
+        for repetition in range(self.repetitions):
+            logging.info(f"Starting repetition {repetition + 1} of {self.repetitions}.")
+            results.append(self._run_repetition(repetition))
+            self._outputs.append({
+                "summary": self._build_summary(),
+                "timeseries": self._build_timeseries(),
+                "serverstats": self._build_server_stats(),
+                "layout": self._build_layout_stats(),
+            })
+            if self._is_precise():
+                logging.info(f"Stopping after {repetition + 1} repetitions, the throughput is within "
+                             f"{100 * self.precision:.1f}% at {100 * self.confidence:.0f}% confidence.")
+                break
+        return pd.concat(results, ignore_index=True)
+
+    def _run_repetition(self, repetition: int) -> pd.DataFrame:
+        if self.dataset is not None:
+            self.dbfactory.clone_dataset(self.pktype, self.dataset, self.layout)
+        else:
+            self.dbfactory.create_table(self.pktype, self.layout)
+        if self.children > 0:
+            self.dbfactory.create_child_tables(self.pktype, self.children, self.layout)
+
         ops_per_worker = self.operations // self.workers
-        workers = [
-            self.TestPrimaryKeyWorker(
+        rate: float | None = self.target_rate / self.workers if self.target_rate is not None else None
+        period: float = self.batchsize / rate if rate is not None else 0.0
+        origin: float = time.perf_counter()
+        progress: Any = [0] * self.workers
+        if self.engine == TestEngine.PROCESS:
+            progress = _get_mp_context().RawArray("q", self.workers)
+        worker_args: list[dict[str, Any]] = [
+            dict(
                 id=i,
+                workers=self.workers,
+                repetition=repetition + 1 if self.repetitions > 1 else None,
                 dbfactory=self.dbfactory,
                 pktype=self.pktype,
                 batchsize=self.batchsize,
                 operations=ops_per_worker,
+                chunksize=self.chunksize,
+                raw=self.raw,
+                insertmode=self.insertmode,
+                family=self.family,
+                prepared=self.prepared,
+                plancachemode=self.plancachemode,
+                keygen=self.keygen,
+                mix=self.mix,
+                children=self.children,
+                scan_length=self.scan_length,
+                scanbuffers=self.scanbuffers,
+                rate=rate,
+                warmup=self.warmup // self.workers,
+                offset=period * i / self.workers,
+                interval=self.interval,
+                origin=origin,
+                progress=progress,
             ) for i in range(self.workers)
         ]
-        
-        self.dbfactory.create_table(self.pktype)
 
+        self.server_stats = {}
+        self.layout_stats = {}
+        phases: int = len(self.TestPrimaryKeyWorkerBase.get_phases(self.mix, self.children, self.scan_length is not None))
+        stop = threading.Event()
+        reporter = Thread(target=self._report_progress, args=(progress, ops_per_worker * self.workers * phases, stop),
+                          name="pkprogress", daemon=True)
+        try:
+            if self.engine == TestEngine.PROCESS:
+                # The workers are started before any thread of the test.
+                outcomes = self._run_processes(worker_args, started=reporter.start)
+            else:
+                reporter.start()
+                if self.engine == TestEngine.ASYNCIO:
+                    outcomes = asyncio.run(self._run_async(worker_args))
+                elif self.engine == TestEngine.PIPELINE:
+                    outcomes = self._run_threads([dict(args, depth=self.depth) for args in worker_args],
+                                                 self.TestPrimaryKeyPipelineWorker)
+                else:
+                    outcomes = self._run_threads(worker_args)
+        finally:
+            stop.set()
+            if reporter.ident is not None:
+                reporter.join()
+        results: list[pd.DataFrame] = [results for results, _, _ in outcomes]
+        self.stats = merge_stats([stats for _, stats, _ in outcomes])
+        self.series = IntervalCounters(self.interval, origin)
+        for _, _, series in outcomes:
+            self.series.merge(series)
+        if self.target_rate is not None:
+            achieved: float = self.get_achieved_rate()
+            logging.info(f"Achieved {achieved:.1f} rows/s of a target of {self.target_rate:.1f} rows/s.")
+            if achieved < 0.95 * self.target_rate:
+                logging.warning(f"Target rate of {self.target_rate:.1f} rows/s was not sustained.")
+
+        self.dbfactory.drop_table(self.pktype, self.children)
+
+        return pd.concat(results, ignore_index=True)
+
+    def _report_progress(self, progress: Any, total: int, stop: threading.Event) -> None:
+        """
+        Log the rows completed by all workers once per interval until stopped,
+        and mirror them on a live stderr line when progress is enabled.
+        """
+        last_rows: int = 0
+        last_time: float = time.perf_counter()
+        while not stop.wait(self.interval):
+            rows: int = sum(progress)
+            now: float = time.perf_counter()
+            line: str = (f"Progress: {rows}/{total} rows ({100 * rows / total:.1f}%), "
+                         f"{(rows - last_rows) / (now - last_time):.0f} rows/s")
+            logging.info(line)
+            if self.progress:
+                sys.stderr.write(f"\r{line}")
+                sys.stderr.flush()
+            last_rows, last_time = rows, now
+        if self.progress:
+            sys.stderr.write("\n")
+
+    def _before_phase(self, conn: Any, phase: str) -> None:
+        if self.serverstats:
+            self._phase_snapshot = self.dbfactory.get_server_stats(conn, self.pktype, self.children)
+
+    def _after_phase(self, conn: Any, phase: str) -> None:
+        if self.serverstats:
+            after: dict[str, float] = self.dbfactory.get_server_stats(conn, self.pktype, self.children)
+            self.server_stats[phase] = DBFactory.get_server_stats_delta(self._phase_snapshot, after)
+        if self.analyze and phase in self.LAYOUT_PHASES:
+            self.layout_stats[phase] = self.dbfactory.get_layout_stats(conn, self.pktype, self.children)
+
+    def _capture_phases(self, phase_barrier: Any) -> None:
+        """
+        Snapshot server statistics and analyze the table layout around every
+        phase, meeting the workers at the phase barrier. Runs in its own
+        thread, on its own connection, so it never takes a connection from
+        the pool.
+        """
+        conn = self.dbfactory.get_connection()
+        conn.autocommit = True
+        try:
+            for phase in self.TestPrimaryKeyWorkerBase.get_phases(self.mix, self.children, self.scan_length is not None):
+                self._before_phase(conn, phase)
+                phase_barrier.wait()
+                phase_barrier.wait()
+                self._after_phase(conn, phase)
+        except threading.BrokenBarrierError:
+            logging.warning("Phase capture stopped because a worker failed.")
+        except Exception as e:
+            logging.error(f"Phase capture failed: {e!r}")
+            phase_barrier.abort()
+        finally:
+            conn.close()
+
+    def _start_capture(self, phase_barrier: Any) -> Thread | None:
+        if phase_barrier is None:
+            return None
+        capture = Thread(target=self._capture_phases, args=(phase_barrier,), name="pkcapture", daemon=True)
+        capture.start()
+        return capture
+
+    def _run_threads(self, worker_args: list[dict[str, Any]], worker_class: type | None = None) -> list[WorkerOutcome]:
+        worker_class = worker_class if worker_class is not None else self.TestPrimaryKeyWorker
+        barrier = threading.Barrier(len(worker_args))
+        phase_barrier = threading.Barrier(len(worker_args) + 1) if self._capture else None
+        workers = [worker_class(**args, sink=self.sink, barrier=barrier, phase_barrier=phase_barrier)
+                   for args in worker_args]
+        capture: Thread | None = self._start_capture(phase_barrier)
         for worker in workers:
             worker.start()
         for worker in workers:
             worker.join()
-        results: list[pd.DataFrame] = [worker.results for worker in workers]
+        if capture is not None:
+            capture.join()
+        for worker in workers:
+            if worker.error is not None:
+                raise RuntimeError(f"Worker {worker.id} failed: {worker.error!r}")
+        return [(worker.results, worker.stats, worker.series) for worker in workers]
+
+    async def _capture_phases_async(self, phase_barrier: asyncio.Barrier) -> None:
+        """
+        Coroutine version of _capture_phases for the asyncio engine.
+        Snapshots and analyses run in a thread while the workers wait at the barrier.
+        """
+        conn = await asyncio.to_thread(self.dbfactory.get_connection)
+        conn.autocommit = True
+        try:
+            for phase in self.TestPrimaryKeyWorkerBase.get_phases(self.mix, self.children, self.scan_length is not None):
+                await asyncio.to_thread(self._before_phase, conn, phase)
+                await phase_barrier.wait()
+                await phase_barrier.wait()
+                await asyncio.to_thread(self._after_phase, conn, phase)
+        finally:
+            conn.close()
+
+    async def _run_async(self, worker_args: list[dict[str, Any]]) -> list[WorkerOutcome]:
+        barrier = asyncio.Barrier(len(worker_args))
+        phase_barrier = asyncio.Barrier(len(worker_args) + 1) if self._capture else None
+        workers = [self.TestPrimaryKeyAsyncWorker(**args, sink=self.sink, barrier=barrier, phase_barrier=phase_barrier)
+                   for args in worker_args]
+        tasks: list[Any] = [worker.run() for worker in workers]
+        if phase_barrier is not None:
+            tasks.append(self._capture_phases_async(phase_barrier))
+        await asyncio.gather(*tasks)
+        return [(worker.results, worker.stats, worker.series) for worker in workers]
+
+    def _run_processes(self, worker_args: list[dict[str, Any]],
+                       started: Callable[[], None] | None = None) -> list[WorkerOutcome]:
+        """
+        Run every worker in its own process. Workers stream metric chunks and
+        their final statistics back through a queue, and the parent writes the
+        chunks to the sink and merges the statistics. Threads of the parent,
+        the phase capture and then `started`, only start once every worker
+        has been started.
+        """
+        ctx = _get_mp_context()
+        messages = ctx.Queue()
+        barrier = ctx.Barrier(len(worker_args))
+        phase_barrier = ctx.Barrier(len(worker_args) + 1) if self._capture else None
+        processes = [
+            ctx.Process(target=_run_process_worker,
+                        args=(args, self.sink is not None, messages, barrier, phase_barrier),
+                        name=f"pkworker-{args['id']}")
+            for args in worker_args
+        ]
+        outcomes: dict[int, WorkerOutcome] = {}
+        capture: Thread | None = None
+        try:
+            for process in processes:
+                process.start()
+            capture = self._start_capture(phase_barrier)
+            if started is not None:
+                started()
+            while len(outcomes) < len(processes):
+                try:
+                    message: tuple = messages.get(timeout=1.0)
+                except queue.Empty:
+                    for process in processes:
+                        if process.exitcode not in (None, 0):
+                            barrier.abort()
+                            if phase_barrier is not None:
+                                phase_barrier.abort()
+                            raise RuntimeError(f"Worker process '{process.name}' exited with code {process.exitcode}.")
+                    continue
+                if message[0] == "chunk":
+                    if self.sink is not None:
+                        self.sink.write(message[1])
+                elif message[0] == "done":
+                    outcomes[message[1]] = (message[2], message[3], message[4])
+                elif message[0] == "error":
+                    barrier.abort()
+                    if phase_barrier is not None:
+                        phase_barrier.abort()
+                    raise RuntimeError(f"Worker {message[1]} failed: {message[2]}")
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            if capture is not None:
+                capture.join()
+        return [outcomes[i] for i in sorted(outcomes)]
+
+    def _is_precise(self) -> bool:
+        if self.precision is None or len(self._outputs) < self.MIN_REPETITIONS:
+            return False
+        summaries: pd.DataFrame = pd.concat([output["summary"] for output in self._outputs], ignore_index=True)
+        stats: pd.DataFrame = summarize_repetitions(summaries, ["throughput"], self.confidence)
+        return bool((stats["precision"] <= self.precision).all())
+
+    def _collect(self, output: str) -> pd.DataFrame:
+        """
+        Return one output of every repetition of the last run, with a
+        repetition column when there are several.
+        """
+        if self.repetitions == 1:
+            return self._outputs[0][output]
+        frames: list[pd.DataFrame] = []
+        for repetition, outputs in enumerate(self._outputs):
+            frame: pd.DataFrame = outputs[output].copy()
+            frame.insert(1, "repetition", repetition + 1)
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    def get_summary(self) -> pd.DataFrame:
+        """
+        Summarize the merged latency histograms of every repetition of the last run.
+        Open-loop runs add the target rate and the rate achieved over the
+        whole timed stream, both in rows per second. Pipelined runs add the
+        pipeline depth.
+        :return: DataFrame with latency percentiles and throughput per operation
+        :rtype: pd.DataFrame
+        """
+        return self._collect("summary")
+
+    def get_repetition_stats(self) -> pd.DataFrame:
+        """
+        Summarize the repetitions of the last run: the mean, standard
+        deviation and bootstrap confidence interval of the mean of the main
+        metrics of every operation, with the outlying repetitions excluded.
+        :return: DataFrame with one row per operation and metric, see summarize_repetitions()
+        :rtype: pd.DataFrame
+        """
+        summaries: pd.DataFrame = pd.concat([output["summary"] for output in self._outputs], ignore_index=True)
+        repetition_stats: pd.DataFrame = summarize_repetitions(summaries, confidence=self.confidence)
+        repetition_stats.insert(0, "pktype", self.pktype.value)
+        return repetition_stats
+
+    def _build_summary(self) -> pd.DataFrame:
+        summary: pd.DataFrame = summarize_stats(self.stats)
+        if self.target_rate is not None:
+            summary["target_rate"] = self.target_rate
+            summary["achieved_rate"] = self.get_achieved_rate()
+        if self.engine == TestEngine.PIPELINE:
+            summary["depth"] = self.depth
+        summary.insert(0, "pktype", self.pktype.value)
+        summary.insert(1, "workers", self.workers)
+        summary.insert(2, "batchsize", self.batchsize)
+        summary.insert(3, "operations", self.operations)
+        return summary
+
+    def get_timeseries(self) -> pd.DataFrame:
+        """
+        Build the per-interval time series of every repetition of the last run.
+        :return: DataFrame with throughput and latency per interval and operation
+        :rtype: pd.DataFrame
+        """
+        return self._collect("timeseries")
+
+    def _build_timeseries(self) -> pd.DataFrame:
+        timeseries: pd.DataFrame = self.series.to_dataframe()
+        timeseries.insert(0, "pktype", self.pktype.value)
+        return timeseries
+
+    def get_server_stats(self) -> pd.DataFrame:
+        """
+        Build the server counter deltas of every phase of every repetition of the last run.
+        For a partitioned table, phases with key lookups add the partitions
+        scanned per batch and the pruning efficiency, the fraction of the
+        partitions a batch did not have to scan.
+        :return: DataFrame with one row per phase and one column per counter
+        :rtype: pd.DataFrame
+        """
+        return self._collect("serverstats")
+
+    def _build_server_stats(self) -> pd.DataFrame:
+        rows: list[dict[str, Any]] = []
+        for phase, deltas in self.server_stats.items():
+            rows.append({"phase": phase, **deltas, **self._get_pruning_stats(phase, deltas)})
+        server_stats: pd.DataFrame = pd.DataFrame(rows)
+        server_stats.insert(0, "pktype", self.pktype.value)
+        return server_stats
+
+    def _get_pruning_stats(self, phase: str, deltas: dict[str, float]) -> dict[str, float]:
+        if not self.layout.partitioned or "table.idx_scan" not in deltas:
+            return {}
+        # Inserts do not scan the table and FK inserts scan it once per child
+        # row, every other batch looks keys up.
+        operations: list[DBOperation] = (list(self.stats) if phase == self.TestPrimaryKeyWorkerBase.PHASE_MIXED
+                                         else [DBOperation(phase)])
+        batches: int = sum(self.stats[op].histogram.total for op in operations
+                           if op not in (DBOperation.INSERT, DBOperation.FK_INSERT) and op in self.stats)
+        if batches == 0:
+            return {}
+        scanned: float = (deltas["table.idx_scan"] + deltas.get("table.seq_scan", 0.0)) / batches
+        return {
+            "partitions.scanned_per_batch": scanned,
+            "partitions.pruning": 1.0 - scanned / self.layout.partitions
+        }
+
+    def get_layout_stats(self) -> pd.DataFrame:
+        """
+        Build the table layout analyses of every repetition of the last run.
+        :return: DataFrame with one row per analysis stage and one column per metric
+        :rtype: pd.DataFrame
+        """
+        return self._collect("layout")
+
+    def _build_layout_stats(self) -> pd.DataFrame:
+        layout_stats: pd.DataFrame = pd.DataFrame(
+            [{"stage": stage, **metrics} for stage, metrics in self.layout_stats.items()]
+        )
+        layout_stats.insert(0, "pktype", self.pktype.value)
+        return layout_stats
+
+    def get_achieved_rate(self) -> float:
+        """
+        Return the rows per second achieved over the timed stream of the last repetition,
+        across all operations and workers.
+        :return: The achieved rate
+        :rtype: float
+        """
+        rows: int = sum(op_stats.rows for op_stats in self.stats.values())
+        start: float = min((op_stats.start for op_stats in self.stats.values() if op_stats.rows), default=0.0)
+        end: float = max((op_stats.end for op_stats in self.stats.values() if op_stats.rows), default=0.0)
+        return rows / (end - start) if end > start else math.nan
+
+
+def _get_mp_context() -> Any:
+    # Not fork: pyarrow, imported by pandas, runs native threads from import
+    # on, and a fork copies whatever locks they hold into the workers.
+    methods: list[str] = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
 
-        self.dbfactory.drop_table(self.pktype)
 
-        return pd.concat(results, ignore_index=True)
\ No newline at end of file
+def _run_process_worker(worker_args: dict[str, Any], stream: bool, messages: Any, barrier: Any, phase_barrier: Any) -> None:
+    """
+    Entry point of a worker process. Runs a TestPrimaryKeyWorker synchronously
+    and reports its metrics through the message queue.
+    """
+    sink: MetricsSink | None = QueueMetricsSink(messages) if stream else None
+    worker = TestPrimaryKey.TestPrimaryKeyWorker(**worker_args, sink=sink, barrier=barrier, phase_barrier=phase_barrier)
+    try:
+        worker.run()
+    except Exception as e:
+        messages.put(("error", worker.id, repr(e)))
+        raise
+    messages.put(("done", worker.id, worker.results, worker.stats, worker.series))
@@ -0,0 +1,100 @@
+import numpy as np
+
+from dbfactory import DBOperation
+
+
+class WorkloadMix:
+    """
+    Operation mix of a mixed workload.
+
+    Each worker interleaves operations in one stream, choosing the operation
+    of every batch at random with the probabilities of the mix. The YCSB
+    presets are mapped onto the available operations: reads are SELECTs,
+    read-modify-writes (F) are UPDATEs and scans (E) are range SCANs once a
+    scan length is set, or SELECTs without one.
+    """
+    PRESETS: dict[str, dict[DBOperation, float]] = {
+        "ycsb-a": {DBOperation.SELECT: 50, DBOperation.UPDATE: 50},
+        "ycsb-b": {DBOperation.SELECT: 95, DBOperation.UPDATE: 5},
+        "ycsb-c": {DBOperation.SELECT: 100},
+        "ycsb-d": {DBOperation.SELECT: 95, DBOperation.INSERT: 5},
+        "ycsb-e": {DBOperation.SELECT: 95, DBOperation.INSERT: 5},
+        "ycsb-f": {DBOperation.SELECT: 50, DBOperation.UPDATE: 50},
+    }
+    SCAN_PRESETS: dict[str, dict[DBOperation, float]] = {
+        "ycsb-e": {DBOperation.SCAN: 95, DBOperation.INSERT: 5},
+    }
+    OPERATIONS: list[DBOperation] = list(DBOperation)
+
+    def __init__(self, weights: dict[DBOperation, float], name: str | None = None) -> None:
+        """
+        Initialize an operation mix.
+
+        :param weights: The relative weight of each operation.
+        :type weights: dict[DBOperation, float]
+        :param name: Optional name of the mix, defaults to its specification.
+        :type name: str | None
+        """
+        if any(weight < 0 for weight in weights.values()) or sum(weights.values()) <= 0:
+            raise ValueError(f"Invalid operation weights '{weights}'.")
+        total: float = sum(weights.values())
+        self.weights: dict[DBOperation, float] = {op: weights.get(op, 0) / total for op in self.OPERATIONS}
+        self.name: str = name if name is not None else ",".join(
+            f"{op.value}={weight * 100:g}" for op, weight in self.weights.items() if weight > 0
+        )
+
+    @staticmethod
+    def parse(spec: str) -> "WorkloadMix":
+        """
+        Parse an operation mix, either a preset name (ycsb-a to ycsb-f) or a
+        comma-separated list of operation=weight pairs, e.g.
+        "select=50,insert=30,update=15,delete=5".
+
+        :param spec: The mix specification.
+        :type spec: str
+        :return: The parsed operation mix.
+        :rtype: WorkloadMix
+        """
+        preset: str = spec.strip().lower()
+        if preset in WorkloadMix.PRESETS:
+            return WorkloadMix(WorkloadMix.PRESETS[preset], name=preset)
+        weights: dict[DBOperation, float] = {}
+        for item in spec.split(","):
+            name, sep, value = item.partition("=")
+            try:
+                operation: DBOperation = DBOperation(name.strip().lower())
+                weights[operation] = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid operation mix '{spec}'.") from None
+            if not sep:
+                raise ValueError(f"Invalid operation mix '{spec}'.")
+        return WorkloadMix(weights)
+
+    def with_scans(self) -> "WorkloadMix":
+        """
+        Get the mix to run once range scans are enabled, which replaces the
+        SELECTs of the scan presets with SCANs.
+
+        :return: The mix with range scans.
+        :rtype: WorkloadMix
+        """
+        if self.name in WorkloadMix.SCAN_PRESETS:
+            return WorkloadMix(WorkloadMix.SCAN_PRESETS[self.name], name=self.name)
+        return self
+
+    def schedule(self, batches: int, rng: np.random.Generator) -> list[DBOperation]:
+        """
+        Draw the operation of every batch of a stream.
+
+        :param batches: The number of batches in the stream.
+        :type batches: int
+        :param rng: The random generator to draw from.
+        :type rng: np.random.Generator
+        :return: The operation of each batch.
+        :rtype: list[DBOperation]
+        """
+        codes: np.ndarray = rng.choice(len(self.OPERATIONS), size=batches, p=list(self.weights.values()))
+        return [self.OPERATIONS[code] for code in codes.tolist()]
+
+    def __str__(self) -> str:
+        return self.name
@@ -29,13 +29,18 @@ else
 	echo "requirements.txt not found. Skipping package installation."
 fi
 
-for w in 1 2 4 8 16; do
-	for b in 1 10 50 100 500; do
-		for p in "bigint" "uuidv4" "uuidv7"; do
-            echo "Running with pktype=$p, workers=$w, batchsize=$b, operations=$ops"
-            ./.venv/bin/python ./src/main.py --logdir $ldir --metricsdir $mdir --operations $ops --workers $w --batchsize $b --pktype $p
-		done
-	done
-done
+mkdir -p $mdir
+cat > $mdir/sweep.json <<EOF
+{
+    "pktype": ["bigint", "uuidv4", "uuidv7"],
+    "workers": [1, 2, 4, 8, 16],
+    "batchsize": [1, 10, 50, 100, 500],
+    "operations": $ops
+}
+EOF
+echo "Running sweep with operations=$ops into $mdir/results"
+./.venv/bin/python ./src/main.py sweep --logdir $ldir --spec $mdir/sweep.json --store $mdir/results
+echo "Writing the report of $mdir/results"
+./.venv/bin/python ./src/main.py report --metricsdir $mdir/results
 
 deactivate
\ No newline at end of file
@@ -2,12 +2,19 @@ from ast import Delete
 import logging
 import os
 import sys
+import threading
+import time
 import unittest
+import pandas as pd
 from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath('./src'))
 
-from dbfactory import DBFactory, DBPrimaryKeyType, DBOperation
+from dbfactory import (DBFactory, DBInsertMode, DBKeyGeneration, DBParamStyle, DBPartitioning, DBPlanCacheMode, DBPrimaryKeyType,
+                       DBOperation, DBStatementFamily, DBTableLayout)
+from metrics import REPETITION_METRICS
+import testpk
+from workload import WorkloadMix
 
 class TestDBFactory(unittest.TestCase):
     def setUp(self):
@@ -94,6 +101,59 @@ CREATE TABLE test_uuidv7 (
     data CHAR(236) NOT NULL
 );""")
 
+    def test_get_table_create_statement_partitioned(self):
+        self.assertIsNotNone(self.factory)
+        with self.assertRaises(ValueError):
+            DBTableLayout(DBPartitioning.HASH, 1)
+        with self.assertRaises(ValueError):
+            DBTableLayout(DBPartitioning.RANGE, 4, 0)
+        self.assertEqual(DBTableLayout().get_suffix(), "")
+        self.assertEqual(DBTableLayout(DBPartitioning.HASH, 8).get_suffix(), "_hash8")
+        stmt = self.factory.get_table_create_statement(DBPrimaryKeyType.UUIDV7, DBTableLayout(DBPartitioning.HASH, 2))
+        self.assertIn("id UUID DEFAULT uuidv7() PRIMARY KEY,", stmt)
+        self.assertIn(") PARTITION BY HASH (id);", stmt)
+        self.assertIn("CREATE TABLE test_uuidv7_p1 PARTITION OF test_uuidv7 FOR VALUES WITH (MODULUS 2, REMAINDER 1);", stmt)
+        stmt = self.factory.get_table_create_statement(DBPrimaryKeyType.BIGINT, DBTableLayout(DBPartitioning.RANGE, 3, 5))
+        self.assertIn("PRIMARY KEY (id, created_at)\n) PARTITION BY RANGE (created_at);", stmt)
+        self.assertIn("FOR VALUES FROM (MINVALUE) TO (now() + '5 seconds'::interval);", stmt)
+        self.assertIn("FOR VALUES FROM (now() + '10 seconds'::interval) TO (MAXVALUE);", stmt)
+
+    def test_get_child_statements(self):
+        self.assertIsNotNone(self.factory)
+        stmt = self.factory.get_child_create_statement(DBPrimaryKeyType.COMPOSITE, 1)
+        self.assertIn("CREATE TABLE test_composite_c1 (", stmt)
+        self.assertIn("    parent_tenant_id INTEGER NOT NULL,\n    parent_id BIGINT NOT NULL,\n    data CHAR(64) NOT NULL,", stmt)
+        self.assertIn("FOREIGN KEY (parent_tenant_id, parent_id) REFERENCES test_composite (tenant_id, id) ON DELETE CASCADE", stmt)
+        self.assertIn("CREATE INDEX test_composite_c1_parent_idx ON test_composite_c1 (parent_tenant_id, parent_id);", stmt)
+        with self.assertRaises(ValueError):
+            self.factory.get_child_create_statement(DBPrimaryKeyType.BIGINT, 0, DBTableLayout(DBPartitioning.RANGE, 2))
+        self.assertEqual(self.factory.get_child_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.FK_INSERT, 2, 1),
+                         "WITH c0 AS (INSERT INTO test_bigint_c0 (parent_id, data) VALUES (%s, %s)) "
+                         "INSERT INTO test_bigint_c1 (parent_id, data) VALUES (%s, %s);")
+        stmt = self.factory.get_child_operation_statement(DBPrimaryKeyType.UUIDV4, DBOperation.JOIN, 2,
+                                                          family=DBStatementFamily.ARRAY, paramstyle=DBParamStyle.NUMERIC)
+        self.assertIn("JOIN test_uuidv4_c0 c ON (c.parent_id) = (p.id)\nWHERE id = ANY($1::uuid[])\nUNION ALL\n", stmt)
+        self.assertTrue(stmt.endswith("WHERE id = ANY($2::uuid[]);"))
+        with self.assertRaises(ValueError):
+            self.factory.get_child_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.SELECT, 1)
+        with self.assertRaises(ValueError):
+            self.factory.get_child_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.JOIN, 0)
+        self.assertEqual(self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.CASCADE, 1),
+                         self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.DELETE, 1))
+
+    def test_get_scan_statement(self):
+        self.assertIsNotNone(self.factory)
+        self.assertEqual(self.factory.get_scan_statement(DBPrimaryKeyType.UUIDV7, DBOperation.SCAN, 100),
+                         "SELECT * FROM test_uuidv7 WHERE id > %s ORDER BY id LIMIT 100;")
+        self.assertEqual(self.factory.get_scan_statement(DBPrimaryKeyType.COMPOSITE, DBOperation.SCAN, 10, DBParamStyle.NUMERIC),
+                         "SELECT * FROM test_composite WHERE (tenant_id, id) > ($1, $2) ORDER BY tenant_id, id LIMIT 10;")
+        self.assertEqual(self.factory.get_scan_statement(DBPrimaryKeyType.BIGINT, DBOperation.RECENT, 5),
+                         "SELECT * FROM test_bigint ORDER BY id DESC LIMIT 5;")
+        with self.assertRaises(ValueError):
+            self.factory.get_scan_statement(DBPrimaryKeyType.BIGINT, DBOperation.SELECT, 5)
+        with self.assertRaises(ValueError):
+            self.factory.get_scan_statement(DBPrimaryKeyType.BIGINT, DBOperation.SCAN, 0)
+
     def test_get_table_check_statement(self):
         self.assertIsNotNone(self.factory)
         uuidv4_check_stmt: str = self.factory.get_table_check_statement(DBPrimaryKeyType.UUIDV4)
@@ -137,6 +197,79 @@ CREATE TABLE test_uuidv7 (
         with self.assertRaises(ValueError):
             self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV4, "INVALID_OPERATION", batch_size=1)  # type: ignore
 
+    def test_get_table_operation_statement_numeric(self):
+        self.assertIsNotNone(self.factory)
+        insert_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.INSERT,
+                                                                      batch_size=3, paramstyle=DBParamStyle.NUMERIC)
+        self.assertEqual(insert_stmt, "INSERT INTO test_bigint (data) VALUES ($1), ($2), ($3) RETURNING id;")
+        update_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.UPDATE,
+                                                                      batch_size=2, paramstyle=DBParamStyle.NUMERIC)
+        self.assertEqual(update_stmt, "UPDATE test_bigint SET data = $1 WHERE id in ($2, $3);")
+        with self.assertRaises(ValueError):
+            self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.SELECT,
+                                                       batch_size=1, paramstyle="INVALID_STYLE")  # type: ignore
+
+    def test_get_table_operation_statement_array(self):
+        self.assertIsNotNone(self.factory)
+        for batch_size in [1, 100, 1000]:
+            insert_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.INSERT,
+                                                                          batch_size=batch_size, family=DBStatementFamily.ARRAY)
+            self.assertEqual(insert_stmt, "INSERT INTO test_bigint (data) SELECT unnest(%s::text[]) RETURNING id;")
+        select_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.SELECT,
+                                                                      batch_size=5, family=DBStatementFamily.ARRAY)
+        self.assertEqual(select_stmt, "SELECT * FROM test_bigint WHERE id = ANY(%s::bigint[]);")
+        update_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV7, DBOperation.UPDATE,
+                                                                      batch_size=5, family=DBStatementFamily.ARRAY)
+        self.assertEqual(update_stmt, "UPDATE test_uuidv7 SET data = %s WHERE id = ANY(%s::uuid[]);")
+        delete_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV4, DBOperation.DELETE, batch_size=5,
+                                                                      paramstyle=DBParamStyle.NUMERIC, family=DBStatementFamily.ARRAY)
+        self.assertEqual(delete_stmt, "DELETE FROM test_uuidv4 WHERE id = ANY($1::uuid[]);")
+        with self.assertRaises(ValueError):
+            self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV4, DBOperation.DELETE,
+                                                       family="INVALID_FAMILY")  # type: ignore
+
+    def test_get_table_operation_statement_client_keys(self):
+        self.assertIsNotNone(self.factory)
+        insert_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.INSERT, batch_size=2,
+                                                                      keygen=DBKeyGeneration.CLIENT)
+        self.assertEqual(insert_stmt, "INSERT INTO test_bigint (id, data) VALUES (%s, %s), (%s, %s);")
+        array_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV7, DBOperation.INSERT, batch_size=2,
+                                                                     paramstyle=DBParamStyle.NUMERIC, family=DBStatementFamily.ARRAY,
+                                                                     keygen=DBKeyGeneration.CLIENT)
+        self.assertEqual(array_stmt, "INSERT INTO test_uuidv7 (id, data) SELECT * FROM unnest($1::uuid[], $2::text[]);")
+        select_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.SELECT, batch_size=2,
+                                                                      keygen=DBKeyGeneration.CLIENT)
+        self.assertEqual(select_stmt, "SELECT * FROM test_bigint WHERE id in (%s, %s);")
+        copy_stmt: str = self.factory.get_copy_statement(DBPrimaryKeyType.UUIDV4, DBInsertMode.COPY, DBKeyGeneration.CLIENT)
+        self.assertEqual(copy_stmt, "COPY test_uuidv4 (id, data) FROM STDIN;")
+
+    def test_get_copy_statement(self):
+        self.assertIsNotNone(self.factory)
+        staging_stmt: str = self.factory.get_staging_create_statement(DBPrimaryKeyType.UUIDV7)
+        self.assertEqual(staging_stmt, "CREATE TEMP TABLE IF NOT EXISTS test_uuidv7_staging (data CHAR(236) NOT NULL) ON COMMIT DELETE ROWS;")
+        copy_stmt: str = self.factory.get_copy_statement(DBPrimaryKeyType.UUIDV7, DBInsertMode.COPY)
+        self.assertEqual(copy_stmt, "COPY test_uuidv7_staging (data) FROM STDIN;")
+        copy_binary_stmt: str = self.factory.get_copy_statement(DBPrimaryKeyType.UUIDV7, DBInsertMode.COPY_BINARY)
+        self.assertEqual(copy_binary_stmt, "COPY test_uuidv7_staging (data) FROM STDIN WITH (FORMAT binary);")
+        insert_stmt: str = self.factory.get_insert_select_statement(DBPrimaryKeyType.UUIDV7)
+        self.assertEqual(insert_stmt, "INSERT INTO test_uuidv7 (data) SELECT data FROM test_uuidv7_staging RETURNING id;")
+        with self.assertRaises(ValueError):
+            self.factory.get_copy_statement(DBPrimaryKeyType.UUIDV7, DBInsertMode.VALUES)
+
+    def test_get_copy_data(self):
+        self.assertIsNotNone(self.factory)
+        text_data: bytes = self.factory.get_copy_data(DBPrimaryKeyType.BIGINT, 3, DBInsertMode.COPY)
+        self.assertEqual(text_data, (b"A" * 244 + b"\n") * 3)
+        binary_data: bytes = self.factory.get_copy_data(DBPrimaryKeyType.BIGINT, 3, DBInsertMode.COPY_BINARY)
+        self.assertTrue(binary_data.startswith(b"PGCOPY\n\xff\r\n\x00"))
+        self.assertEqual(len(binary_data), 19 + 3 * (2 + 4 + 244) + 2)
+        with self.assertRaises(ValueError):
+            self.factory.get_copy_data(DBPrimaryKeyType.BIGINT, 3, DBInsertMode.VALUES)
+        keys_data: bytes = self.factory.get_copy_data(DBPrimaryKeyType.BIGINT, 2, DBInsertMode.COPY, keys=[7, 8])
+        self.assertEqual(keys_data, b"7\t" + b"A" * 244 + b"\n8\t" + b"A" * 244 + b"\n")
+        keys_binary: bytes = self.factory.get_copy_data(DBPrimaryKeyType.BIGINT, 2, DBInsertMode.COPY_BINARY, keys=[7, 8])
+        self.assertEqual(len(keys_binary), 19 + 2 * (2 + 4 + 8 + 4 + 244) + 2)
+
     def test_table_bigint(self):
         self.assertIsNotNone(self.factory)
         with self.factory.get_connection() as conn:
@@ -266,5 +399,330 @@ CREATE TABLE test_uuidv7 (
                 self.assertIsNotNone(drop_stmt)
                 cursor.execute(drop_stmt)
 
+    def test_statement_cache(self):
+        self.assertIsNotNone(self.factory)
+        with self.factory.get_connection() as conn:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(self.factory.get_table_create_statement(DBPrimaryKeyType.BIGINT))
+            cache = self.factory.get_statement_cache(conn, DBPlanCacheMode.GENERIC)
+            insert_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.INSERT, batch_size=2)
+            execute_stmt: str = cache.prepare(DBPrimaryKeyType.BIGINT, DBOperation.INSERT, 2, insert_stmt)
+            self.assertEqual(execute_stmt, "EXECUTE test_bigint_insert_2(%s, %s);")
+            self.assertEqual(len(cache.prepare_times), 1)
+            self.assertIs(cache.prepare(DBPrimaryKeyType.BIGINT, DBOperation.INSERT, 2, insert_stmt), execute_stmt)
+            data_val: str = self.factory.get_char_data(DBPrimaryKeyType.BIGINT, DBOperation.INSERT)
+            with conn.cursor() as cursor:
+                cursor.execute(execute_stmt, (data_val, data_val))
+                self.assertEqual(len(cursor.fetchall()), 2)
+                cursor.execute("SHOW plan_cache_mode;")
+                self.assertEqual(cursor.fetchone()[0], "force_generic_plan")
+                cursor.execute(self.factory.get_table_drop_statement(DBPrimaryKeyType.BIGINT))
+
+    def test_connection_pool(self):
+        self.assertIsNotNone(self.factory)
+        self.factory.open_pool(minconn=1, maxconn=2)
+        try:
+            with self.factory.connection() as conn:
+                first_pid: int = conn.get_backend_pid()
+                with conn.cursor() as cursor:
+                    cursor.execute("SET synchronous_commit = off;")
+                    cursor.execute("PREPARE pooled_stmt AS SELECT 1;")
+            with self.factory.connection() as conn:
+                self.assertEqual(conn.get_backend_pid(), first_pid)
+                with conn.cursor() as cursor:
+                    cursor.execute("SHOW synchronous_commit;")
+                    self.assertEqual(cursor.fetchone()[0], "on")
+                    cursor.execute("SELECT count(*) FROM pg_prepared_statements;")
+                    self.assertEqual(cursor.fetchone()[0], 0)
+                conn.close()
+            with self.factory.connection() as conn:
+                self.assertNotEqual(conn.get_backend_pid(), first_pid)
+        finally:
+            self.factory.close_pool()
+        self.assertIsNone(self.factory.pool_max)
+        with self.assertRaises(ValueError):
+            self.factory.open_pool(minconn=3, maxconn=2)
+
+    def test_connection_pool_exhausted(self):
+        self.assertIsNotNone(self.factory)
+        self.factory.open_pool(minconn=1, maxconn=1)
+        checked_out = threading.Event()
+        release = threading.Event()
+        pids: list[int] = []
+
+        def hold() -> None:
+            with self.factory.connection() as conn:
+                pids.append(conn.get_backend_pid())
+                checked_out.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        try:
+            checked_out.wait(5)
+            threading.Timer(0.2, release.set).start()
+            start = time.perf_counter()
+            with self.factory.connection() as conn:
+                self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+                self.assertEqual(conn.get_backend_pid(), pids[0])
+        finally:
+            release.set()
+            holder.join()
+            self.factory.close_pool()
+
+    def test_server_stats(self):
+        self.assertIsNotNone(self.factory)
+        self.factory.create_table(DBPrimaryKeyType.BIGINT)
+        conn = self.factory.get_connection()
+        conn.autocommit = True
+        try:
+            before: dict[str, float] = self.factory.get_server_stats(conn, DBPrimaryKeyType.BIGINT)
+            self.assertIn("table.heap_blks_hit", before)
+            self.assertIn("index.test_bigint_pkey.idx_blks_hit", before)
+            insert_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.INSERT, batch_size=2)
+            data_val: str = self.factory.get_char_data(DBPrimaryKeyType.BIGINT, DBOperation.INSERT)
+            with conn.cursor() as cursor:
+                cursor.execute(insert_stmt, (data_val, data_val))
+                flush: str | None = self.factory.get_stats_flush_statement(conn.server_version)
+                if flush is not None:
+                    cursor.execute(flush)
+            after: dict[str, float] = self.factory.get_server_stats(conn, DBPrimaryKeyType.BIGINT)
+            delta: dict[str, float] = self.factory.get_server_stats_delta(before, after)
+            self.assertEqual(set(delta), set(before) & set(after))
+            if "wal.records" in delta:
+                self.assertGreater(delta["wal.records"], 0)
+        finally:
+            conn.close()
+            self.factory.drop_table(DBPrimaryKeyType.BIGINT)
+        self.assertEqual(self.factory.get_server_stats_delta({"a": 1.0, "b": 2.0}, {"a": 3.0}), {"a": 2.0})
+
+    def test_layout_stats(self):
+        self.assertIsNotNone(self.factory)
+        self.factory.create_table(DBPrimaryKeyType.UUIDV4)
+        conn = self.factory.get_connection()
+        conn.autocommit = True
+        try:
+            insert_stmt: str = self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV4, DBOperation.INSERT, batch_size=2)
+            data_val: str = self.factory.get_char_data(DBPrimaryKeyType.UUIDV4, DBOperation.INSERT)
+            with conn.cursor() as cursor:
+                for _ in range(10):
+                    cursor.execute(insert_stmt, (data_val, data_val))
+            stats: dict[str, float] = self.factory.get_layout_stats(conn, DBPrimaryKeyType.UUIDV4)
+            self.assertEqual(stats["table.tuples"], 20)
+            self.assertGreater(stats["index.test_uuidv4_pkey.size"], 0)
+            self.assertAlmostEqual(stats["table.bytes_per_row"], stats["table.total_size"] / 20)
+            self.assertIn("id.correlation", stats)
+        finally:
+            conn.close()
+            self.factory.drop_table(DBPrimaryKeyType.UUIDV4)
+
+    def test_partitioned_table(self):
+        self.assertIsNotNone(self.factory)
+        layout = DBTableLayout(DBPartitioning.HASH, 4)
+        self.factory.create_table(DBPrimaryKeyType.COMPOSITE, layout=layout)
+        conn = self.factory.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.factory.get_table_operation_statement(DBPrimaryKeyType.COMPOSITE, DBOperation.INSERT, 40), ["A"] * 40)
+            conn.commit()
+            stats: dict[str, float] = self.factory.get_layout_stats(conn, DBPrimaryKeyType.COMPOSITE)
+            self.assertEqual(stats["table.partitions"], 4)
+            self.assertEqual(stats["table.tuples"], 40)
+            self.assertGreater(stats["index.test_composite_p3_pkey.size"], 0)
+        finally:
+            conn.close()
+            self.factory.drop_table(DBPrimaryKeyType.COMPOSITE)
+
+    def test_child_tables(self):
+        self.assertIsNotNone(self.factory)
+        self.factory.create_table(DBPrimaryKeyType.UUIDV7)
+        self.factory.create_child_tables(DBPrimaryKeyType.UUIDV7, 2)
+        conn = self.factory.get_connection()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV7, DBOperation.INSERT, 3), ["A"] * 3)
+                keys = [row[0] for row in cursor.fetchall()]
+                cursor.execute(self.factory.get_child_operation_statement(DBPrimaryKeyType.UUIDV7, DBOperation.FK_INSERT, 2, 3),
+                               [value for key in keys for value in (key, "C")] * 2)
+                cursor.execute(self.factory.get_child_operation_statement(DBPrimaryKeyType.UUIDV7, DBOperation.JOIN, 2, 2),
+                               keys[:2] * 2)
+                self.assertEqual(len(cursor.fetchall()), 4)
+                cursor.execute(self.factory.get_table_operation_statement(DBPrimaryKeyType.UUIDV7, DBOperation.CASCADE, 1), keys[:1])
+                cursor.execute("SELECT count(*) FROM test_uuidv7_c1;")
+                self.assertEqual(cursor.fetchone()[0], 2)
+            stats: dict[str, float] = self.factory.get_layout_stats(conn, DBPrimaryKeyType.UUIDV7, children=2)
+            self.assertEqual(stats["test_uuidv7_c0.tuples"], 2)
+            self.assertGreater(stats["index.test_uuidv7_c1_parent_idx.size"], 0)
+        finally:
+            conn.close()
+            self.factory.drop_table(DBPrimaryKeyType.UUIDV7, children=2)
+
+    def test_scan_buffers(self):
+        self.assertIsNotNone(self.factory)
+        self.factory.create_table(DBPrimaryKeyType.BIGINT)
+        conn = self.factory.get_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.factory.get_table_operation_statement(DBPrimaryKeyType.BIGINT, DBOperation.INSERT, 50), ["A"] * 50)
+                conn.commit()
+                stmt = self.factory.get_scan_buffers_statement()
+                cursor.execute(stmt, ["test_bigint"] * 2)
+                before = cursor.fetchone()
+                cursor.execute(self.factory.get_scan_statement(DBPrimaryKeyType.BIGINT, DBOperation.SCAN, 20), [0])
+                self.assertEqual(len(cursor.fetchall()), 20)
+                cursor.execute(stmt, ["test_bigint"] * 2)
+                after = cursor.fetchone()
+                self.assertGreater(after[0] + after[1], before[0] + before[1])
+            conn.rollback()
+        finally:
+            conn.close()
+            self.factory.drop_table(DBPrimaryKeyType.BIGINT)
+
+    def test_pipeline(self):
+        self.assertIsNotNone(self.factory)
+        self.factory.create_table(DBPrimaryKeyType.UUIDV4)
+        pipeline = self.factory.get_pipeline()
+        try:
+            insert_stmt: str = self.factory.get_table_operation_statement(
+                DBPrimaryKeyType.UUIDV4, DBOperation.INSERT, 2, DBParamStyle.NUMERIC)
+            select_stmt: str = self.factory.get_table_operation_statement(
+                DBPrimaryKeyType.UUIDV4, DBOperation.SELECT, 1, DBParamStyle.NUMERIC, DBStatementFamily.ARRAY)
+            pipeline.prepare(insert_stmt)
+            for _ in range(3):
+                pipeline.submit(insert_stmt, ["A", "B"])
+            pipeline.submit("SELECT 1 / 0;", [])
+            self.assertEqual(pipeline.pending, 4)
+            keys = [row[0] for _ in range(3) for row in pipeline.receive()]
+            self.assertEqual(len(keys), 6)
+            with self.assertRaises(Exception):
+                pipeline.receive()
+            self.assertEqual(len(pipeline.execute(select_stmt, [keys])), 6)
+            self.assertEqual(pipeline.pending, 0)
+        finally:
+            pipeline.close()
+            self.factory.drop_table(DBPrimaryKeyType.UUIDV4)
+
+    def test_dataset(self):
+        self.assertIsNotNone(self.factory)
+        self.assertEqual(self.factory.get_dataset_name(DBPrimaryKeyType.BIGINT, 1000), f"{self.factory.name}_bigint_1000")
+        with self.assertRaises(ValueError):
+            self.factory.prepare_dataset(DBPrimaryKeyType.BIGINT, 0)
+        self.factory.prepare_dataset(DBPrimaryKeyType.BIGINT, 1001, loaders=3)
+        try:
+            self.assertTrue(self.factory.has_dataset(DBPrimaryKeyType.BIGINT, 1001))
+            self.assertFalse(self.factory.has_dataset(DBPrimaryKeyType.BIGINT, 1002))
+        finally:
+            conn = self.factory.get_connection(self.factory.MAINTENANCE_DBNAME)
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"ALTER DATABASE {self.factory.get_dataset_name(DBPrimaryKeyType.BIGINT, 1001)} WITH IS_TEMPLATE false;")
+                    cursor.execute(f"DROP DATABASE {self.factory.get_dataset_name(DBPrimaryKeyType.BIGINT, 1001)};")
+            finally:
+                conn.close()
+
+    def test_clone_dataset_pooled(self):
+        self.assertIsNotNone(self.factory)
+        clone: DBFactory = DBFactory(dbname=f"{self.factory.name}_clone")
+        dataset: str = clone.get_dataset_name(DBPrimaryKeyType.BIGINT, 100)
+        clone.prepare_dataset(DBPrimaryKeyType.BIGINT, 100, loaders=1)
+        try:
+            clone.clone_dataset(DBPrimaryKeyType.BIGINT, 100)
+            clone.open_pool(2, 4)
+            # The pool is closed around the drop and re-warmed on the copy,
+            # so no pooled connection was terminated by the drop.
+            clone.clone_dataset(DBPrimaryKeyType.BIGINT, 100)
+            self.assertEqual((clone.pool_min, clone.pool_max), (2, 4))
+            with self.assertNoLogs(level=logging.WARNING):
+                with clone.connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT count(*) FROM test_bigint;")
+                        self.assertEqual(cursor.fetchone()[0], 100)
+        finally:
+            clone.close_pool()
+            conn = self.factory.get_connection(self.factory.MAINTENANCE_DBNAME)
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"DROP DATABASE IF EXISTS {clone.name} WITH (FORCE);")
+                    cursor.execute(f"ALTER DATABASE {dataset} WITH IS_TEMPLATE false;")
+                    cursor.execute(f"DROP DATABASE {dataset};")
+            finally:
+                conn.close()
+
+    def run_tester(self, **kwargs) -> tuple[testpk.TestPrimaryKey, pd.DataFrame]:
+        options = dict(dbfactory=self.factory, pktype=DBPrimaryKeyType.BIGINT, workers=2, batchsize=10, operations=200)
+        tester: testpk.TestPrimaryKey = testpk.TestPrimaryKey(**{**options, **kwargs})
+        return tester, tester.run_test()
+
+    def assert_batches(self, results: pd.DataFrame, batches: dict[str, int]) -> None:
+        self.assertEqual(results.groupby("operation").size().to_dict(), batches)
+        self.assertTrue((results["batchsize"] == 10).all())
+        self.assertEqual(sorted(results["workerid"].unique()), [0, 1])
+
+    def test_run_test_engines(self):
+        self.assertIsNotNone(self.factory)
+        phases = {"insert": 20, "select": 20, "update": 20, "delete": 20}
+        for engine in testpk.TestEngine:
+            with self.subTest(engine=engine):
+                tester, results = self.run_tester(engine=engine, depth=4)
+                self.assert_batches(results, phases)
+                summary = tester.get_summary().set_index("operation")
+                self.assertEqual(summary.loc["insert", "rows"], 200)
+                self.assertEqual(summary.loc["delete", "batches"], 20)
+                self.assertEqual("depth" in summary.columns, engine == testpk.TestEngine.PIPELINE)
+
+    def test_run_test_mix(self):
+        self.assertIsNotNone(self.factory)
+        tester, results = self.run_tester(mix=WorkloadMix.parse("select=50,insert=50"), keygen=DBKeyGeneration.CLIENT)
+        self.assertEqual(len(results), 20)
+        self.assertEqual(set(results["operation"]), {"select", "insert"})
+        self.assertEqual(tester.get_summary()["batches"].sum(), 20)
+
+    def test_run_test_open_loop(self):
+        self.assertIsNotNone(self.factory)
+        start: float = time.perf_counter()
+        tester, results = self.run_tester(target_rate=2000.0, operations=400)
+        # Four phases of 400 rows at 2000 rows/s, every phase after its first batch.
+        self.assertGreaterEqual(time.perf_counter() - start, 4 * 390 / 2000.0)
+        self.assert_batches(results, {"insert": 40, "select": 40, "update": 40, "delete": 40})
+        summary = tester.get_summary()
+        self.assertTrue((summary["target_rate"] == 2000.0).all())
+        self.assertLess(summary["achieved_rate"].iloc[0], 2000.0 * 1.05)
+
+    def test_run_test_pipeline(self):
+        self.assertIsNotNone(self.factory)
+        # Client keys are only known to _submit, server keys only once
+        # _receive has read them back; both must feed the later phases.
+        for keygen in DBKeyGeneration:
+            for depth in [1, 3]:
+                with self.subTest(keygen=keygen, depth=depth):
+                    tester, results = self.run_tester(engine=testpk.TestEngine.PIPELINE, depth=depth, keygen=keygen,
+                                                      family=DBStatementFamily.ARRAY, prepared=True)
+                    self.assert_batches(results, {"insert": 20, "select": 20, "update": 20, "delete": 20})
+                    self.assertEqual(tester.get_summary().set_index("operation").loc["select", "rows"], 200)
+
+    def test_run_test_warmup(self):
+        self.assertIsNotNone(self.factory)
+        tester, results = self.run_tester(warmup=100)
+        # Warmup batches are untimed: neither sampled nor summarized.
+        self.assert_batches(results, {"insert": 20, "select": 20, "update": 20, "delete": 20})
+        self.assertEqual(tester.get_summary().set_index("operation").loc["insert", "rows"], 200)
+
+    def test_run_test_repetitions(self):
+        self.assertIsNotNone(self.factory)
+        tester, results = self.run_tester(repetitions=2)
+        self.assertEqual(results.groupby("repetition").size().to_dict(), {1: 80, 2: 80})
+        self.assertEqual(list(tester.get_summary()["repetition"].unique()), [1, 2])
+        stats = tester.get_repetition_stats()
+        self.assertEqual(len(stats), 4 * len(REPETITION_METRICS))
+        self.assertTrue((stats["repetitions"] == 2).all())
+        # Any throughput is precise enough, so the run stops after the minimum.
+        tester, results = self.run_tester(repetitions=5, precision=100.0)
+        self.assertEqual(sorted(results["repetition"].unique()), list(range(1, testpk.TestPrimaryKey.MIN_REPETITIONS + 1)))
+        self.assertEqual(tester.get_summary()["repetition"].max(), testpk.TestPrimaryKey.MIN_REPETITIONS)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath('./src'))
+
+from histogram import LatencyHistogram
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentile(self):
+        histogram: LatencyHistogram = LatencyHistogram(digits=3)
+        for i in range(1, 10001):
+            histogram.record(i / 1e6)
+        self.assertEqual(histogram.total, 10000)
+        self.assertAlmostEqual(histogram.percentile(50), 0.005, delta=0.005 * 1e-3)
+        self.assertAlmostEqual(histogram.percentile(99.9), 0.00999, delta=0.00999 * 1e-3)
+        self.assertEqual(histogram.percentile(100), 0.01)
+        self.assertEqual(histogram.percentile(0), 1e-6)
+        self.assertAlmostEqual(histogram.mean(), 0.0050005)
+
+    def test_merge(self):
+        first: LatencyHistogram = LatencyHistogram()
+        second: LatencyHistogram = LatencyHistogram()
+        combined: LatencyHistogram = LatencyHistogram()
+        for i in range(1000):
+            value: float = (i * 7919 % 1000 + 1) / 1e4
+            (first if i % 3 else second).record(value)
+            combined.record(value)
+        first.merge(second)
+        self.assertEqual(first.total, combined.total)
+        self.assertTrue((first.counts == combined.counts).all())
+        for percentile in [50, 90, 99, 99.9, 100]:
+            self.assertEqual(first.percentile(percentile), combined.percentile(percentile))
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram(digits=3))
+
+    def test_relative_error(self):
+        for value in [3e-6, 4.2e-4, 0.017, 1.5, 120.0]:
+            histogram: LatencyHistogram = LatencyHistogram(digits=2)
+            histogram.record(value)
+            histogram.record(value * 10)
+            self.assertAlmostEqual(histogram.percentile(50), value, delta=value * 1e-2)
+
+    def test_empty(self):
+        histogram: LatencyHistogram = LatencyHistogram()
+        self.assertNotEqual(histogram.percentile(50), histogram.percentile(50))
+        with self.assertRaises(ValueError):
+            histogram.percentile(101)
+        with self.assertRaises(ValueError):
+            LatencyHistogram(digits=0)
+
+if __name__ == '__main__':
+    unittest.main()
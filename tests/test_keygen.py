@@ -0,0 +1,83 @@
+import os
+import sys
+import unittest
+import uuid
+
+sys.path.append(os.path.abspath('./src'))
+
+from dbfactory import DBPrimaryKeyType
+from keygen import (HashKeyGenerator, SequenceKeyGenerator, SnowflakeKeyGenerator, TenantKeyGenerator, ULIDKeyGenerator,
+                    UUIDv4KeyGenerator, UUIDv7KeyGenerator)
+from keystore import KeyStore, UUIDKeyStore
+from pkstrategy import get_strategy
+
+class TestKeyGenerator(unittest.TestCase):
+    def test_create_generator(self):
+        self.assertIsInstance(get_strategy(DBPrimaryKeyType.BIGINT).create_generator(3), SnowflakeKeyGenerator)
+        self.assertIsInstance(get_strategy(DBPrimaryKeyType.UUIDV4).create_generator(), UUIDv4KeyGenerator)
+        self.assertIsInstance(get_strategy(DBPrimaryKeyType.UUIDV7).create_generator(), UUIDv7KeyGenerator)
+        self.assertIsInstance(get_strategy(DBPrimaryKeyType.COMPOSITE).create_generator(3), TenantKeyGenerator)
+        with self.assertRaises(ValueError):
+            SnowflakeKeyGenerator(1024)
+
+    def test_uuidv4(self):
+        keys = UUIDKeyStore().decode(UUIDv4KeyGenerator().generate(100))
+        self.assertEqual(len(set(keys)), 100)
+        for key in keys:
+            self.assertEqual(key.version, 4)
+            self.assertEqual(key.variant, uuid.RFC_4122)
+
+    def test_uuidv7(self):
+        generator: UUIDv7KeyGenerator = UUIDv7KeyGenerator()
+        store: KeyStore = UUIDKeyStore()
+        keys: list[uuid.UUID] = []
+        for _ in range(5):
+            keys.extend(store.decode(generator.generate(3000)))
+        self.assertEqual([key.bytes for key in keys], sorted(set(key.bytes for key in keys)))
+        for key in keys:
+            self.assertEqual(key.version, 7)
+            self.assertEqual(key.variant, uuid.RFC_4122)
+
+    def test_snowflake(self):
+        generator: SnowflakeKeyGenerator = SnowflakeKeyGenerator(node=5)
+        keys: list[int] = []
+        for _ in range(5):
+            keys.extend(generator.generate(5000).tolist())
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertTrue(all((key >> 12) & 0x3FF == 5 for key in keys))
+        self.assertTrue(all(0 < key < 2 ** 63 for key in keys))
+    def test_sequence_and_hash(self):
+        first: list[int] = SequenceKeyGenerator(node=1, start=100).generate(3).tolist()
+        self.assertEqual(first, [101, 101 + SequenceKeyGenerator.NODES, 101 + 2 * SequenceKeyGenerator.NODES])
+        keys: list[int] = []
+        for node in range(3):
+            generator: HashKeyGenerator = HashKeyGenerator(node)
+            keys.extend(generator.generate(1000).tolist() + generator.generate(1000).tolist())
+        self.assertEqual(len(set(keys)), 6000)
+        self.assertNotEqual(keys[:100], sorted(keys[:100]))
+        tenants = TenantKeyGenerator(node=2).generate(500)
+        self.assertTrue(((tenants[:, 0] >= 0) & (tenants[:, 0] < TenantKeyGenerator.TENANTS)).all())
+        self.assertEqual(len(set(tenants[:, 1].tolist())), 500)
+
+    def test_sequence_int4_boundary(self):
+        strategy = get_strategy(DBPrimaryKeyType.INT4IDENTITY)
+        generators = [strategy.create_generator(node, 4) for node in range(4)]
+        self.assertEqual(generators[3].generate(2).tolist(), [2 ** 30 + 3, 2 ** 30 + 7])
+        self.assertEqual(strategy.capacity, 2 ** 30)
+        generator: SequenceKeyGenerator = SequenceKeyGenerator(node=0, nodes=2, start=2 ** 31 - 5, stop=2 ** 31)
+        self.assertEqual(generator.generate(2).tolist(), [2 ** 31 - 5, 2 ** 31 - 3])
+        with self.assertRaises(ValueError):
+            generator.generate(2)
+        self.assertEqual(generator.generate(1).tolist(), [2 ** 31 - 1])
+        with self.assertRaises(ValueError):
+            generator.generate(1)
+        with self.assertRaises(ValueError):
+            SequenceKeyGenerator(node=2, nodes=2)
+
+    def test_ulid(self):
+        keys = UUIDKeyStore().decode(ULIDKeyGenerator().generate(100))
+        self.assertEqual(len(set(keys)), 100)
+        self.assertEqual(len({key.bytes[:6] for key in keys}), 1)
+
+if __name__ == '__main__':
+    unittest.main()
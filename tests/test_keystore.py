@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+import uuid
+
+sys.path.append(os.path.abspath('./src'))
+
+from keystore import BigIntKeyStore, CompositeKeyStore, KeyStore, UUIDBytesKeyStore, UUIDKeyStore, UUIDTextKeyStore
+
+class TestKeyStore(unittest.TestCase):
+    def test_bigint(self):
+        store: KeyStore = BigIntKeyStore(capacity=2, seed=1)
+        store.append(list(range(1, 11)))
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.nbytes, 10 * 8 + 10)
+        sample = store.sample(5)
+        self.assertEqual(len(set(sample)), 5)
+        self.assertTrue(set(sample) <= set(range(1, 11)))
+        self.assertEqual(store.take(3), [1, 2, 3])
+        self.assertEqual(store.take(2), [4, 5])
+        self.assertEqual(len(store), 5)
+        self.assertEqual(set(store.sample(5)), {6, 7, 8, 9, 10})
+        with self.assertRaises(ValueError):
+            store.sample(6)
+
+    def test_uuid(self):
+        keys: list[uuid.UUID] = [uuid.uuid4() for _ in range(100)]
+        keys.append(uuid.UUID(bytes=b"\x01" + b"\x00" * 15))
+        store: KeyStore = UUIDKeyStore(capacity=10, seed=2)
+        store.append(keys)
+        self.assertEqual(store.take(100), keys[:100])
+        self.assertEqual(store.sample(1), keys[100:])
+
+    def test_delete(self):
+        store: KeyStore = BigIntKeyStore(seed=3)
+        store.append(list(range(100)))
+        store.delete(list(range(0, 100, 2)))
+        store.delete([0, 1])
+        self.assertEqual(len(store), 49)
+        for _ in range(10):
+            self.assertTrue(all(key % 2 == 1 and key > 1 for key in store.sample(10)))
+        store.delete(list(range(3, 60)))
+        self.assertEqual(set(store.sample(20)), set(range(61, 100, 2)))
+        self.assertEqual(store.take(2), [61, 63])
+
+    def test_sample_remove(self):
+        store: KeyStore = BigIntKeyStore(seed=4)
+        store.append(list(range(50)))
+        removed: set[int] = set()
+        while len(store) >= 5:
+            removed.update(store.sample(5, remove=True))
+        self.assertEqual(removed, set(range(50)))
+        self.assertEqual(len(store), 0)
+    def test_codecs(self):
+        key: uuid.UUID = uuid.uuid4()
+        text: KeyStore = UUIDTextKeyStore()
+        text.append([str(key)])
+        self.assertEqual(text.sample(1), [str(key)])
+        raw: KeyStore = UUIDBytesKeyStore()
+        raw.append([memoryview(key.bytes)])
+        self.assertEqual(raw.sample(1), [key.bytes])
+        composite: KeyStore = CompositeKeyStore(capacity=2, seed=1)
+        composite.append([(t, i) for i in range(10) for t in (1, 2)])
+        composite.delete([(2, 3), (1, 4), (3, 3)])
+        self.assertEqual(len(composite), 18)
+        self.assertEqual(composite.take(3), [(1, 0), (2, 0), (1, 1)])
+        self.assertNotIn((2, 3), composite.sample(15))
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            KeyStore()
+
+if __name__ == '__main__':
+    unittest.main()
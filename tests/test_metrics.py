@@ -0,0 +1,184 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath('./src'))
+
+from dbfactory import DBOperation
+from metrics import (IntervalCounters, MetricRecorder, MetricsFormat, MetricsSink, find_outliers, get_metrics_sink, merge_stats,
+                     read_metrics, summarize_repetitions, summarize_stats)
+
+class TestMetricRecorder(unittest.TestCase):
+    def test_record(self):
+        recorder: MetricRecorder = MetricRecorder(workerid=3, capacity=4)
+        self.assertEqual(len(recorder), 0)
+        recorder.record(DBOperation.INSERT, 10, 1.0, 1.5)
+        recorder.record(DBOperation.SELECT, 10, 2.0, 2.25)
+        self.assertEqual(len(recorder), 2)
+        df = recorder.to_dataframe()
+        self.assertEqual(list(df.columns), ["workerid", "operation", "batchsize", "duration"])
+        self.assertEqual(list(df["workerid"]), [3, 3])
+        self.assertEqual(list(df["operation"]), ["insert", "select"])
+        self.assertEqual(list(df["batchsize"]), [10, 10])
+        self.assertEqual(list(df["duration"]), [0.5, 0.25])
+
+    def test_record_repetition(self):
+        recorder: MetricRecorder = MetricRecorder(workerid=1, capacity=2, repetition=3)
+        recorder.record(DBOperation.INSERT, 10, 1.0, 1.5)
+        df = recorder.to_dataframe()
+        self.assertEqual(list(df.columns), ["repetition", "workerid", "operation", "batchsize", "duration"])
+        self.assertEqual(list(df["repetition"]), [3])
+
+    def test_grow(self):
+        recorder: MetricRecorder = MetricRecorder(workerid=0, capacity=1)
+        for i in range(5):
+            recorder.record(DBOperation.DELETE, 1, 0.0, float(i))
+        self.assertEqual(len(recorder), 5)
+        self.assertGreaterEqual(recorder.capacity, 5)
+        self.assertEqual(list(recorder.to_dataframe()["duration"]), [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            MetricRecorder(workerid=0, capacity=0)
+
+    def test_no_raw(self):
+        recorder: MetricRecorder = MetricRecorder(workerid=0, capacity=0, raw=False)
+        recorder.record(DBOperation.INSERT, 5, 0.0, 0.001)
+        self.assertEqual(len(recorder), 0)
+        self.assertTrue(recorder.to_dataframe().empty)
+        self.assertEqual(recorder.stats[DBOperation.INSERT].rows, 5)
+
+    def test_summary(self):
+        recorders: list[MetricRecorder] = [MetricRecorder(workerid=i, capacity=1, raw=False) for i in range(2)]
+        for i in range(100):
+            recorders[i % 2].record(DBOperation.SELECT, 10, float(i), float(i) + (i + 1) / 1000)
+        stats = merge_stats([recorder.stats for recorder in recorders])
+        summary = summarize_stats(stats)
+        self.assertEqual(list(summary["operation"]), ["select"])
+        row = summary.iloc[0]
+        self.assertEqual(row["batches"], 100)
+        self.assertEqual(row["rows"], 1000)
+        self.assertAlmostEqual(row["p50"], 0.050, delta=0.001)
+        self.assertAlmostEqual(row["p99"], 0.099, delta=0.001)
+        self.assertAlmostEqual(row["max"], 0.100)
+        self.assertAlmostEqual(row["throughput"], 1000 / 99.1)
+
+    def test_summary_buffers(self):
+        recorders: list[MetricRecorder] = [MetricRecorder(workerid=i, capacity=1, raw=False) for i in range(2)]
+        for i, recorder in enumerate(recorders):
+            recorder.record(DBOperation.SELECT, 10, 0.0, 0.001)
+            recorder.record(DBOperation.SCAN, 50, 0.0, 0.002)
+            recorder.stats[DBOperation.SCAN].record_buffers(10 + i, 2)
+        summary = summarize_stats(merge_stats([recorder.stats for recorder in recorders])).set_index("operation")
+        self.assertAlmostEqual(summary.loc["scan", "blks_hit"], 10.5)
+        self.assertAlmostEqual(summary.loc["scan", "blks_read"], 2.0)
+        self.assertTrue(summary["blks_hit"].isna()["select"])
+
+class TestRepetitions(unittest.TestCase):
+    def test_find_outliers(self):
+        self.assertEqual(list(find_outliers(np.array([100.0, 101.0, 99.0, 100.5, 160.0]))), [False] * 4 + [True])
+        self.assertFalse(find_outliers(np.array([100.0, 160.0])).any())
+        self.assertFalse(find_outliers(np.array([100.0, 100.0, 100.0, 100.5, 120.0])).any())
+        self.assertFalse(find_outliers(np.array([20000.0, 20100.0, 23000.0])).any())
+
+    def test_summarize_repetitions(self):
+        summaries = pd.DataFrame({
+            "operation": ["insert", "select"] * 5,
+            "throughput": [1000.0, 2000.0, 1010.0, 2020.0, 990.0, 1980.0, 1005.0, 2000.0, 5000.0, 2010.0],
+            "mean": [0.01, 0.005] * 5,
+        })
+        stats = summarize_repetitions(summaries, ["throughput", "mean"], seed=1).set_index(["operation", "metric"])
+        self.assertEqual(len(stats), 4)
+        insert = stats.loc[("insert", "throughput")]
+        self.assertEqual(insert["repetitions"], 5)
+        self.assertEqual(insert["outliers"], 1)
+        self.assertAlmostEqual(insert["mean"], 1001.25)
+        self.assertAlmostEqual(insert["std"], np.std([1000.0, 1010.0, 990.0, 1005.0], ddof=1))
+        self.assertLessEqual(insert["ci_lo"], insert["mean"])
+        self.assertGreaterEqual(insert["ci_hi"], insert["mean"])
+        self.assertLess(insert["precision"], 0.01)
+        self.assertEqual(stats.loc[("select", "throughput"), "outliers"], 0)
+        self.assertAlmostEqual(stats.loc[("select", "mean"), "precision"], 0.0)
+        single = summarize_repetitions(summaries.iloc[:4], ["throughput"])
+        self.assertTrue(single["ci_lo"].isna().all())
+        self.assertTrue(single["precision"].isna().all())
+
+    def test_summarize_repetitions_few(self):
+        # Three repetitions keep the slow one: dropping it would leave a
+        # two-value interval claiming a precision of 0.25%.
+        summaries = pd.DataFrame({"operation": "insert", "throughput": [20000.0, 20100.0, 23000.0]})
+        stats = summarize_repetitions(summaries, ["throughput"], seed=1).iloc[0]
+        self.assertEqual(stats["outliers"], 0)
+        self.assertAlmostEqual(stats["mean"], 21033.333333333332)
+        self.assertGreater(stats["precision"], 0.02)
+
+class TestIntervalCounters(unittest.TestCase):
+    def test_series(self):
+        recorders: list[MetricRecorder] = [
+            MetricRecorder(workerid=i, capacity=1, raw=False, interval=0.5, origin=10.0) for i in range(2)
+        ]
+        for i in range(200):
+            end: float = 10.0 + i * 0.01
+            recorders[i % 2].record(DBOperation.INSERT if i < 100 else DBOperation.SELECT, 10, end - 0.001, end)
+        series: IntervalCounters = IntervalCounters(interval=0.5, origin=10.0)
+        for recorder in recorders:
+            series.merge(recorder.series)
+        self.assertEqual(series.windows, 4)
+        self.assertEqual(series.rows(), 2000)
+        df = series.to_dataframe()
+        self.assertEqual(list(df["time"]), [0.0, 0.5, 1.0, 1.5])
+        self.assertEqual(list(df["operation"]), ["insert", "insert", "select", "select"])
+        self.assertEqual(list(df["batches"]), [50, 50, 50, 50])
+        self.assertEqual(list(df["throughput"]), [1000.0] * 4)
+        self.assertAlmostEqual(df["mean"][0], 0.001)
+        self.assertEqual(df["p99"][0], 1024 / 1e6)
+
+    def test_grow_and_invalid(self):
+        series: IntervalCounters = IntervalCounters(interval=1.0, capacity=1)
+        series.record(DBOperation.DELETE, 1, 0.5, 0.1)
+        series.record(DBOperation.DELETE, 1, 99.5, 0.1)
+        self.assertEqual(series.windows, 100)
+        self.assertEqual(list(series.to_dataframe()["time"]), [0.0, 99.0])
+        with self.assertRaises(ValueError):
+            series.merge(IntervalCounters(interval=2.0))
+        with self.assertRaises(ValueError):
+            IntervalCounters(interval=0)
+
+class TestMetricsSink(unittest.TestCase):
+    def test_streaming(self):
+        for metrics_format in MetricsFormat:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path: str = os.path.join(tmpdir, f"metrics.{metrics_format.value}")
+                with get_metrics_sink(path, metrics_format) as sink:
+                    recorder: MetricRecorder = MetricRecorder(workerid=1, capacity=3, sink=sink)
+                    for i in range(7):
+                        recorder.record(DBOperation.UPDATE, 2, 0.0, float(i))
+                    self.assertEqual(sink.rows, 6)
+                    self.assertEqual(len(recorder), 1)
+                    self.assertEqual(recorder.capacity, 3)
+                    recorder.flush()
+                    self.assertEqual(len(recorder), 0)
+                df = read_metrics(path)
+                self.assertEqual(len(df), 7)
+                self.assertEqual(list(df["duration"]), [float(i) for i in range(7)])
+                self.assertEqual(set(df["operation"]), {"update"})
+
+    def test_write_after_close(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sink = get_metrics_sink(os.path.join(tmpdir, "metrics.csv"), MetricsFormat.CSV)
+            recorder: MetricRecorder = MetricRecorder(workerid=0, capacity=1, sink=sink)
+            recorder.record(DBOperation.INSERT, 1, 0.0, 1.0)
+            sink.close()
+            with self.assertRaises(ValueError):
+                recorder.flush()
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            MetricsSink("metrics.csv")
+
+if __name__ == '__main__':
+    unittest.main()
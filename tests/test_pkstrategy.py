@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+import uuid
+
+sys.path.append(os.path.abspath('./src'))
+
+from dbfactory import DBFactory, DBInsertMode, DBKeyGeneration, DBOperation, DBStatementFamily
+from keygen import KeyGenerator
+from keystore import BigIntKeyStore
+from pkstrategy import (ROW_WIDTH, STRATEGIES, DBPrimaryKeyType, KeyColumn, PrimaryKeyStrategy, get_strategy,
+                        register_strategy)
+
+class TestPrimaryKeyStrategy(unittest.TestCase):
+    def setUp(self):
+        self.factory: DBFactory = DBFactory()
+
+    def test_registry(self):
+        for table_type in DBPrimaryKeyType:
+            strategy: PrimaryKeyStrategy = get_strategy(table_type)
+            self.assertEqual(strategy.char_length + strategy.width, ROW_WIDTH)
+            keys = strategy.create_store().decode(strategy.create_generator(1).generate(4))
+            self.assertEqual(len(strategy.to_params(keys)), 4 * len(strategy.columns))
+            self.assertEqual(len(strategy.to_arrays(keys)), len(strategy.columns))
+        with self.assertRaises(ValueError):
+            get_strategy("INVALID_TYPE")  # type: ignore
+        with self.assertRaises(ValueError):
+            PrimaryKeyStrategy([KeyColumn("id", "bigint", "BIGINT")], ROW_WIDTH, KeyGenerator, BigIntKeyStore)
+
+    def test_register(self):
+        strategy: PrimaryKeyStrategy = PrimaryKeyStrategy([KeyColumn("id", "smallint", "SMALLINT")], 2, KeyGenerator,
+                                                          BigIntKeyStore)
+        previous: PrimaryKeyStrategy = get_strategy(DBPrimaryKeyType.INT4IDENTITY)
+        register_strategy(DBPrimaryKeyType.INT4IDENTITY, strategy)
+        try:
+            self.assertEqual(self.factory.get_char_length(DBPrimaryKeyType.INT4IDENTITY), 250)
+            self.assertEqual(self.factory.get_table_pk(DBPrimaryKeyType.INT4IDENTITY), "SMALLINT")
+        finally:
+            register_strategy(DBPrimaryKeyType.INT4IDENTITY, previous)
+        self.assertIs(STRATEGIES[DBPrimaryKeyType.INT4IDENTITY], previous)
+
+    def test_composite_statements(self):
+        table_type: DBPrimaryKeyType = DBPrimaryKeyType.COMPOSITE
+        self.assertEqual(self.factory.get_table_operation_statement(table_type, DBOperation.INSERT, batch_size=2),
+                         "INSERT INTO test_composite (data) VALUES (%s), (%s) RETURNING tenant_id, id;")
+        self.assertEqual(self.factory.get_table_operation_statement(table_type, DBOperation.SELECT, batch_size=2),
+                         "SELECT * FROM test_composite WHERE (tenant_id, id) in ((%s, %s), (%s, %s));")
+        self.assertEqual(self.factory.get_table_operation_statement(table_type, DBOperation.INSERT, batch_size=1,
+                                                                    keygen=DBKeyGeneration.CLIENT),
+                         "INSERT INTO test_composite (tenant_id, id, data) VALUES (%s, %s, %s);")
+        self.assertEqual(self.factory.get_table_operation_statement(table_type, DBOperation.DELETE,
+                                                                    family=DBStatementFamily.ARRAY),
+                         "DELETE FROM test_composite WHERE (tenant_id, id) IN "
+                         "(SELECT * FROM unnest(%s::integer[], %s::bigint[]));")
+        self.assertEqual(self.factory.get_copy_statement(table_type, DBInsertMode.COPY, DBKeyGeneration.CLIENT),
+                         "COPY test_composite (tenant_id, id, data) FROM STDIN;")
+        strategy: PrimaryKeyStrategy = get_strategy(table_type)
+        self.assertEqual(strategy.to_arrays([(1, 10), (2, 20)]), [[1, 2], [10, 20]])
+        self.assertEqual(strategy.from_rows([(1, 10)]), [(1, 10)])
+        data: bytes = self.factory.get_copy_data(table_type, 1, DBInsertMode.COPY_BINARY, keys=[(1, 10)])
+        self.assertEqual(len(data), 19 + (2 + 4 + 4 + 4 + 8 + 4 + 236) + 2)
+
+    def test_copy_fields(self):
+        key: uuid.UUID = uuid.UUID("00112233-4455-6677-8899-aabbccddeeff")
+        self.assertEqual(get_strategy(DBPrimaryKeyType.UUIDBYTEA).get_copy_text(key.bytes),
+                         "\\\\x00112233445566778899aabbccddeeff\t")
+        self.assertEqual(get_strategy(DBPrimaryKeyType.UUIDTEXT).get_copy_binary(str(key)),
+                         (36).to_bytes(4, "big") + str(key).encode("ascii"))
+        self.assertEqual(get_strategy(DBPrimaryKeyType.INT4IDENTITY).get_copy_binary(7),
+                         (4).to_bytes(4, "big") + (7).to_bytes(4, "big"))
+
+if __name__ == '__main__':
+    unittest.main()
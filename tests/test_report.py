@@ -0,0 +1,122 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath('./src'))
+
+from report import CACHE_FILE, build_report, escape_latex, summarize_samples, to_latex_table
+from sweep import ResultStore, SweepSpec
+
+def make_samples(n: int, workers: int = 2) -> pd.DataFrame:
+    return pd.DataFrame({
+        "workerid": np.arange(2 * n) % workers,
+        "operation": ["insert"] * n + ["select"] * n,
+        "batchsize": 10,
+        "duration": np.concatenate((np.arange(1, n + 1), np.arange(1, n + 1) * 2)) / 1000,
+    })
+
+class TestReport(unittest.TestCase):
+    def test_summarize_samples(self):
+        summary = summarize_samples(make_samples(1000).sample(frac=1, random_state=1))
+        self.assertEqual(list(summary["operation"]), ["insert", "select"])
+        insert = summary.iloc[0]
+        self.assertEqual(insert["batches"], 1000)
+        self.assertEqual(insert["rows"], 10000)
+        self.assertAlmostEqual(insert["mean"], 0.5005)
+        self.assertAlmostEqual(insert["p50"], 0.500)
+        self.assertAlmostEqual(insert["p99"], 0.990)
+        self.assertAlmostEqual(insert["max"], 1.000)
+        self.assertLess(insert["p50_lo"], insert["p50"])
+        self.assertGreater(insert["p50_hi"], insert["p50"])
+        self.assertLess(insert["mean_lo"], insert["mean"])
+        self.assertAlmostEqual(insert["elapsed"], sum(range(2, 1001, 2)) / 1000)
+        self.assertAlmostEqual(summary.iloc[1]["p50"], 1.000)
+
+    def test_build_report(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            make_samples(100).to_csv(os.path.join(tmpdir, "bigint_2_10_1000.csv"), index=False)
+            make_samples(100).to_csv(os.path.join(tmpdir, "bigint_2_10_1000_summary.csv"), index=False)
+            report = build_report(tmpdir, jobs=1)
+            self.assertEqual(len(report), 2)
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, CACHE_FILE)))
+            samples = make_samples(100)
+            samples["duration"] /= 2
+            samples.to_parquet(os.path.join(tmpdir, "uuidv7_2_10_1000.parquet"), index=False)
+            report = build_report(tmpdir, jobs=1)
+            self.assertEqual(list(report["pktype"]), ["bigint", "bigint", "uuidv7", "uuidv7"])
+            self.assertEqual(list(report["workers"]), [2, 2, 2, 2])
+            self.assertAlmostEqual(report.iloc[2]["throughput"], report.iloc[0]["throughput"] * 2)
+            self.assertEqual(len(build_report(tmpdir, jobs=1, cache=False)), 4)
+            table = to_latex_table(report, "insert", "throughput", "Insert", "tab:insert")
+            self.assertIn("bigint & uuidv7", table)
+            self.assertIn("\\textbf{", table.splitlines()[7].split("&")[3])
+
+    def test_build_report_options(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            make_samples(10).to_csv(os.path.join(tmpdir, "bigint_2_10_1000.csv"), index=False)
+            make_samples(20).to_csv(os.path.join(tmpdir, "bigint_2_10_1000_engine=process_mix=ycsb-a.csv"), index=False)
+            make_samples(30).to_csv(os.path.join(tmpdir, "bigint_2_10_1000_plancachemode=force%5Fgeneric%5Fplan"
+                                                 "_pipeline-depth=4.csv"), index=False)
+            make_samples(40).to_csv(os.path.join(tmpdir, "bigint_2_10_1000_engine=process_summary.csv"), index=False)
+            report = build_report(tmpdir, jobs=1, defaults={"engine": "thread", "pipeline_depth": "8"})
+            self.assertEqual(list(report.columns[4:9]), ["engine", "mix", "plancachemode", "pipeline_depth", "operation"])
+            self.assertEqual(list(report["batches"]), [20, 20, 10, 10, 30, 30])
+            self.assertEqual(list(report["engine"]), ["process", "process", "thread", "thread", "thread", "thread"])
+            self.assertEqual(list(report["mix"].fillna("")), ["ycsb-a", "ycsb-a", "", "", "", ""])
+            self.assertEqual(report.iloc[4]["plancachemode"], "force_generic_plan")
+            self.assertEqual(list(report["pipeline_depth"]), ["8", "8", "8", "8", "4", "4"])
+
+    def test_to_latex_table_options(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for pktype in ["bigint", "uuidv7"]:
+                make_samples(10).to_csv(os.path.join(tmpdir, f"{pktype}_2_10_1000.csv"), index=False)
+                make_samples(20).to_csv(os.path.join(tmpdir, f"{pktype}_2_10_1000_engine=process.csv"), index=False)
+            report = build_report(tmpdir, jobs=1, defaults={"engine": "thread"})
+            lines = to_latex_table(report, "insert", "batches", "Insert", "tab:insert", digits=0).splitlines()
+            # One row per engine instead of the mean of both.
+            self.assertEqual(lines[3], "  \\begin{tabular}{lrrrr}")
+            self.assertEqual(lines[5], "    engine & Workers & Batch & bigint & uuidv7 \\\\")
+            self.assertEqual(lines[7], "    process & 2 & 10 & \\textbf{20} & \\textbf{20} \\\\")
+            self.assertEqual(lines[8], "    thread & 2 & 10 & \\textbf{10} & \\textbf{10} \\\\")
+
+    def test_escape_latex(self):
+        self.assertEqual(escape_latex("force_generic_plan"), "force\\_generic\\_plan")
+        self.assertEqual(escape_latex("50%"), "50\\%")
+
+    def test_build_report_rewritten(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "bigint_2_10_1000.csv")
+            make_samples(10).to_csv(path, index=False)
+            self.assertEqual(list(build_report(tmpdir, jobs=1)["batches"]), [10, 10])
+            make_samples(20).to_csv(path, index=False)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(list(build_report(tmpdir, jobs=1)["batches"]), [20, 20])
+            cached = pd.read_parquet(os.path.join(tmpdir, CACHE_FILE))
+            self.assertEqual(list(cached["batches"]), [20, 20])
+
+    def test_build_report_store(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store: ResultStore = ResultStore(tmpdir)
+            spec: SweepSpec = SweepSpec({"pktype": ["bigint", "uuidv7"], "engine": ["thread"], "batchsize": 10})
+            for cell in spec.cells():
+                cell_id: str = spec.get_cell_id(cell)
+                make_samples(50).to_parquet(store.get_path("metrics", cell_id), index=False)
+                store.write("summary", cell_id, pd.DataFrame({
+                    "pktype": [cell["pktype"]], "workers": [2], "batchsize": [10], "operations": [1000]
+                }))
+                store.mark_done(cell_id, 1.0)
+            report = build_report(tmpdir, jobs=1)
+            self.assertEqual(list(report["pktype"]), ["bigint", "bigint", "uuidv7", "uuidv7"])
+            self.assertEqual(list(report["workers"]), [2, 2, 2, 2])
+            self.assertEqual(list(report["batchsize"]), [10, 10, 10, 10])
+            self.assertEqual(list(report["engine"]), ["thread"] * 4)
+            self.assertEqual(list(report["batches"]), [50, 50, 50, 50])
+            self.assertEqual(len(build_report(tmpdir, jobs=1)), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.append(os.path.abspath('./src'))
+
+from sweep import ResultStore, SweepSpec
+
+class TestSweepSpec(unittest.TestCase):
+    def test_cells(self):
+        spec: SweepSpec = SweepSpec({"pktype": ["bigint", "uuidv7"], "workers": [1, 4], "operations": 800})
+        cells = spec.cells()
+        self.assertEqual(len(cells), 4)
+        self.assertEqual(cells[1], {"operations": 800, "pktype": "bigint", "workers": 4})
+        self.assertEqual(spec.get_cell_id(cells[1]), "operations=800/pktype=bigint/workers=4")
+        changed: SweepSpec = SweepSpec({"pktype": ["bigint", "uuidv7"], "workers": [1, 4], "operations": 1600})
+        self.assertNotEqual(changed.get_cell_id(changed.cells()[1]), spec.get_cell_id(cells[1]))
+        order = spec.get_run_order(seed=7)
+        self.assertEqual(order, spec.get_run_order(seed=7))
+        self.assertCountEqual([spec.get_cell_id(c) for c in order], [spec.get_cell_id(c) for c in cells])
+
+    def test_argv(self):
+        spec: SweepSpec = SweepSpec({"mix": ["select=50,insert=50"], "target_rate": 100.0, "raw": False, "analyze": True})
+        cell = spec.cells()[0]
+        self.assertEqual(spec.get_cell_id(cell), "target_rate=100.0/raw=False/analyze=True/mix=select%3D50%2Cinsert%3D50")
+        self.assertEqual(SweepSpec.to_argv(cell),
+                         ["--target-rate", "100.0", "--no-raw", "--analyze", "--mix", "select=50,insert=50"])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SweepSpec({"operations": 800})
+        with self.assertRaises(ValueError):
+            SweepSpec({"workers": []})
+
+class TestResultStore(unittest.TestCase):
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store: ResultStore = ResultStore(tmpdir)
+            spec: SweepSpec = SweepSpec({"pktype": ["bigint", "uuidv4"], "workers": [2]})
+            for cell in spec.cells():
+                summary = pd.DataFrame({"pktype": [cell["pktype"]] * 2, "operation": ["insert", "select"], "rows": [10, 20]})
+                store.write("summary", spec.get_cell_id(cell), summary)
+            store.mark_done("pktype=bigint/workers=2", 1.5)
+            with open(store.checkpoint_path, "a") as f:
+                f.write('{"cell": "pktype=uuid')
+            self.assertEqual(store.completed(), {"pktype=bigint/workers=2"})
+            df = store.read("summary").sort_values(["pktype", "operation"])
+            self.assertEqual(list(df["pktype"]), ["bigint", "bigint", "uuidv4", "uuidv4"])
+            self.assertEqual(list(df["workers"]), [2, 2, 2, 2])
+            self.assertEqual(list(df["rows"]), [10, 20, 10, 20])
+            store.reset()
+            self.assertEqual(store.completed(), set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.append(os.path.abspath('./src'))
+
+from dbfactory import DBOperation
+from workload import WorkloadMix
+
+class TestWorkloadMix(unittest.TestCase):
+    def test_parse(self):
+        mix: WorkloadMix = WorkloadMix.parse("select=50,insert=30,update=15,delete=5")
+        self.assertAlmostEqual(mix.weights[DBOperation.SELECT], 0.5)
+        self.assertAlmostEqual(mix.weights[DBOperation.DELETE], 0.05)
+        self.assertEqual(str(mix), "insert=30,select=50,update=15,delete=5")
+        self.assertEqual(WorkloadMix.parse("Select=1, update=1").weights[DBOperation.UPDATE], 0.5)
+
+    def test_presets(self):
+        for name in ["ycsb-a", "ycsb-b", "ycsb-c", "ycsb-d", "ycsb-e", "ycsb-f"]:
+            mix: WorkloadMix = WorkloadMix.parse(name.upper())
+            self.assertEqual(str(mix), name)
+            self.assertAlmostEqual(sum(mix.weights.values()), 1.0)
+        self.assertEqual(WorkloadMix.parse("ycsb-c").weights[DBOperation.SELECT], 1.0)
+        reads: WorkloadMix = WorkloadMix.parse("ycsb-c")
+        self.assertIs(reads.with_scans(), reads)
+        scans: WorkloadMix = WorkloadMix.parse("ycsb-e").with_scans()
+        self.assertEqual(str(scans), "ycsb-e")
+        self.assertAlmostEqual(scans.weights[DBOperation.SCAN], 0.95)
+        self.assertEqual(scans.weights[DBOperation.SELECT], 0.0)
+
+    def test_invalid(self):
+        for spec in ["", "select", "merge=10", "select=x", "select=-1,update=2", "select=0"]:
+            with self.assertRaises(ValueError):
+                WorkloadMix.parse(spec)
+        self.assertEqual(WorkloadMix.parse("scan=10").weights[DBOperation.SCAN], 1.0)
+
+    def test_schedule(self):
+        mix: WorkloadMix = WorkloadMix.parse("select=75,delete=25")
+        schedule: list[DBOperation] = mix.schedule(10000, np.random.default_rng(1))
+        self.assertEqual(len(schedule), 10000)
+        self.assertEqual(set(schedule), {DBOperation.SELECT, DBOperation.DELETE})
+        self.assertAlmostEqual(schedule.count(DBOperation.DELETE) / 10000, 0.25, delta=0.02)
+
+if __name__ == '__main__':
+    unittest.main()